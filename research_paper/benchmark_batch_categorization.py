@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Batch Categorization Benchmark
+Re-categorizes seeded synthetic SMS exports of up to millions of rows with the vectorized batch
+categorizer, checks a sample of rows against the per-message reference and reports rows/sec.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from sms_pipeline import categorize_with_layer, generate_messages
+from sms_pipeline.batch import BATCH_CATEGORIES, BatchCategorizer, SmsBatch
+from sms_pipeline.categorizer import keyword_scores
+
+DEFAULT_SIZES = (100000, 1000000)
+VERIFY_ROWS = 20000
+
+
+def build_batch(size, seed=0):
+    """Columnar batch of size synthetic messages with spread-out amounts."""
+    rng = random.Random(seed)
+    bodies, amounts, timestamps = [], [], []
+    for message in generate_messages(size, seed=seed):
+        bodies.append(message.body)
+        amounts.append(round(rng.lognormvariate(5.6, 1.4), 2))
+        timestamps.append(message.date)
+    return SmsBatch.from_columns(bodies, amounts, timestamps)
+
+
+def verify(batch, result, codes, layers, rows, seed=0):
+    """Rows of a random sample that disagree with the reference functions."""
+    rng = random.Random(seed)
+    mismatches = 0
+    for row in rng.sample(range(len(batch)), min(rows, len(batch))):
+        body, amount = str(batch.bodies[row]), float(batch.amounts[row])
+        expected_scores = [score for _, score in keyword_scores(body, amount)]
+        expected = categorize_with_layer(body, amount)
+        if (expected_scores != result['scores'][row].tolist()
+                or expected != (BATCH_CATEGORIES[codes[row]], str(layers[row]))):
+            mismatches += 1
+    return mismatches
+
+
+def run_size(categorizer, size, seed=0, verify_rows=VERIFY_ROWS):
+    batch = build_batch(size, seed=seed)
+
+    start = time.perf_counter()
+    result = categorizer.score(batch)
+    score_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes, layers = categorizer.categorize(batch)
+    categorize_time = time.perf_counter() - start
+
+    sample = batch.bodies[:min(size, verify_rows)]
+    start = time.perf_counter()
+    for body, amount in zip(sample, batch.amounts):
+        categorize_with_layer(str(body), float(amount))
+    reference_time = (time.perf_counter() - start) / len(sample)
+
+    return {
+        'size': size,
+        'score_s': score_time,
+        'categorize_s': categorize_time,
+        'rows_per_sec': size / score_time,
+        'reference_s': reference_time * size,
+        'wallet_rows': int(result['wallet_candidate'].sum()),
+        'categories': {category.value: int(count) for category, count
+                       in zip(BATCH_CATEGORIES, np.bincount(codes, minlength=len(BATCH_CATEGORIES)))},
+        'mismatches': verify(batch, result, codes, layers, verify_rows, seed=seed),
+    }
+
+
+def main(argv=None):
+    """Benchmark vectorized batch categorization over increasing export sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Export sizes in rows (default: 10^5 and 10^6)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--verify', type=int, default=VERIFY_ROWS,
+                        help='Rows checked against the per-message reference')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    categorizer = BatchCategorizer()
+    print(f"Benchmarking batch categorization, seed {args.seed}...\n")
+    print(f"{'rows':>10}{'score s':>10}{'hybrid s':>10}{'rows/sec':>12}{'reference s':>13}"
+          f"{'diff':>6}")
+    runs = []
+    for size in args.sizes:
+        run = run_size(categorizer, size, seed=args.seed, verify_rows=args.verify)
+        runs.append(run)
+        print(f"{run['size']:>10,}{run['score_s']:>10.2f}{run['categorize_s']:>10.2f}"
+              f"{run['rows_per_sec']:>12,.0f}{run['reference_s']:>13.1f}{run['mismatches']:>6}")
+    print("\nreference s: per-message categorize_with_layer() extrapolated from a sample")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'batch_categorization', 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
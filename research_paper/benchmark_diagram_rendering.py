@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Diagram Rendering Benchmark
+Compares per-artist drawing with batched collection drawing for every spec-based diagram:
+draw time, number of shape artists, and pixel equivalence of the rasterized output.
+"""
+
+import argparse
+import importlib
+import statistics
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from build_diagrams import discover_factories
+from diagram_export import rasterize_figure
+from diagram_spec import layout, render
+
+
+def time_draws(fig, dpi, repeat):
+    """Median and best wall time of repeated full canvas draws at the given DPI."""
+    fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()  # Warm up font and path caches before timing
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        canvas.draw()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def shape_artist_count(fig):
+    """Patches plus collections on the diagram axes (text artists are the same in both modes)."""
+    ax = fig.axes[0]
+    return len(ax.patches) + len(ax.collections)
+
+
+def compare_modes(diagram, dpi=300, repeat=10, export_options=None):
+    """Render a diagram both ways and return timings, artist counts and the pixel diff."""
+    resolved = layout(diagram)
+    export_options = export_options or {}
+    results = {'name': diagram.name, 'elements': len(resolved['elements'])}
+
+    pixels = {}
+    for mode, batched in (('artists', False), ('batched', True)):
+        fig = render(resolved, batched=batched)
+        results[mode] = {
+            'artists': shape_artist_count(fig),
+            'draw_time': time_draws(fig, dpi, repeat),
+        }
+        pixels[mode] = rasterize_figure(fig, dpi=dpi, **export_options)
+        plt.close(fig)
+
+    reference, candidate = pixels['artists'], pixels['batched']
+    if reference.shape != candidate.shape:
+        results['diff_pixels'] = None
+        results['max_channel_diff'] = None
+    else:
+        delta = np.abs(reference.astype(np.int16) - candidate.astype(np.int16))
+        results['diff_pixels'] = int(np.count_nonzero(delta.any(axis=-1)))
+        results['max_channel_diff'] = int(delta.max())
+    return results
+
+
+def main(argv=None):
+    """Benchmark batched against per-artist rendering for every diagram spec."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dpi', type=int, default=300, help='Draw and rasterize resolution')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed draws per mode')
+    parser.add_argument('--only', nargs='+', metavar='FACTORY',
+                        help='Only benchmark the named create_*_diagram factories')
+    args = parser.parse_args(argv)
+
+    entries = [entry for entry in discover_factories() if entry['spec'] is not None]
+    if args.only:
+        entries = [entry for entry in entries if entry['factory'] in args.only]
+    if not entries:
+        print("❌ No spec-based diagrams found")
+        return 1
+
+    print(f"Benchmarking {len(entries)} diagram(s) at {args.dpi} DPI, {args.repeat} draws each...\n")
+    mismatches = 0
+    for entry in entries:
+        module = importlib.import_module(entry['module'])
+        diagram = getattr(module, entry['spec'])()
+        results = compare_modes(diagram, dpi=args.dpi, repeat=args.repeat,
+                                export_options=entry['export_options'])
+
+        artists, batched = results['artists'], results['batched']
+        speedup = artists['draw_time'][0] / batched['draw_time'][0]
+        print(f"📐 {results['name']} ({results['elements']} elements)")
+        print(f"   per-artist: {artists['artists']:4d} shape artists, "
+              f"draw {artists['draw_time'][0] * 1000:7.1f}ms (best {artists['draw_time'][1] * 1000:.1f}ms)")
+        print(f"   batched:    {batched['artists']:4d} shape artists, "
+              f"draw {batched['draw_time'][0] * 1000:7.1f}ms (best {batched['draw_time'][1] * 1000:.1f}ms)")
+        print(f"   speedup:    {speedup:.2f}x")
+
+        if results['diff_pixels'] is None:
+            mismatches += 1
+            print("   ❌ Output size differs")
+        elif results['diff_pixels']:
+            mismatches += 1
+            print(f"   ❌ {results['diff_pixels']} pixels differ "
+                  f"(max channel delta {results['max_channel_diff']})")
+        else:
+            print("   ✅ Pixel-identical output")
+        print()
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
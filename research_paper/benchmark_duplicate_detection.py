@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Duplicate Detection Benchmark
+Replays seeded SMS histories with heavy re-delivery through the indexed duplicate check and
+through the previous per-amount scan, checks that both make the same decisions, and measures
+how many backend queries the Bloom filter leaves on a later sync.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import timedelta
+
+from sms_pipeline import DuplicateIndex, extract_amount, generate_messages, sms_hash
+from sms_pipeline.dedup import DUPLICATE_WINDOW_MINUTES
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+DEFAULT_REDELIVERY = (0.05, 0.3, 0.6)
+
+
+class AmountScanIndex:
+    """The previous duplicate index: one list of saved times per amount, scanned in full."""
+
+    def __init__(self, window_minutes=DUPLICATE_WINDOW_MINUTES):
+        self.window = timedelta(minutes=window_minutes + 1)
+        self.processed = set()
+        self.times_by_amount = {}
+
+    def is_duplicate(self, key, amount, date):
+        if key in self.processed:
+            return True
+        for existing in self.times_by_amount.get(amount, ()):
+            if abs(date - existing) < self.window:
+                return True
+        return False
+
+    def add(self, key, amount, date):
+        self.processed.add(key)
+        self.times_by_amount.setdefault(amount, []).append(date)
+
+
+def build_history(size, redelivery, replays=1, seed=0):
+    """(hash, amount, date) of every message with an amount; the history is replayed whole."""
+    events = []
+    for message in generate_messages(size, seed=seed, duplicate_rate=redelivery):
+        amount = extract_amount(message.body.lower())
+        if amount is not None:
+            events.append((sms_hash(message.sender, amount, message.date), amount, message.date))
+    return events * replays
+
+
+def replay(index, events):
+    """Run the check-then-save loop; returns the decisions and the elapsed time."""
+    decisions = []
+    start = time.perf_counter()
+    for key, amount, date in events:
+        duplicate = index.is_duplicate(key, amount, date)
+        if not duplicate:
+            index.add(key, amount, date)
+        decisions.append(duplicate)
+    return decisions, time.perf_counter() - start
+
+
+def run(size, redelivery, replays=1, seed=0, baseline=True):
+    events = build_history(size, redelivery, replays=replays, seed=seed)
+    index = DuplicateIndex()
+    decisions, indexed_time = replay(index, events)
+    result = {
+        'size': size,
+        'redelivery': redelivery,
+        'checks': len(events),
+        'duplicates': sum(decisions),
+        'indexed_us': indexed_time / len(events) * 1e6,
+        'checks_per_sec': len(events) / indexed_time,
+    }
+    if baseline:
+        expected, scan_time = replay(AmountScanIndex(), events)
+        result['scan_us'] = scan_time / len(events) * 1e6
+        result['mismatches'] = sum(1 for want, got in zip(expected, decisions) if want != got)
+
+    # A later sync: the saved hashes are now the backend, and the inbox holds the old history
+    # plus as many new messages
+    resync_events = build_history(size, redelivery, seed=seed) + \
+        build_history(size, redelivery, seed=seed + 1)
+    resync = DuplicateIndex(backend=index.processed)
+    resync_decisions, resync_time = replay(resync, resync_events)
+    result['resync'] = {
+        'checks': len(resync_events),
+        'duplicates': sum(resync_decisions),
+        'us': resync_time / len(resync_events) * 1e6,
+        **resync.stats(),
+    }
+    return result
+
+
+def main(argv=None):
+    """Benchmark the duplicate check on replayed SMS histories."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='History sizes in messages (default: 10^4 to 10^6)')
+    parser.add_argument('--redelivery', nargs='+', type=float, default=list(DEFAULT_REDELIVERY),
+                        help='Share of re-delivered messages in each history')
+    parser.add_argument('--replays', type=int, default=2,
+                        help='Times each history is replayed, as on a repeated sync')
+    parser.add_argument('--no-baseline', action='store_true',
+                        help='Skip the per-amount scan baseline')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking duplicate detection, {args.replays} replay(s), seed {args.seed}...\n")
+    print(f"{'messages':>10}{'redeliv':>9}{'checks':>11}{'dups':>10}{'index µs':>10}"
+          f"{'scan µs':>10}{'diff':>6} │{'resync µs':>10}{'queries':>10}{'bloom fp':>10}")
+    runs = []
+    for size in args.sizes:
+        for redelivery in args.redelivery:
+            result = run(size, redelivery, replays=args.replays, seed=args.seed,
+                         baseline=not args.no_baseline)
+            runs.append(result)
+            scan = f"{result['scan_us']:>10.2f}" if 'scan_us' in result else f"{'-':>10}"
+            resync = result['resync']
+            print(f"{size:>10,}{redelivery:>9.0%}{result['checks']:>11,}"
+                  f"{result['duplicates']:>10,}{result['indexed_us']:>10.2f}{scan}"
+                  f"{result.get('mismatches', 0):>6} │{resync['us']:>10.2f}"
+                  f"{resync['backend_queries']:>10,}{resync['bloom_false_positives']:>10,}")
+    print("\nresync: the history plus as many new messages, checked against the first sync's "
+          "hashes as the backend;\nqueries: checks that reached the backend (the Firestore "
+          "query the app sends for every message)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'duplicate_detection', 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if any(result.get('mismatches') for result in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+SMS Export Reader Benchmark
+Writes seeded synthetic inbox exports as JSONL and CSV, then reads them back: fully loaded into
+memory as a direct Python reproduction of syncSmsMessages() would, streamed through a memory
+map, sharded by byte range across worker processes, and from the columnar cache. Each mode runs
+in a fresh process, so its peak RSS growth is its own, and must see exactly the same records.
+Bodies with carriage returns, newlines, quotes and commas are also written and read back, whole
+and sharded, and must come back unchanged.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sms_pipeline import generate_messages
+from sms_pipeline.exports import (cached_export, date_to_millis, map_export, read_export,
+                                  split_export, write_csv, write_jsonl)
+from sms_pipeline.models import SmsMessage
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+DEFAULT_SIZES = (100000, 1000000)
+DEFAULT_WORKERS = 4
+
+# Bodies that need quoting or escaping in an export, each written with a plain message around it
+AWKWARD_BODIES = (
+    'Rs.100 debited\rAvl bal Rs.900',
+    'Rs.100 debited\nAvl bal Rs.900',
+    'Rs.100 debited\r\nAvl bal Rs.900',
+    'Paid "Rs.250" to SWIGGY, ref 1234',
+    'INR 1,250.00 spent on card XX1234 at "CAFE, DELHI"\r\n\r\n',
+    '"',
+    '\n',
+    '',
+)
+
+
+def _peak_rss_mb():
+    """Peak resident set size of the current process in MB (None when unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def checksum(messages):
+    """Order-independent summary of the records: count, body characters and date sum."""
+    count = characters = dates = 0
+    for message in messages:
+        count += 1
+        characters += len(message.body) + len(message.sender)
+        dates += date_to_millis(message.date) or 0
+    return [count, characters, dates]
+
+
+def load_all(path):
+    """The whole export read and parsed into a list first, then processed."""
+    from sms_pipeline.exports import parse_date
+    from sms_pipeline.models import SmsMessage
+
+    with open(path, encoding='utf-8') as source:
+        records = [json.loads(line) for line in source.read().splitlines() if line]
+    messages = [SmsMessage(sender=record['sender'], body=record['body'],
+                           date=parse_date(record['date'])) for record in records]
+    return checksum(messages)
+
+
+def shard_checksum(path, start, end):
+    baseline = _peak_rss_mb()
+    result = checksum(read_export(path, start, end))
+    return result, (_peak_rss_mb() or 0) - (baseline or 0)
+
+
+def run_mode(task):
+    """Run one read mode in this (fresh) process: (checksum, seconds, peak RSS growth MB)."""
+    mode, path, workers = task
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    growth = None
+    if mode == 'load (app)':
+        result = load_all(path)
+    elif mode.startswith('sharded'):
+        shards = map_export(path, shard_checksum, workers=workers)
+        result = [sum(values) for values in zip(*(shard for shard, _ in shards))]
+        growth = max(shard_growth for _, shard_growth in shards)
+    elif mode == 'cache build':
+        result = checksum(read_export(cached_export(path)))
+    else:
+        result = checksum(read_export(path))
+    elapsed = time.perf_counter() - start
+    if growth is None and baseline is not None:
+        growth = _peak_rss_mb() - baseline
+    return result, elapsed, growth
+
+
+def round_trip(directory, shards=3):
+    """Exports of awkward bodies that do not read back unchanged, whole or sharded."""
+    plain = generate_messages(len(AWKWARD_BODIES), seed=0)
+    messages = []
+    for message, body in zip(plain, AWKWARD_BODIES):
+        messages += [message, SmsMessage(sender=message.sender, body=body, date=message.date)]
+    expected = [(message.sender, message.body, message.date) for message in messages]
+    failures = []
+    for name, writer in (('csv', write_csv), ('jsonl', write_jsonl)):
+        path = os.path.join(directory, f"round-trip.{name}")
+        writer(messages, path)
+        for mode, ranges in (('whole', [(0, None)]), ('sharded', split_export(path, shards))):
+            try:
+                got = [(message.sender, message.body, message.date)
+                       for start, end in ranges for message in read_export(path, start, end)]
+            except Exception as error:
+                got = error
+            if got != expected:
+                failures.append(f"{name} {mode}: {got!r}" if isinstance(got, Exception)
+                                else f"{name} {mode}")
+    return failures
+
+
+def run_size(size, directory, workers, seed=0):
+    jsonl = os.path.join(directory, f"export-{size}.jsonl")
+    csv_path = os.path.join(directory, f"export-{size}.csv")
+    write_jsonl(generate_messages(size, seed=seed), jsonl)
+    write_csv(generate_messages(size, seed=seed), csv_path)
+    cache = f"{jsonl}.columns"
+
+    tasks = [('load (app)', jsonl, workers), ('stream jsonl', jsonl, workers),
+             ('stream csv', csv_path, workers), (f"sharded ×{workers}", jsonl, workers),
+             ('cache build', jsonl, workers), ('cache read', cache, workers)]
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    expected = None
+    for task in tasks:
+        # A fresh interpreter per mode; pool workers could not start the shard workers
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result, elapsed, growth = pool.submit(run_mode, task).result()
+        mode, path, _ = task
+        expected = expected or result
+        runs.append({
+            'size': size,
+            'mode': mode,
+            'export_mb': os.path.getsize(path) / (1024 * 1024) if os.path.isfile(path)
+            else sum(os.path.getsize(os.path.join(path, name))
+                     for name in os.listdir(path)) / (1024 * 1024),
+            'elapsed_s': elapsed,
+            'records_per_sec': result[0] / elapsed,
+            'rss_growth_mb': growth,
+            'mismatches': sum(1 for got, want in zip(result, expected) if got != want),
+        })
+    return runs
+
+
+def main(argv=None):
+    """Benchmark streaming, sharded and cached export reading against a full load."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Messages per export (default: 10^5 and 10^6)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Worker processes for the sharded read')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking SMS export reading, seed {args.seed}...\n")
+    print(f"{'messages':>10}{'mode':>14}{'file MB':>9}{'seconds':>9}{'records/s':>11}"
+          f"{'RSS +MB':>9}{'diff':>6}")
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        failures = round_trip(directory)
+        for size in args.sizes:
+            for run in run_size(size, directory, args.workers, seed=args.seed):
+                runs.append(run)
+                growth = run['rss_growth_mb']
+                growth_text = f"{growth:>9.1f}" if growth is not None else f"{'n/a':>9}"
+                print(f"{size:>10,}{run['mode']:>14}{run['export_mb']:>9.1f}"
+                      f"{run['elapsed_s']:>9.2f}{run['records_per_sec']:>11,.0f}{growth_text}"
+                      f"{run['mismatches']:>6}")
+            print()
+    print("RSS +MB: peak resident memory growth while reading (largest worker when sharded); "
+          "cache build parses the JSONL export once into the columnar cache")
+    verdict = "✅" if not failures else "❌"
+    print(f"{verdict} Round trip of {len(AWKWARD_BODIES)} awkward bodies: "
+          f"{', '.join(failures) if failures else 'unchanged'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'export_reader', 'round_trip_failures': failures,
+                       'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if failures or any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SMS Ingestion Benchmark
+Backfills seeded synthetic inbox histories through the asyncio ingestion service against a
+simulated store with per-save latency, compares it with the app's serial await-per-SMS sync,
+checks that both save the same expenses, and resumes a half-finished backfill from its watermark.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sms_pipeline import STAGES, SmsPipeline, generate_messages
+from sms_pipeline.ingest import QUEUE_SIZE, IngestionService
+
+DEFAULT_SIZES = (10000, 100000)
+DEFAULT_SAVE_WORKERS = (8, 32, 128)
+DEFAULT_LATENCY_MS = 5.0
+# Serial sync time is extrapolated from this many messages
+SERIAL_SAMPLE = 2000
+
+
+def inbox_history(size, seed=0):
+    """A whole inbox, oldest first, as a backfill reads it."""
+    messages = list(generate_messages(size, seed=seed))
+    messages.sort(key=lambda message: message.date)
+    return messages
+
+
+def simulated_store(latency):
+    """Persistence coroutine with a fixed round-trip time, like one Firestore write."""
+    async def store(message):
+        await asyncio.sleep(latency)
+    return store
+
+
+async def serial_sync(messages, store):
+    """syncSmsMessages(): every message runs to completion, save included, before the next."""
+    pipeline = SmsPipeline(max_age=None)
+    before_save = STAGES[:-1]
+    for message in messages:
+        pipeline.received += 1
+        if pipeline.run_stages(message, before_save):
+            await store(message)
+            pipeline.stage_save(message)
+    return pipeline
+
+
+def expected_hashes(messages):
+    return {message.sms_hash for message in SmsPipeline(max_age=None).process(messages)}
+
+
+def run_service(messages, latency, save_workers, queue_size=QUEUE_SIZE, watermark=None,
+                pipeline=None):
+    saved = []
+    pipeline = pipeline if pipeline is not None else SmsPipeline(max_age=None)
+    pipeline.sink = saved.append
+    service = IngestionService(pipeline=pipeline, store=simulated_store(latency),
+                               watermark=watermark, queue_size=queue_size,
+                               save_workers=save_workers)
+    report = asyncio.run(service.run(messages))
+    return service, report, {message.sms_hash for message in saved}
+
+
+def resume_check(messages, latency, save_workers):
+    """Stop a backfill halfway, restart from its watermark, and compare with one full run."""
+    half = len(messages) // 2
+    first, _, first_saved = run_service(messages[:half], latency, save_workers)
+    # The duplicate state stands in for what the first run persisted
+    resumed_pipeline = SmsPipeline(max_age=None)
+    resumed_pipeline.duplicates = first.pipeline.duplicates
+    resumed, _, resumed_saved = run_service(messages, latency, save_workers,
+                                            watermark=first.watermark,
+                                            pipeline=resumed_pipeline)
+    return {
+        'watermark': first.watermark.isoformat(),
+        'skipped': resumed.skipped,
+        'saved': len(first_saved) + len(resumed_saved),
+        'overlap': len(first_saved & resumed_saved),
+    }, first_saved | resumed_saved
+
+
+def run_size(size, latency, worker_counts, seed=0):
+    messages = inbox_history(size, seed=seed)
+    expected = expected_hashes(messages)
+
+    sample = inbox_history(size, seed=seed)[:SERIAL_SAMPLE]
+    start = time.perf_counter()
+    asyncio.run(serial_sync(sample, simulated_store(latency)))
+    serial_time = (time.perf_counter() - start) / len(sample) * size
+
+    result = {'size': size, 'expenses': len(expected), 'latency_ms': latency * 1e3,
+              'serial_s': serial_time, 'runs': []}
+    for workers in worker_counts:
+        service, report, saved = run_service(inbox_history(size, seed=seed), latency, workers)
+        result['runs'].append({
+            'save_workers': workers,
+            'elapsed_s': report['elapsed_s'],
+            'messages_per_sec': report['messages_per_sec'],
+            'max_queue_depth': report['max_queue_depth'],
+            'reader_wait_s': report['reader_wait_s'],
+            'save_p99_ms': report['stages']['save']['p99_us'] / 1e3,
+            'mismatches': len(saved ^ expected),
+        })
+
+    resume, resumed_saved = resume_check(inbox_history(size, seed=seed), latency,
+                                         max(worker_counts))
+    resume['mismatches'] = len(resumed_saved ^ expected)
+    result['resume'] = resume
+    return result
+
+
+def main(argv=None):
+    """Benchmark concurrent SMS ingestion against the serial sync loop."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Inbox sizes in messages (default: 10^4 and 10^5)')
+    parser.add_argument('--save-workers', nargs='+', type=int, default=list(DEFAULT_SAVE_WORKERS),
+                        help='Concurrent save workers to try')
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS,
+                        help='Simulated round-trip time of one save')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking SMS ingestion with {args.latency_ms:g}ms saves, seed {args.seed}...\n")
+    print(f"{'messages':>10}{'expenses':>10}{'serial s':>10}{'workers':>9}{'service s':>11}"
+          f"{'msgs/sec':>11}{'speedup':>9}{'save p99':>11}{'diff':>6}")
+    results = []
+    for size in args.sizes:
+        result = run_size(size, args.latency_ms / 1e3, args.save_workers, seed=args.seed)
+        results.append(result)
+        for run in result['runs']:
+            print(f"{size:>10,}{result['expenses']:>10,}{result['serial_s']:>10.1f}"
+                  f"{run['save_workers']:>9}{run['elapsed_s']:>11.2f}"
+                  f"{run['messages_per_sec']:>11,.0f}"
+                  f"{result['serial_s'] / run['elapsed_s']:>8.1f}x"
+                  f"{run['save_p99_ms']:>9.2f}ms{run['mismatches']:>6}")
+        resume = result['resume']
+        print(f"{'':>10}resumed from {resume['watermark']}: {resume['skipped']:,} skipped, "
+              f"{resume['overlap']:,} saved twice, {resume['mismatches']} differences\n")
+    print("serial s: the app's await-per-SMS loop, extrapolated from "
+          f"{SERIAL_SAMPLE:,} messages")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'ingestion', 'runs': results}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    failed = any(run['mismatches'] for result in results for run in result['runs'])
+    failed = failed or any(result['resume']['mismatches'] or result['resume']['overlap']
+                           for result in results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Merchant API Resolution Benchmark
+Replays seeded Zipf-distributed Layer 1 merchant lookups, with the spelling variants SMS
+senders produce, against a local stub of the Places search API: once uncached like the app,
+once through the memoized, coalescing, rate-limited resolver from many threads, and once more
+after reopening the on-disk memo. Checks that every lookup resolves to the same category.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sms_pipeline.categorizer import map_place_category
+from sms_pipeline.merchant_api import (MerchantMemo, MerchantResolver, PlacesClient, RateLimiter,
+                                       StubPlacesServer, normalize_merchant_name)
+
+DEFAULT_MERCHANTS = 2000
+DEFAULT_LOOKUPS = 20000
+DEFAULT_THREADS = 16
+DEFAULT_LATENCY_MS = 20.0
+DEFAULT_RATE = 200.0
+ZIPF_EXPONENT = 1.1
+# Uncached lookups are timed on this many and extrapolated
+UNCACHED_SAMPLE = 500
+
+NAME_WORDS = (
+    'sharma', 'city', 'green', 'leaf', 'metro', 'sai', 'techno', 'urban', 'annapurna', 'raj',
+    'new', 'royal', 'star', 'shree', 'balaji', 'krishna', 'golden', 'silver', 'lotus', 'fresh',
+)
+KIND_WORDS = (
+    'cafe', 'kitchen', 'travels', 'store', 'mart', 'fuel station', 'parking', 'solutions',
+    'fashion', 'gym', 'book depot', 'restaurant', 'bakery', 'motors', 'hotel', 'services',
+)
+PLACE_CATEGORIES = (
+    'Café', 'Indian Restaurant', 'Bakery', 'Hotel', 'Gas Station', 'Parking', 'Taxi Service',
+    'Coworking Space', 'Business Service', 'Gym', 'Shopping Mall', 'Clothing Store',
+    'Residential Building', 'Temple',
+)
+# Share of merchants the API does not know, and of known ones without categories
+UNKNOWN_RATE = 0.15
+NO_CATEGORY_RATE = 0.05
+
+
+def merchant_universe(count, seed=0):
+    """Normalized merchant name -> place category name ("" without one, missing if unknown)."""
+    rng = random.Random(seed)
+    count = min(count, len(NAME_WORDS) ** 2 * len(KIND_WORDS))
+    names = []
+    seen = set()
+    places = {}
+    while len(names) < count:
+        name = f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(KIND_WORDS)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name)
+        roll = rng.random()
+        if roll >= UNKNOWN_RATE:
+            places[name] = '' if roll < UNKNOWN_RATE + NO_CATEGORY_RATE else \
+                rng.choice(PLACE_CATEGORIES)
+    return names, places
+
+
+def spelling(rng, name):
+    """How a sender might write the merchant name."""
+    variant = rng.randrange(5)
+    if variant == 0:
+        return name.upper()
+    if variant == 1:
+        return f"{name.title()} Pvt Ltd"
+    if variant == 2:
+        return f"{name.upper()} {rng.randint(1000, 9999)}"
+    if variant == 3:
+        return f"{name.title()}."
+    return name
+
+
+def lookup_trace(names, count, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(names))]
+    return [spelling(rng, name) for name in rng.choices(names, weights, k=count)]
+
+
+def expected_category(places, raw_name):
+    category_name = places.get(normalize_merchant_name(raw_name))
+    return map_place_category(category_name) if category_name else None
+
+
+def resolve_all(resolver, trace, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(resolver, trace))
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    """Benchmark cached merchant resolution against uncached API lookups."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--merchants', type=int, default=DEFAULT_MERCHANTS,
+                        help='Distinct merchants behind the lookups')
+    parser.add_argument('--lookups', type=int, default=DEFAULT_LOOKUPS, help='Lookups replayed')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help='Concurrent lookups, as categorization executor threads')
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS,
+                        help='Stub API response time')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Rate limit in requests per second')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic trace seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    names, places = merchant_universe(args.merchants, seed=args.seed)
+    trace = lookup_trace(names, args.lookups, seed=args.seed)
+    expected = [expected_category(places, name) for name in trace]
+    distinct = len({normalize_merchant_name(name) for name in trace})
+    print(f"Benchmarking merchant resolution: {len(trace):,} lookups of {distinct:,} merchants, "
+          f"{args.latency_ms:g}ms API, {args.threads} threads, seed {args.seed}...\n")
+
+    runs = []
+    with StubPlacesServer(places, latency=args.latency_ms / 1e3) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        client = PlacesClient(base_url=server.url)
+
+        sample = trace[:UNCACHED_SAMPLE]
+        start = time.perf_counter()
+        uncached = [client(normalize_merchant_name(name)) for name in sample]
+        elapsed = (time.perf_counter() - start) * len(trace) / len(sample)
+        runs.append({'run': 'uncached (app)', 'requests': len(trace), 'elapsed_s': elapsed,
+                     'hit_rate': 0.0, 'coalesced': 0, 'extrapolated': True,
+                     'mismatches': sum(1 for got, want in zip(uncached, expected) if got != want)})
+
+        memo_path = os.path.join(directory, 'merchant_memo.db')
+        for label in ('cold memo', 'reopened memo'):
+            memo = MerchantMemo(memo_path)
+            resolver = MerchantResolver(client, memo=memo,
+                                        rate_limiter=RateLimiter(args.rate, burst=args.threads))
+            before = server.requests
+            results, elapsed = resolve_all(resolver, trace, args.threads)
+            stats = resolver.stats()
+            memo.close()
+            runs.append({'run': label, 'requests': server.requests - before, 'elapsed_s': elapsed,
+                         'hit_rate': stats['hit_rate'], 'coalesced': stats['coalesced'],
+                         'extrapolated': False, **{key: stats[key] for key in
+                                                   ('negative_hits', 'rate_limit_wait_s')},
+                         'mismatches': sum(1 for got, want in zip(results, expected)
+                                           if got != want)})
+
+    print(f"{'run':<16}{'requests':>10}{'hit rate':>10}{'coalesced':>11}{'seconds':>10}"
+          f"{'lookups/s':>11}{'diff':>6}")
+    for run in runs:
+        marker = '*' if run['extrapolated'] else ' '
+        print(f"{run['run']:<16}{run['requests']:>10,}{run['hit_rate']:>10.1%}"
+              f"{run['coalesced']:>11,}{run['elapsed_s']:>9.2f}{marker}"
+              f"{len(trace) / run['elapsed_s']:>11,.0f}{run['mismatches']:>6}")
+    print(f"\n* extrapolated from {UNCACHED_SAMPLE:,} sequential lookups")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'merchant_api', 'lookups': len(trace),
+                       'merchants': distinct, 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Merchant Matcher Benchmark
+Grows the Layer 0 merchant database from the built-in ~150 names to 100k synthetic ones and
+compares the per-merchant substring scan with the compiled multi-pattern index.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from sms_pipeline import (CategoryIndex, categorize_by_indian_merchants, categorize_with_layer,
+                          generate_messages)
+from sms_pipeline.categorizer import INDIAN_MERCHANTS, extract_wallet_merchant
+
+DEFAULT_SIZES = (150, 1000, 10000, 100000)
+DEFAULT_MESSAGES = 20000
+# Cap on naive substring checks per size, so the 100k run finishes in seconds
+NAIVE_CHECK_BUDGET = 2000000
+
+_SYLLABLES = ('ka', 'ri', 'mo', 'tu', 'ze', 'lo', 'vi', 'na', 'shu', 'pra', 'dee', 'gho',
+              'bal', 'kin', 'rav', 'tej', 'yum', 'qua', 'xor', 'fyn')
+
+
+def grow_merchants(size, seed=0):
+    """INDIAN_MERCHANTS plus synthetic names spread over its categories, size names in all."""
+    rng = random.Random(seed)
+    existing = {name for _, names in INDIAN_MERCHANTS for name in names}
+    extra = [[] for _ in INDIAN_MERCHANTS]
+    seen = set(existing)
+    while len(seen) < size:
+        words = [''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(3, 5)))
+                 for _ in range(rng.randint(1, 2))]
+        name = ' '.join(words)
+        if name not in seen:
+            seen.add(name)
+            extra[rng.randrange(len(extra))].append(name)
+    return tuple((category, names + tuple(added))
+                 for (category, names), added in zip(INDIAN_MERCHANTS, extra))
+
+
+def _time_per_call(function, bodies):
+    start = time.perf_counter()
+    results = [function(body) for body in bodies]
+    return (time.perf_counter() - start) / len(bodies), results
+
+
+def run_size(size, bodies, seed=0):
+    """Layer 0 timings and agreement for one database size."""
+    merchants = grow_merchants(size, seed=seed)
+    merchant_count = sum(len(names) for _, names in merchants)
+
+    start = time.perf_counter()
+    index = CategoryIndex(merchants=merchants)
+    build_time = time.perf_counter() - start
+
+    sample = bodies[:max(100, min(len(bodies), NAIVE_CHECK_BUDGET // merchant_count))]
+    naive_time, expected = _time_per_call(
+        lambda body: categorize_by_indian_merchants(body, merchants), sample)
+
+    def indexed(body):
+        lowered = body.lower()
+        return index.merchant_db_category(extract_wallet_merchant(lowered),
+                                          index.matcher.find_all(lowered))
+
+    index_time, actual = _time_per_call(indexed, bodies)
+    mismatches = sum(1 for want, got in zip(expected, actual) if want != got)
+
+    return {
+        'merchants': merchant_count,
+        'terms': len(index.matcher),
+        'build_s': build_time,
+        'naive_us': naive_time * 1e6,
+        'naive_sample': len(sample),
+        'index_us': index_time * 1e6,
+        'speedup': naive_time / index_time,
+        'mismatches': mismatches,
+    }
+
+
+def check_hybrid(bodies):
+    """Full three-layer agreement with the reference categorizer on the built-in tables."""
+    index = CategoryIndex()
+    mismatches = 0
+    for body in bodies:
+        for amount in (50.0, 750.0, 3000.0, 8000.0):
+            if categorize_with_layer(body, amount) != index.categorize_with_layer(body, amount):
+                mismatches += 1
+    return mismatches
+
+
+def main(argv=None):
+    """Benchmark Layer 0 merchant lookup over increasing database sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Merchant database sizes (default: 150 to 100k)')
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES,
+                        help='Synthetic messages to categorize per size')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus and name seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    bodies = [message.body for message in generate_messages(args.messages, seed=args.seed)]
+    print(f"Benchmarking merchant lookup on {len(bodies):,} messages, seed {args.seed}...\n")
+
+    hybrid_mismatches = check_hybrid(bodies)
+    verdict = "✅" if not hybrid_mismatches else "❌"
+    print(f"{verdict} Hybrid categorizer agreement: {hybrid_mismatches} mismatches\n")
+
+    print(f"{'merchants':>10}{'terms':>10}{'build s':>10}{'naive µs':>11}{'index µs':>11}"
+          f"{'speedup':>9}{'diff':>6}")
+    runs = []
+    for size in args.sizes:
+        run = run_size(size, bodies, seed=args.seed)
+        runs.append(run)
+        print(f"{run['merchants']:>10,}{run['terms']:>10,}{run['build_s']:>10.2f}"
+              f"{run['naive_us']:>11.1f}{run['index_us']:>11.1f}{run['speedup']:>8.1f}x"
+              f"{run['mismatches']:>6}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'merchant_matcher', 'hybrid_mismatches': hybrid_mismatches,
+                       'runs': runs}, output, indent=2)
+        print(f"\n✅ Saved: {args.json}")
+
+    failed = hybrid_mismatches or any(run['mismatches'] for run in runs)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
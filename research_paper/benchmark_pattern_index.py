@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Learned Pattern Index Benchmark
+Fills the blocked pattern index with 50 to 200k learned patterns built from the synthetic
+corpus and compares top-k query latency with the app's linear similarity scan, checking that
+both return the same matches.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from sms_pipeline import extract_amount, generate_messages
+from sms_pipeline.learning import (HIGH_CONFIDENCE_THRESHOLD, PatternIndex, extract_features,
+                                   similarity)
+
+DEFAULT_SIZES = (50, 1000, 10000, 100000, 200000)
+DEFAULT_QUERIES = 1000
+# Linear scans per size are capped so the large sizes finish quickly
+SCAN_QUERY_BUDGET = 2000000
+TOP_K = 5
+
+
+def learned_features(count, seed=0):
+    """Feature maps of count synthetic messages, as learnFromUserCorrection would store them."""
+    rng = random.Random(seed)
+    features = []
+    for message in generate_messages(count, seed=seed):
+        amount = extract_amount(message.body.lower())
+        if amount is None:
+            amount = round(rng.lognormvariate(5.6, 1.1), 2)
+        features.append(extract_features(message.body, amount, message.date))
+    return features
+
+
+def scan_top_k(patterns, query, k, min_similarity=0.0):
+    """The linear scan: similarity() of every pattern, best k kept."""
+    scored = [(similarity(query, pattern), pattern_id)
+              for pattern_id, pattern in enumerate(patterns)]
+    scored = [item for item in scored if item[0] >= min_similarity]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:k]
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_size(patterns, queries, size, k=TOP_K):
+    patterns = patterns[:size]
+    start = time.perf_counter()
+    index = PatternIndex()
+    for pattern in patterns:
+        index.add(pattern, None)
+    build_time = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.top_k(query, k)
+        index.top_k(query, 1, min_similarity=HIGH_CONFIDENCE_THRESHOLD)
+        latencies.append((time.perf_counter() - start) / 2)
+
+    scan_queries = queries[:max(3, min(len(queries), SCAN_QUERY_BUDGET // size))]
+    scan_latencies = []
+    mismatches = 0
+    for query in scan_queries:
+        start = time.perf_counter()
+        expected = scan_top_k(patterns, query, k)
+        scan_latencies.append(time.perf_counter() - start)
+        high = [item for item in expected[:1] if item[0] >= HIGH_CONFIDENCE_THRESHOLD]
+        if (index.top_k(query, k) != expected
+                or index.top_k(query, 1, min_similarity=HIGH_CONFIDENCE_THRESHOLD) != high):
+            mismatches += 1
+
+    return {
+        'patterns': size,
+        'blocks': len(index.blocks),
+        'build_s': build_time,
+        'index_p50_ms': _percentile(latencies, 0.5) * 1e3,
+        'index_p99_ms': _percentile(latencies, 0.99) * 1e3,
+        'scan_p50_ms': _percentile(scan_latencies, 0.5) * 1e3,
+        'scan_queries': len(scan_queries),
+        'mismatches': mismatches,
+    }
+
+
+def main(argv=None):
+    """Benchmark top-k learned pattern lookup over increasing pattern counts."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Learned patterns per user (default: 50 to 200k)')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES,
+                        help='Query messages per size')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    patterns = learned_features(max(args.sizes), seed=args.seed)
+    queries = learned_features(args.queries, seed=args.seed + 1)
+    print(f"Benchmarking learned pattern lookup with {len(queries):,} queries, "
+          f"top-{TOP_K}, seed {args.seed}...\n")
+    print(f"{'patterns':>10}{'blocks':>8}{'build s':>9}{'index p50':>11}{'index p99':>11}"
+          f"{'scan p50':>11}{'speedup':>9}{'diff':>6}")
+    runs = []
+    for size in args.sizes:
+        run = run_size(patterns, queries, size)
+        runs.append(run)
+        print(f"{run['patterns']:>10,}{run['blocks']:>8}{run['build_s']:>9.2f}"
+              f"{run['index_p50_ms']:>9.3f}ms{run['index_p99_ms']:>9.3f}ms"
+              f"{run['scan_p50_ms']:>9.2f}ms{run['scan_p50_ms'] / run['index_p50_ms']:>8.1f}x"
+              f"{run['mismatches']:>6}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'pattern_index', 'runs': runs}, output, indent=2)
+        print(f"\n✅ Saved: {args.json}")
+    return 1 if any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
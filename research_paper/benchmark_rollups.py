@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Expense Rollup Benchmark
+Answers the app's summary card and chart queries over a multi-year synthetic expense history two
+ways: by re-aggregating every expense per query, as the widgets do on each rebuild, and from the
+prefix sums of ExpenseRollups. Times building the rollups, correcting a sample of expenses and
+the queries before and after the corrections, and checks every answer against re-aggregation.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import timedelta
+
+from sms_pipeline import REFERENCE_NOW
+from sms_pipeline.models import Category
+from sms_pipeline.rollups import (MONTH, TIME_FILTERS, WEEK, ExpenseRollups, period_index,
+                                  period_start, time_filter_range, to_paise)
+
+DEFAULT_EXPENSES = 1000000
+DEFAULT_DAYS = 730
+DEFAULT_CORRECTIONS = 10000
+CHART_PERIODS = 12
+REPEATS = 5
+
+# Share of expenses per category in the synthetic history
+CATEGORY_MIX = ((Category.Food, 0.35), (Category.Travel, 0.2), (Category.Leisure, 0.2),
+                (Category.Work, 0.1), (Category.Miscellaneous, 0.15))
+
+
+def synthetic_expenses(count, days, seed=0, now=REFERENCE_NOW):
+    """{key: (datetime, Category, amount)} spread uniformly over the days before now."""
+    rng = random.Random(seed)
+    categories = [category for category, _ in CATEGORY_MIX]
+    weights = [weight for _, weight in CATEGORY_MIX]
+    expenses = {}
+    for number, category in enumerate(rng.choices(categories, weights, k=count)):
+        when = (now - timedelta(seconds=rng.uniform(0, days * 24 * 3600))).replace(microsecond=0)
+        amount = round(min(max(rng.lognormvariate(5.6, 1.1), 1.0), 250000.0), rng.choice((0, 2)))
+        expenses[f"{number:012x}"] = (when, category, amount)
+    return expenses
+
+
+def naive_filter_totals(expenses, time_filter, now):
+    """(total, category totals) re-summed over every expense, like the summary cards."""
+    start, end = time_filter_range(time_filter, now)
+    total, totals = 0, {}
+    for day, category, paise in expenses.values():
+        if (start is None or day >= start) and (end is None or day <= end):
+            total += paise
+            totals[category] = totals.get(category, 0) + paise
+    return total / 100, {category.value: totals[category] / 100
+                         for category in Category if category in totals}
+
+
+def naive_series(expenses, period, start, end):
+    """Every category's chart buckets from one pass over every expense."""
+    first, last = period_index(period, start), period_index(period, end)
+    buckets = {category: [0] * (last - first + 1) for category in Category}
+    for day, category, paise in expenses.values():
+        index = period_index(period, day)
+        if first <= index <= last:
+            buckets[category][index - first] += paise
+    return [[(period_start(period, first + offset), paise / 100)
+             for offset, paise in enumerate(buckets[category])] for category in Category]
+
+
+def queries(now):
+    """(name, rollup query, naive query) for every summary card filter and chart."""
+    today = now.date()
+    weeks = (today - timedelta(weeks=CHART_PERIODS - 1), today)
+    months = (period_start(MONTH, period_index(MONTH, today) - CHART_PERIODS + 1), today)
+    listed = [(f"{time_filter} summary",
+               lambda rollups, time_filter=time_filter: rollups.time_filter_totals(time_filter,
+                                                                                    now),
+               lambda expenses, time_filter=time_filter: naive_filter_totals(expenses,
+                                                                             time_filter, now))
+              for time_filter in TIME_FILTERS]
+    for period, (start, end) in ((WEEK, weeks), (MONTH, months)):
+        listed.append((f"{period}ly chart",
+                       lambda rollups, period=period, start=start, end=end: [
+                           rollups.series(period, start, end, category) for category in Category],
+                       lambda expenses, period=period, start=start, end=end: naive_series(
+                           expenses, period, start, end)))
+    return listed
+
+
+def run_queries(rollups, naive, now, label):
+    """Time every query both ways; a result per query."""
+    results = []
+    for name, rollup_query, naive_query in queries(now):
+        start = time.perf_counter()
+        expected = naive_query(naive)
+        naive_time = time.perf_counter() - start
+        # The first call after writes pays for rebuilding stale prefix sums
+        start = time.perf_counter()
+        answer = rollup_query(rollups)
+        first_time = time.perf_counter() - start
+        best = first_time
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            rollup_query(rollups)
+            best = min(best, time.perf_counter() - start)
+        results.append({'query': name, 'phase': label, 'naive_ms': naive_time * 1e3,
+                        'rollup_first_us': first_time * 1e6, 'rollup_us': best * 1e6,
+                        'speedup': naive_time / best, 'mismatch': answer != expected})
+    return results
+
+
+def main(argv=None):
+    """Benchmark rollup queries against re-aggregating every expense."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--expenses', type=int, default=DEFAULT_EXPENSES,
+                        help='Synthetic expenses in the history')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS,
+                        help='Days of history the expenses are spread over')
+    parser.add_argument('--corrections', type=int, default=DEFAULT_CORRECTIONS,
+                        help='Expenses re-categorized or re-priced between query rounds')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic history seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    now = REFERENCE_NOW
+    expenses = synthetic_expenses(args.expenses, args.days, seed=args.seed, now=now)
+    # What the widgets iterate: every expense's day, category and amount
+    naive = {key: (when.date(), category, to_paise(amount))
+             for key, (when, category, amount) in expenses.items()}
+    print(f"Benchmarking rollups over {len(expenses):,} expenses across {args.days} days, "
+          f"seed {args.seed}...\n")
+
+    rollups = ExpenseRollups()
+    start = time.perf_counter()
+    for key, (when, category, amount) in expenses.items():
+        rollups.add(key, when, category, amount)
+    build_time = time.perf_counter() - start
+    columns = sum(len(rollup) * 2 * (len(Category) + 1) for rollup in rollups.rollups.values())
+    results = run_queries(rollups, naive, now, 'initial')
+
+    rng = random.Random(args.seed + 1)
+    keys = rng.sample(list(expenses), min(args.corrections, len(expenses)))
+    edits = [(key, rng.choice(list(Category)), None if rng.random() < 0.5
+              else round(rng.uniform(1, 5000), 2)) for key in keys]
+    start = time.perf_counter()
+    for key, category, amount in edits:
+        rollups.correct(key, category=category, amount=amount)
+    correct_time = time.perf_counter() - start
+    for key, category, amount in edits:
+        day, _, paise = naive[key]
+        naive[key] = (day, category, paise if amount is None else to_paise(amount))
+    results += run_queries(rollups, naive, now, 'corrected')
+
+    print(f"{'query':<18}{'phase':<11}{'naive ms':>10}{'first µs':>10}{'rollup µs':>11}"
+          f"{'speedup':>10}{'diff':>6}")
+    for result in results:
+        print(f"{result['query']:<18}{result['phase']:<11}{result['naive_ms']:>10.1f}"
+              f"{result['rollup_first_us']:>10.1f}{result['rollup_us']:>11.1f}"
+              f"{result['speedup']:>9.0f}x{int(result['mismatch']):>6}")
+    mismatches = sum(result['mismatch'] for result in results)
+    print(f"\nBuilt in {build_time:.2f}s ({build_time / len(expenses) * 1e6:.2f} µs/expense), "
+          f"{len(edits):,} corrections at {correct_time / max(len(edits), 1) * 1e6:.2f} "
+          f"µs each; {columns:,} rollup slots ({columns * 8 / 1024:,.0f} KiB)")
+    verdict = "✅" if not mismatches else "❌"
+    print(f"{verdict} Rollups vs re-aggregation: {mismatches} mismatches")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'expense_rollups', 'expenses': len(expenses),
+                       'days': args.days, 'build_us_per_expense': build_time / len(expenses) * 1e6,
+                       'correction_us': correct_time / max(len(edits), 1) * 1e6,
+                       'rollup_slots': columns, 'mismatches': mismatches, 'runs': results},
+                      output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
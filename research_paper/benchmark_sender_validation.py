@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Sender Validation Benchmark
+Times Layer 0 sender validation per message: the rule-by-rule port of
+_isLegitimateFinancialSender against the precompiled SenderIndex, with a cold and a warm sender
+memo. Checks agreement on the synthetic corpus and on fuzzed sender IDs that exercise every
+accept and reject rule.
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+
+from sms_pipeline import SenderIndex, generate_messages, is_legitimate_financial_sender
+from sms_pipeline.sender import BANKING_SENDER_PATTERNS, PERSONAL_NAMES, WALLET_SENDER_PATTERNS
+
+DEFAULT_MESSAGES = 200000
+DEFAULT_FUZZ = 50000
+REPEATS = 3
+
+
+def fuzz_sender(rng):
+    """A sender ID from one of the shapes the rules distinguish, sometimes mangled."""
+    shape = rng.randrange(10)
+    digits = string.digits
+    if shape == 0:
+        sender = rng.choice(('', '+', '+91')) + ''.join(rng.choices(digits, k=rng.randint(1, 16)))
+    elif shape == 1:
+        sender = rng.choice(('1800', '800')) + ''.join(rng.choices(digits, k=rng.randint(6, 8)))
+    elif shape == 2:
+        sender = rng.choice(PERSONAL_NAMES)
+        sender = sender.upper() if rng.random() < 0.3 else sender
+    elif shape == 3:
+        sender = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+    elif shape == 4:
+        sender = (f"{rng.choice(('AX', 'VM', 'JD', 'BZ'))}-"
+                  f"{rng.choice(BANKING_SENDER_PATTERNS)}{rng.choice(('', 'BK', 'IN'))}"
+                  f"{rng.choice(('', '-S', '-T', '-P', '-G', '-X'))}")
+    elif shape == 5:
+        sender = ''.join(rng.choices(string.ascii_uppercase + digits, k=rng.randint(4, 8)))
+    elif shape == 6:
+        name = rng.choice(WALLET_SENDER_PATTERNS)
+        padding = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(0, 24)))
+        sender = f"{padding[:len(padding) // 2]}{name}{padding[len(padding) // 2:]}"
+    elif shape == 7:
+        sender = ''.join(rng.choices(string.ascii_uppercase + digits + '-', k=rng.randint(5, 32)))
+    elif shape == 8:
+        sender = ''.join(rng.choices(digits, k=rng.randint(4, 6)))
+    else:
+        alphabet = string.ascii_letters + digits + '-_ .ßé'
+        sender = ''.join(rng.choices(alphabet, k=rng.randint(1, 12)))
+    return sender
+
+
+def fuzz_body(rng, bodies, words):
+    """A corpus body, or words from the corpus shuffled into a new body."""
+    if rng.random() < 0.5:
+        return rng.choice(bodies)
+    return ' '.join(rng.choices(words, k=rng.randint(3, 40)))
+
+
+def fuzz_cases(count, bodies, seed=0):
+    rng = random.Random(seed)
+    words = ' '.join(bodies).split()
+    return [(fuzz_sender(rng), fuzz_body(rng, bodies, words)) for _ in range(count)]
+
+
+def time_validator(validator, cases):
+    """Best per-message time over REPEATS passes, and the decisions of the last pass."""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        decisions = [validator(sender, body) for sender, body in cases]
+        best = min(best, time.perf_counter() - start)
+    return best / len(cases), decisions
+
+
+def main(argv=None):
+    """Benchmark precompiled sender validation against the rule-by-rule port."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES,
+                        help='Synthetic messages validated')
+    parser.add_argument('--fuzz', type=int, default=DEFAULT_FUZZ,
+                        help='Fuzzed sender IDs checked for agreement')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    # The pipeline validates lowercased bodies
+    cases = [(message.sender, message.body.lower())
+             for message in generate_messages(args.messages, seed=args.seed)]
+    senders = len({sender for sender, _ in cases})
+    print(f"Benchmarking sender validation on {len(cases):,} messages from {senders:,} sender "
+          f"IDs, seed {args.seed}...\n")
+
+    reference_time, expected = time_validator(is_legitimate_financial_sender, cases)
+    runs = [{'validator': 'rule by rule', 'ns_per_message': reference_time * 1e9,
+             'speedup': 1.0, 'memo_hit_rate': None, 'mismatches': 0}]
+
+    start = time.perf_counter()
+    index = SenderIndex()
+    build_time = time.perf_counter() - start
+    # Cold: a fresh memo for every pass, so each sender ID is classified once per pass
+    cold_time = float('inf')
+    for _ in range(REPEATS):
+        cold = SenderIndex()
+        start = time.perf_counter()
+        for sender, body in cases:
+            cold.is_legitimate_financial_sender(sender, body)
+        cold_time = min(cold_time, (time.perf_counter() - start) / len(cases))
+    warm_time, actual = time_validator(index.is_legitimate_financial_sender, cases)
+    for label, elapsed, memo in (('compiled, cold memo', cold_time, cold.memo_stats()),
+                                 ('compiled, warm memo', warm_time, index.memo_stats())):
+        runs.append({'validator': label, 'ns_per_message': elapsed * 1e9,
+                     'speedup': reference_time / elapsed, 'memo_hit_rate': memo['hit_rate'],
+                     'mismatches': sum(1 for want, got in zip(expected, actual) if want != got)})
+
+    fuzz = fuzz_cases(args.fuzz, [body for _, body in cases[:5000]], seed=args.seed)
+    fuzz_index = SenderIndex()
+    fuzz_mismatches = sum(1 for sender, body in fuzz
+                          if is_legitimate_financial_sender(sender, body)
+                          != fuzz_index.is_legitimate_financial_sender(sender, body))
+    accepted = sum(expected)
+
+    print(f"{'validator':<22}{'ns/msg':>10}{'speedup':>9}{'memo hits':>11}{'diff':>6}")
+    for run in runs:
+        hit_rate = run['memo_hit_rate']
+        hit_text = f"{hit_rate:>11.1%}" if hit_rate is not None else f"{'-':>11}"
+        print(f"{run['validator']:<22}{run['ns_per_message']:>10,.0f}{run['speedup']:>8.1f}x"
+              f"{hit_text}{run['mismatches']:>6}")
+    verdict = "✅" if not fuzz_mismatches else "❌"
+    print(f"\n{accepted:,} of {len(cases):,} messages accepted; index built in "
+          f"{build_time * 1e3:.1f}ms")
+    print(f"{verdict} Fuzzed sender agreement: {fuzz_mismatches} mismatches in {len(fuzz):,}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'sender_validation', 'messages': len(cases),
+                       'senders': senders, 'fuzz_mismatches': fuzz_mismatches,
+                       'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    failed = fuzz_mismatches or any(run['mismatches'] for run in runs)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+SMS Pipeline Throughput Benchmark
+Streams seeded synthetic corpora of 10^3 to 10^6 messages through the reference SMS pipeline and
+reports messages/sec plus per-stage latency percentiles, to check the "12ms per SMS" claim.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from sms_pipeline import STAGES, REFERENCE_NOW, SmsPipeline, generate_messages
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+CLAIMED_MS_PER_SMS = 12.0
+
+
+def run_size(size, seed=0):
+    """Run one corpus through a fresh pipeline and return its report."""
+    pipeline = SmsPipeline(now=REFERENCE_NOW)
+    start = time.perf_counter()
+    for _ in pipeline.run(generate_messages(size, seed=seed)):
+        pass
+    wall_time = time.perf_counter() - start
+
+    report = pipeline.report()
+    stage_time = sum(stats['mean_us'] * stats['count'] for stats in report['stages'].values())
+    report.update({
+        'size': size,
+        'seed': seed,
+        'wall_time': wall_time,
+        'messages_per_sec': size / wall_time,
+        # Corpus generation is part of wall time; stage time is the pipeline's own work
+        'pipeline_ms_per_sms': stage_time / 1000 / size,
+    })
+    return report
+
+
+def print_report(report):
+    print(f"📨 {report['size']:,} messages: {report['messages_per_sec']:,.0f} msgs/sec "
+          f"({report['wall_time']:.2f}s), {report['saved']:,} expenses saved")
+    dropped = ', '.join(f"{name} {count:,}" for name, count in report['dropped'].items())
+    print(f"   dropped: {dropped or 'none'}")
+    print(f"   {'stage':<11}{'calls':>10}{'p50 µs':>10}{'p90 µs':>10}{'p99 µs':>10}"
+          f"{'p99.9 µs':>10}{'max µs':>10}")
+    for name in STAGES:
+        stats = report['stages'][name]
+        print(f"   {name:<11}{stats['count']:>10,}{stats['p50_us']:>10.1f}{stats['p90_us']:>10.1f}"
+              f"{stats['p99_us']:>10.1f}{stats['p99.9_us']:>10.1f}{stats['max_us']:>10.0f}")
+    verdict = "✅" if report['pipeline_ms_per_sms'] <= CLAIMED_MS_PER_SMS else "❌"
+    print(f"   {verdict} {report['pipeline_ms_per_sms']:.3f}ms pipeline time per SMS "
+          f"(claimed {CLAIMED_MS_PER_SMS:g}ms)\n")
+
+
+def main(argv=None):
+    """Benchmark the SMS pipeline over increasing corpus sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Corpus sizes to run (default: 10^3 to 10^6)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking SMS pipeline on {len(args.sizes)} corpus size(s), seed {args.seed}...\n")
+    reports = []
+    for size in args.sizes:
+        report = run_size(size, seed=args.seed)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'sms_pipeline', 'runs': reports}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Expense Storage Benchmark
+Saves 10k to 1M pipeline expenses with their processed-SMS markers through the in-process and
+SQLite storage backends, once with the app's one write and commit per document and once through
+the coalescing write buffer, and compares documents written, commits and time.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from itertools import islice
+
+from sms_pipeline import REFERENCE_NOW, SmsPipeline, generate_messages
+from sms_pipeline.storage import (EXPENSES, MAX_BATCH_SIZE, PROCESSED_SMS, ExpenseStore,
+                                  MemoryStorage, SqliteStorage, expense_document)
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+# Distinct pipeline expenses; larger runs reuse them under new keys
+EXPENSE_POOL = 20000
+# Share of expenses saved again shortly after with a corrected title, and how many saves later
+REWRITE_RATE = 0.1
+REWRITE_DELAY = 10
+# Per-record SQLite commits are timed on the last this many expenses and extrapolated
+PER_RECORD_SAMPLE = 20000
+DEFAULT_ROUND_TRIP_MS = 50.0
+VERIFY_KEYS = 2000
+
+
+def expense_pool(count, seed=0):
+    """Expenses as the pipeline saves them, with title, category and hash filled in."""
+    pipeline = SmsPipeline(now=REFERENCE_NOW, max_age=None)
+    return list(islice(pipeline.run(generate_messages(count * 2, seed=seed)), count))
+
+
+def save_stream(pool, size, rewrite_rate=REWRITE_RATE, seed=0):
+    """size unique expenses, with a share re-saved a few saves later under the same key."""
+    rng = random.Random(seed)
+    delayed = []
+    for index in range(size):
+        base = pool[index % len(pool)]
+        cycle = index // len(pool)
+        message = base if not cycle else replace(base, sms_hash=f"{base.sms_hash}#{cycle}")
+        yield message
+        if rng.random() < rewrite_rate:
+            delayed.append((index + REWRITE_DELAY,
+                            replace(message, title=message.title + ' (re-categorized)')))
+        while delayed and delayed[0][0] <= index:
+            yield delayed.pop(0)[1]
+    for _, message in delayed:
+        yield message
+
+
+def expected_documents(stream):
+    """Final expense documents by key: the last save of each wins."""
+    return {message.sms_hash: expense_document(message) for message in stream}
+
+
+def open_backend(name, directory):
+    if name == 'memory':
+        return MemoryStorage()
+    path = os.path.join(directory, f"expenses-{time.perf_counter_ns()}.db")
+    return SqliteStorage(path)
+
+
+def verify(storage, expected, seed=0):
+    """Keys whose stored expense differs from the last save, plus any count difference."""
+    rng = random.Random(seed)
+    keys = rng.sample(sorted(expected), min(VERIFY_KEYS, len(expected)))
+    mismatches = sum(1 for key in keys if storage.get(EXPENSES, key) != expected[key])
+    mismatches += abs(storage.count(EXPENSES) - len(expected))
+    mismatches += abs(storage.count(PROCESSED_SMS) - len(expected))
+    return mismatches
+
+
+def run_mode(pool, size, backend, max_batch, directory, round_trip, seed=0):
+    stream = list(save_stream(pool, size, seed=seed))
+    storage = open_backend(backend, directory)
+    timed = stream
+    if backend == 'sqlite' and max_batch == 1 and size > PER_RECORD_SAMPLE:
+        # Fill the table in bulk, then time per-record commits on the last expenses only
+        prefill = ExpenseStore(storage, flush_interval=float('inf'), now=REFERENCE_NOW)
+        for message in stream[:-PER_RECORD_SAMPLE]:
+            prefill.save(message)
+        prefill.close()
+        storage.writes = storage.commits = 0
+        timed = stream[-PER_RECORD_SAMPLE:]
+    store = ExpenseStore(storage, max_batch=max_batch, flush_interval=float('inf'),
+                         now=REFERENCE_NOW)
+    start = time.perf_counter()
+    for message in timed:
+        store.save(message)
+    store.close()
+    scale = len(stream) / len(timed)
+    elapsed = (time.perf_counter() - start) * scale
+    stats = store.stats()
+    mismatches = verify(storage, expected_documents(stream), seed=seed)
+    storage.close()
+    return {
+        'backend': backend,
+        'max_batch': max_batch,
+        'expenses': size,
+        'extrapolated': timed is not stream,
+        'elapsed_s': elapsed,
+        'expenses_per_sec': size / elapsed,
+        'documents_written': round(stats['documents_written'] * scale),
+        'commits': round(stats['commits'] * scale),
+        'coalesced': round(stats['coalesced'] * scale),
+        'writes_per_expense': stats['documents_written'] * scale / size,
+        'network_s': stats['commits'] * scale * round_trip,
+        'mismatches': mismatches,
+    }
+
+
+def main(argv=None):
+    """Benchmark per-record against batched expense persistence."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Expenses saved per run (default: 10^4 to 10^6)')
+    parser.add_argument('--batch', type=int, default=MAX_BATCH_SIZE,
+                        help='Documents per batched commit')
+    parser.add_argument('--round-trip-ms', type=float, default=DEFAULT_ROUND_TRIP_MS,
+                        help='Network round trip per commit, for the estimated network time')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    pool = expense_pool(min(EXPENSE_POOL, max(args.sizes)), seed=args.seed)
+    print(f"Benchmarking expense storage, {REWRITE_RATE:.0%} of expenses re-saved, "
+          f"seed {args.seed}...\n")
+    print(f"{'expenses':>10}{'backend':>9}{'batch':>7}{'seconds':>10}{'exp/sec':>11}"
+          f"{'docs':>12}{'commits':>11}{'docs/exp':>10}{'network s':>11}{'diff':>6}")
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for backend in ('memory', 'sqlite'):
+                for max_batch in (1, args.batch):
+                    run = run_mode(pool, size, backend, max_batch, directory,
+                                   args.round_trip_ms / 1e3, seed=args.seed)
+                    runs.append(run)
+                    marker = '*' if run['extrapolated'] else ' '
+                    print(f"{size:>10,}{backend:>9}{max_batch:>7}{run['elapsed_s']:>9.2f}{marker}"
+                          f"{run['expenses_per_sec']:>11,.0f}{run['documents_written']:>12,}"
+                          f"{run['commits']:>11,}{run['writes_per_expense']:>10.2f}"
+                          f"{run['network_s']:>11,.0f}{run['mismatches']:>6}")
+            print()
+    print(f"* extrapolated from the last {PER_RECORD_SAMPLE:,} expenses; network s: commits × "
+          f"{args.round_trip_ms:g}ms round trip")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'storage', 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Vector Export Benchmark
+Exports every diagram with a spec as SVG and PDF twice, through matplotlib's vector backends and
+through the compact writer in vector_export.py, and compares file size, line count, gzipped size,
+write time and the time to parse the file back (ElementTree for SVG, stream inflation and operator
+tokenizing for PDF).
+"""
+
+import argparse
+import gzip
+import importlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+from build_diagrams import discover_factories
+from diagram_export import configure_matplotlib
+from diagram_spec import layout
+from vector_export import COMPACT_FORMATS, write_compact
+
+REPEATS = 5
+
+_PDF_STREAM = re.compile(rb'<<(.*?)>>\s*stream\r?\n', re.DOTALL)
+_PDF_STREAM_END = re.compile(rb'\r?\nendstream')
+# A direct /Length; binary stream data can end in a byte that looks like part of a line break
+_PDF_LENGTH = re.compile(rb'/Length (\d+)(?!\d| \d+ R)')
+_PDF_TOKEN = re.compile(rb'\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|/[^\s/\[\]()<>]+|[^\s/\[\]()<>]+')
+
+
+def parse_svg(data):
+    """Number of elements in an SVG document."""
+    return sum(1 for _ in ElementTree.fromstring(data).iter())
+
+
+def parse_pdf(data):
+    """Number of content tokens in a PDF, inflating FlateDecode streams."""
+    tokens = 0
+    position = 0
+    while (match := _PDF_STREAM.search(data, position)) is not None:
+        dictionary, start = match.group(1), match.end()
+        length = _PDF_LENGTH.search(dictionary)
+        if length is not None:
+            end = start + int(length.group(1))
+        else:
+            end = _PDF_STREAM_END.search(data, start).start()
+        stream, position = data[start:end], end
+        if b'/FlateDecode' in dictionary:
+            stream = zlib.decompress(stream)
+        tokens += len(_PDF_TOKEN.findall(stream))
+    return tokens
+
+
+PARSERS = {'svg': parse_svg, 'pdf': parse_pdf}
+
+
+def best_time(function, *args, **kwargs):
+    """Best wall time of REPEATS calls, and the last result."""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(path, fmt, write_time):
+    with open(path, 'rb') as source:
+        data = source.read()
+    parse_time, items = best_time(PARSERS[fmt], data)
+    return {'bytes': len(data), 'lines': data.count(b'\n') + 1,
+            'gzip_bytes': len(gzip.compress(data, mtime=0)), 'write_ms': write_time * 1e3,
+            'parse_ms': parse_time * 1e3, 'parsed_items': items}
+
+
+def benchmark_entry(entry, directory):
+    """Size and timing of both exports of one diagram, per format."""
+    import matplotlib.pyplot as plt
+
+    module = importlib.import_module(entry['module'])
+    options = entry['export_options']
+    fig = getattr(module, entry['factory'])()
+    diagram_layout = layout(getattr(module, entry['spec'])())
+    runs = []
+    for fmt in COMPACT_FORMATS:
+        matplotlib_file = os.path.join(directory, f"{entry['output_name']}.matplotlib.{fmt}")
+        write_time, _ = best_time(fig.savefig, matplotlib_file, format=fmt, bbox_inches='tight',
+                                  **options)
+        basename = os.path.join(directory, f"{entry['output_name']}.compact")
+        compact_time, _ = best_time(write_compact, diagram_layout, basename, [fmt],
+                                    options.get('facecolor', 'white'),
+                                    options.get('pad_inches', 0.1))
+        runs.append({'figure': entry['output_name'], 'format': fmt,
+                     'matplotlib': measure(matplotlib_file, fmt, write_time),
+                     'compact': measure(f"{basename}.{fmt}", fmt, compact_time)})
+    plt.close(fig)
+    return runs
+
+
+def main(argv=None):
+    """Benchmark compact SVG/PDF export against matplotlib's vector backends."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+    configure_matplotlib(interactive=False)
+
+    entries = [entry for entry in discover_factories() if entry['spec'] is not None]
+    print(f"Benchmarking vector export of {len(entries)} diagram(s), best of {REPEATS}...\n")
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for entry in entries:
+            runs += benchmark_entry(entry, directory)
+
+    print(f"{'figure':<30}{'fmt':<5}{'writer':<12}{'bytes':>10}{'lines':>8}{'gzip':>9}"
+          f"{'write ms':>10}{'parse ms':>10}")
+    for run in runs:
+        for writer in ('matplotlib', 'compact'):
+            result = run[writer]
+            print(f"{run['figure']:<30}{run['format']:<5}{writer:<12}{result['bytes']:>10,}"
+                  f"{result['lines']:>8,}{result['gzip_bytes']:>9,}{result['write_ms']:>10.1f}"
+                  f"{result['parse_ms']:>10.2f}")
+        reduction = run['matplotlib']['bytes'] / run['compact']['bytes']
+        print(f"{'':<35}{'size reduction':<12}{reduction:>9.1f}x")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'vector_export', 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
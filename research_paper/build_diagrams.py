@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Research Paper Diagram Build
+Finds every create_*_diagram() factory in the generate_*.py scripts and renders them in parallel
+with the headless Agg backend, reporting wall time and peak RSS for each figure.
+"""
+
+import argparse
+import ast
+import glob
+import importlib
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from diagram_export import add_export_arguments, configure_matplotlib, prebuild_font_cache
+from diagram_spec import add_render_arguments, layout, layout_digest
+from render_cache import (DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache, layout_spec_digest,
+                          module_spec_digest, render_key)
+from vector_export import COMPACT_FORMATS
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FACTORY_PATTERN = re.compile(r'^create_\w+_diagram$')
+
+
+def _literal_assignments(tree, names):
+    """Evaluate module-level literal assignments such as OUTPUT_NAME without importing."""
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name) and target.id in names:
+                try:
+                    values[target.id] = ast.literal_eval(node.value)
+                except ValueError:
+                    pass
+    return values
+
+
+def discover_factories(script_dir=SCRIPT_DIR):
+    """
+    Describe every zero-argument create_*_diagram() factory in the generate_*.py scripts.
+
+    The generator sources are parsed with ast so the parent process never imports matplotlib.
+    Each entry holds the module and factory names, the matching <name>_spec() builder if the
+    module defines one, whether the factory takes a batched= render flag, and the module's
+    OUTPUT_NAME and EXPORT_OPTIONS (falling back to the factory name when a module has several
+    factories).
+    """
+    factories = []
+    for path in sorted(glob.glob(os.path.join(script_dir, 'generate_*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as source:
+            tree = ast.parse(source.read(), filename=path)
+        settings = _literal_assignments(tree, ('OUTPUT_NAME', 'EXPORT_OPTIONS'))
+
+        names = []
+        batchable = set()
+        functions = set()
+        for node in tree.body:
+            if not isinstance(node, ast.FunctionDef):
+                continue
+            functions.add(node.name)
+            if not FACTORY_PATTERN.match(node.name):
+                continue
+            required = len(node.args.args) - len(node.args.defaults)
+            if required == 0 and not node.args.kwonlyargs:
+                names.append(node.name)
+                if 'batched' in [arg.arg for arg in node.args.args]:
+                    batchable.add(node.name)
+
+        for factory_name in names:
+            output_name = settings.get('OUTPUT_NAME')
+            if output_name is None or len(names) > 1:
+                output_name = factory_name[len('create_'):]
+            spec_name = factory_name[len('create_'):-len('_diagram')] + '_spec'
+            factories.append({
+                'module': module_name,
+                'factory': factory_name,
+                'spec': spec_name if spec_name in functions else None,
+                'batched': factory_name in batchable,
+                'output_name': output_name,
+                'export_options': settings.get('EXPORT_OPTIONS', {}),
+            })
+    return factories
+
+
+def _peak_rss_mb():
+    """Peak resident set size of the current process in MB (None when unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _init_worker():
+    """Force the non-interactive backend before any generator imports pyplot."""
+    configure_matplotlib(interactive=False)
+
+
+def render_factory(task):
+    """Render one diagram factory in a worker process, export it and fill the cache."""
+    entry, output_dir, formats, dpi, batched, compact, cache_settings = task
+    start = time.perf_counter()
+
+    from diagram_export import export_figure
+    import matplotlib.pyplot as plt
+
+    module = importlib.import_module(entry['module'])
+    factory = getattr(module, entry['factory'])
+    fig = factory(batched=True) if batched and entry['batched'] else factory()
+    compact_layout = None
+    if compact and entry['spec'] is not None:
+        compact_layout = layout(getattr(module, entry['spec'])())
+
+    basename = os.path.join(output_dir, entry['output_name'])
+    output_files = export_figure(fig, basename, [fmt for fmt, _ in formats], dpi=dpi,
+                                 compact_layout=compact_layout, **entry['export_options'])
+    plt.close(fig)
+
+    if cache_settings is not None:
+        cache = RenderCache(*cache_settings)
+        # export_figure writes raster formats before vector ones, so match files by extension
+        keys = dict(formats)
+        for output_file in output_files:
+            fmt = os.path.splitext(output_file)[1].lstrip('.')
+            cache.store(keys[fmt], fmt, output_file)
+
+    return {
+        'factory': f"{entry['module']}.{entry['factory']}",
+        'files': output_files,
+        'wall_time': time.perf_counter() - start,
+        'peak_rss_mb': _peak_rss_mb(),
+        'cached': False,
+    }
+
+
+def figure_digest(entry):
+    """
+    Digest of what a factory draws: the generator module's source, plus its laid-out spec
+    when it has one (which needs no rendering) to catch changes made in shared spec helpers.
+    """
+    if entry['spec'] is None:
+        return module_spec_digest(entry['module'])
+    module = importlib.import_module(entry['module'])
+    diagram = getattr(module, entry['spec'])()
+    return layout_spec_digest(layout_digest(diagram), entry['module'])
+
+
+def render_mode(entry, batched, fmt=None, compact=False):
+    """
+    How a factory draws its shapes; batched output is pixel-identical but vector files differ.
+    Compact SVG and PDF are written from the spec's layout, so only factories with a spec get them.
+    """
+    if compact and fmt in COMPACT_FORMATS and entry['spec'] is not None:
+        return 'compact'
+    return 'batched' if batched and entry['batched'] else 'artists'
+
+
+def restore_cached(entry, output_dir, formats, dpi, cache, batched=False, compact=False):
+    """
+    Restore every cached format of a figure and return the formats that still need rendering
+    as (format, cache_key) pairs.
+    """
+    spec_digest = figure_digest(entry)
+    basename = os.path.join(output_dir, entry['output_name'])
+    missing = []
+    for fmt in formats:
+        key = render_key(spec_digest, fmt, dpi, entry['export_options'],
+                         render_mode(entry, batched, fmt, compact))
+        if cache is None or not cache.restore(key, fmt, f"{basename}.{fmt}"):
+            missing.append((fmt, key))
+    return missing
+
+
+def build_all(factories, output_dir, formats, dpi=300, jobs=None, cache=None, batched=False,
+              compact=False):
+    """
+    Render every factory and yield results as figures finish.
+
+    Figures whose files are all in the render cache are restored in this process; only the
+    remaining ones are sent to the process pool.
+    """
+    tasks = []
+    cache_settings = (cache.cache_dir, cache.max_bytes) if cache is not None else None
+    for entry in factories:
+        start = time.perf_counter()
+        missing = restore_cached(entry, output_dir, formats, dpi, cache, batched, compact)
+        if missing:
+            tasks.append((entry, output_dir, missing, dpi, batched, compact, cache_settings))
+            continue
+        basename = os.path.join(output_dir, entry['output_name'])
+        yield {
+            'factory': f"{entry['module']}.{entry['factory']}",
+            'files': [f"{basename}.{fmt}" for fmt in formats],
+            'wall_time': time.perf_counter() - start,
+            'peak_rss_mb': None,
+            'cached': True,
+        }
+
+    if not tasks:
+        return
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    # Build the font list once here rather than in every freshly spawned worker
+    prebuild_font_cache()
+
+    # One task per child so ru_maxrss is the peak of a single figure; spawn keeps
+    # workers free of any GUI state the parent may have picked up.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=jobs, initializer=_init_worker, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(render_factory, tasks):
+            yield result
+
+
+def main(argv=None):
+    """Render all research paper diagrams in parallel."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_export_arguments(parser, interactive=False)
+    add_render_arguments(parser)
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Worker processes (default: one per CPU core)')
+    parser.add_argument('--only', nargs='+', metavar='FACTORY',
+                        help='Only build the named create_*_diagram factories')
+    parser.add_argument('--list', action='store_true',
+                        help='List discovered factories and exit')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always re-render, bypassing the render cache')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='Directory of the render cache')
+    parser.add_argument('--cache-size-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Render cache size cap; least recently used entries are evicted')
+    args = parser.parse_args(argv)
+
+    factories = discover_factories()
+    if args.only:
+        factories = [entry for entry in factories if entry['factory'] in args.only]
+
+    if args.list:
+        for entry in factories:
+            print(f"{entry['module']}.{entry['factory']}")
+        return 0
+
+    if not factories:
+        print("❌ No create_*_diagram() factories found")
+        return 1
+
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(factories)))
+    print(f"Building {len(factories)} diagram(s) with {jobs} worker(s)...")
+    build_start = time.perf_counter()
+    total_figure_time = 0.0
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir, int(args.cache_size_mb * 1024 * 1024))
+
+    for result in build_all(factories, args.output_dir, args.formats, dpi=args.dpi, jobs=jobs,
+                            cache=cache, batched=args.batched,
+                            compact=args.compact_vectors):
+        total_figure_time += result['wall_time']
+        if result['cached']:
+            print(f"♻️  {result['factory']}: unchanged, reused cached render "
+                  f"({result['wall_time'] * 1000:.1f}ms)")
+        else:
+            rss = result['peak_rss_mb']
+            rss_text = f"{rss:.0f} MB" if rss is not None else "n/a"
+            print(f"✅ {result['factory']}: {result['wall_time']:.2f}s, peak RSS {rss_text}")
+        for output_file in result['files']:
+            print(f"   {output_file}")
+
+    elapsed = time.perf_counter() - build_start
+    print(f"\n🎯 Built {len(factories)} diagram(s) in {elapsed:.2f}s "
+          f"(serial figure time {total_figure_time:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
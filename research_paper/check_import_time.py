@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Diagram Tooling Import-Time Check
+Measures the import time of the diagram generators and build tools with `python -X importtime`
+and fails when a module goes over its budget or pulls in matplotlib, numpy or Pillow at import.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budgets in milliseconds. Importing pyplot alone costs several
+# hundred milliseconds, so any of these regressing to an eager matplotlib import fails.
+IMPORT_BUDGETS_MS = {
+    'generate_architecture_diagram': 150,
+    'generate_sms_pipeline_diagram': 150,
+    'build_diagrams': 200,
+    'diagram_spec': 100,
+    'diagram_export': 50,
+    'render_cache': 50,
+}
+
+# Heavy packages that must only be imported once rendering actually starts
+DEFERRED_PACKAGES = ('matplotlib', 'numpy', 'PIL')
+
+
+def measure_import(module_name, python=sys.executable):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns the module's cumulative import time in milliseconds and the set of top-level
+    packages imported along the way.
+    """
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=SCRIPT_DIR, capture_output=True, text=True, check=True)
+
+    cumulative_us = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # Column header
+        name = fields[2].strip()
+        packages.add(name.split('.')[0])
+        if name == module_name:
+            cumulative_us = int(fields[1])
+
+    if cumulative_us is None:
+        raise RuntimeError(f"No import time reported for {module_name}")
+    return cumulative_us / 1000, packages
+
+
+def check_module(module_name, budget_ms, runs=5):
+    """Median import time over several runs plus any deferred packages that got imported."""
+    timings = []
+    eager = set()
+    for _ in range(runs):
+        elapsed_ms, packages = measure_import(module_name)
+        timings.append(elapsed_ms)
+        eager |= packages & set(DEFERRED_PACKAGES)
+    median_ms = statistics.median(timings)
+    return {
+        'module': module_name,
+        'median_ms': median_ms,
+        'budget_ms': budget_ms,
+        'eager_packages': sorted(eager),
+        'ok': median_ms <= budget_ms and not eager,
+    }
+
+
+def main(argv=None):
+    """Check every diagram module against its import-time budget."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Fresh interpreters per module; the median is compared')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every budget, e.g. 2 on slow CI machines')
+    parser.add_argument('--only', nargs='+', metavar='MODULE',
+                        help='Only check the named modules')
+    args = parser.parse_args(argv)
+
+    modules = args.only or list(IMPORT_BUDGETS_MS)
+    unknown = [name for name in modules if name not in IMPORT_BUDGETS_MS]
+    if unknown:
+        parser.error(f"no import budget for: {', '.join(unknown)}")
+
+    print(f"Checking import time of {len(modules)} module(s), {args.runs} run(s) each...")
+    failures = 0
+    for module_name in modules:
+        result = check_module(module_name, IMPORT_BUDGETS_MS[module_name] * args.budget_scale,
+                              runs=args.runs)
+        status = "✅" if result['ok'] else "❌"
+        print(f"{status} {module_name}: {result['median_ms']:.1f}ms "
+              f"(budget {result['budget_ms']:.0f}ms)")
+        if result['eager_packages']:
+            print(f"   imports {', '.join(result['eager_packages'])} at module level; "
+                  f"defer them until rendering")
+        failures += not result['ok']
+
+    if failures:
+        print(f"\n❌ {failures} module(s) regressed startup time")
+        return 1
+    print("\n🎯 All diagram modules within their import-time budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
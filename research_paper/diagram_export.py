@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Diagram Export Stage
+Rasterizes a figure once into an RGBA buffer and encodes every requested raster format from it.
+Vector formats are written through their own matplotlib backend, or for SVG and PDF by the
+compact writer in vector_export.py when the diagram's layout is given.
+numpy, Pillow and matplotlib are imported on first use so CLIs built on this module start fast.
+"""
+
+import os
+
+# Raster formats are encoded by Pillow from the shared RGBA buffer
+RASTER_FORMATS = {
+    'png': 'PNG',
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'tif': 'TIFF',
+    'tiff': 'TIFF',
+    'webp': 'WEBP',
+}
+
+# Vector formats go through their own matplotlib backend
+VECTOR_FORMATS = ('svg', 'pdf', 'eps', 'ps')
+
+SUPPORTED_FORMATS = tuple(RASTER_FORMATS) + VECTOR_FORMATS
+
+
+def configure_matplotlib(interactive=False):
+    """
+    Pick the matplotlib backend before pyplot is imported.
+
+    Non-interactive runs use Agg, which skips GUI toolkit discovery entirely. If matplotlib is
+    not loaded yet this only sets MPLBACKEND, so it costs nothing at startup.
+    """
+    if interactive:
+        return
+    import sys
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use('Agg')
+    else:
+        os.environ['MPLBACKEND'] = 'Agg'
+
+
+def prebuild_font_cache():
+    """
+    Load (building it on first use) matplotlib's font list cache and return its path.
+
+    Run once before fanning out to worker processes so they all read the cached font list
+    instead of each scanning the system fonts.
+    """
+    import matplotlib
+    from matplotlib import font_manager  # Importing it loads or builds the cache
+    return os.path.join(matplotlib.get_cachedir(),
+                        f"fontlist-v{font_manager.FontManager.__version__}.json")
+
+
+def rasterize_figure(fig, dpi=300, facecolor='white', edgecolor='none', pad_inches=0.1):
+    """Draw the figure once with Agg and return the tight-cropped RGBA pixels as an array."""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    original_dpi = fig.dpi
+    original_facecolor = fig.get_facecolor()
+    original_edgecolor = fig.get_edgecolor()
+    # FigureCanvasAgg(fig) takes over fig.canvas; put the figure's own canvas back afterwards
+    original_canvas = fig.canvas
+
+    fig.set_dpi(dpi)
+    fig.set_facecolor(facecolor)
+    fig.set_edgecolor(edgecolor)
+    try:
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        pixels = np.asarray(canvas.buffer_rgba())
+
+        # Same crop as savefig(bbox_inches='tight'), taken from the full render
+        bbox = fig.get_tightbbox(canvas.get_renderer()).padded(pad_inches)
+        height, width = pixels.shape[:2]
+        x0 = int(round(bbox.x0 * dpi))
+        x1 = int(round(bbox.x1 * dpi))
+        top = height - int(round(bbox.y1 * dpi))
+        bottom = height - int(round(bbox.y0 * dpi))
+
+        # Padding may reach past the canvas edge, so fill with the face color
+        background = np.array(
+            [round(channel * 255) for channel in fig.get_facecolor()], dtype=np.uint8)
+        cropped = np.empty((bottom - top, x1 - x0, 4), dtype=np.uint8)
+        cropped[...] = background
+        src_top, src_bottom = max(top, 0), min(bottom, height)
+        src_left, src_right = max(x0, 0), min(x1, width)
+        cropped[src_top - top:src_bottom - top, src_left - x0:src_right - x0] = \
+            pixels[src_top:src_bottom, src_left:src_right]
+    finally:
+        fig.set_dpi(original_dpi)
+        fig.set_facecolor(original_facecolor)
+        fig.set_edgecolor(original_edgecolor)
+        fig.set_canvas(original_canvas)
+
+    return cropped
+
+
+def encode_raster(pixels, output_file, fmt, dpi=300):
+    """Encode an RGBA pixel buffer to a raster file format with Pillow."""
+    from PIL import Image
+
+    pil_format = RASTER_FORMATS[fmt]
+    image = Image.fromarray(pixels, 'RGBA')
+    if pil_format == 'JPEG':
+        # JPEG has no alpha channel; the figure background is opaque anyway
+        image = image.convert('RGB')
+    image.save(output_file, format=pil_format, dpi=(dpi, dpi))
+
+
+def export_figure(fig, basename, formats, dpi=300, facecolor='white', edgecolor='none',
+                  pad_inches=0.1, compact_layout=None):
+    """
+    Save a figure in every requested format and return the written paths.
+
+    All raster formats share a single rasterization pass; vector formats are saved with
+    fig.savefig using the same tight bounding box settings. With compact_layout (the figure's
+    diagram_spec layout), SVG and PDF are written from it by vector_export instead.
+    """
+    formats = [fmt.lower().lstrip('.') for fmt in formats]
+    unknown = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported output format(s): {', '.join(unknown)}")
+
+    output_dir = os.path.dirname(basename)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    raster_formats = [fmt for fmt in formats if fmt in RASTER_FORMATS]
+    if raster_formats:
+        pixels = rasterize_figure(fig, dpi=dpi, facecolor=facecolor,
+                                  edgecolor=edgecolor, pad_inches=pad_inches)
+        for fmt in raster_formats:
+            output_file = f"{basename}.{fmt}"
+            encode_raster(pixels, output_file, fmt, dpi=dpi)
+            written.append(output_file)
+        del pixels
+
+    compact_formats = []
+    if compact_layout is not None:
+        from vector_export import COMPACT_FORMATS, write_compact
+        compact_formats = [fmt for fmt in formats if fmt in COMPACT_FORMATS]
+    for fmt in formats:
+        if fmt in compact_formats:
+            written += write_compact(compact_layout, basename, [fmt], facecolor=facecolor,
+                                     pad_inches=pad_inches)
+        elif fmt in VECTOR_FORMATS:
+            output_file = f"{basename}.{fmt}"
+            fig.savefig(output_file, dpi=dpi, bbox_inches='tight', format=fmt,
+                        facecolor=facecolor, edgecolor=edgecolor, pad_inches=pad_inches)
+            written.append(output_file)
+
+    return written
+
+
+def add_export_arguments(parser, default_formats=('png', 'jpg'), default_output_dir='research_paper',
+                         interactive=True):
+    """Add the shared --formats / --output-dir / --dpi (and --no-show) options to a CLI."""
+    parser.add_argument('--formats', nargs='+', default=list(default_formats),
+                        choices=SUPPORTED_FORMATS, metavar='FORMAT',
+                        help=f"Output formats ({', '.join(SUPPORTED_FORMATS)})")
+    parser.add_argument('--output-dir', default=default_output_dir,
+                        help='Directory for the generated files')
+    parser.add_argument('--dpi', type=int, default=300,
+                        help='Resolution for raster formats')
+    parser.add_argument('--compact-vectors', action='store_true',
+                        help='Write SVG and PDF from the diagram layout: shared shapes, text as '
+                             'text, quantized and minified')
+    if interactive:
+        parser.add_argument('--no-show', action='store_true',
+                            help='Do not open the interactive preview window')
+    return parser
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Declarative Diagram Spec Engine
+Describes a diagram as data (layers, flow steps, boxes, edges, labels) and resolves every
+position in a single layout pass. The layout is a plain display list, so figures can be
+generated, diffed and hashed without importing matplotlib; only render() touches matplotlib.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Anchor points on a box, as fractions of its width and height
+ANCHORS = {
+    'center': (0.5, 0.5),
+    'top': (0.5, 1.0),
+    'bottom': (0.5, 0.0),
+    'left': (0.0, 0.5),
+    'right': (1.0, 0.5),
+}
+
+
+# ---------------------------------------------------------------------------
+# Spec nodes
+#
+# Coordinates of children are relative to their parent's frame: x is absolute, y is measured
+# from the bottom edge of the enclosing layer or flow step. Colors may be palette names.
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Box:
+    """Rectangle with optional centered text."""
+    x: float
+    y: float
+    w: float
+    h: float
+    fill: str = 'white'
+    linewidth: float = 1
+    text: Optional[str] = None
+    fontsize: float = 9
+    bold: bool = True
+    edge: str = 'black'
+    id: Optional[str] = None
+
+
+@dataclass
+class Circle:
+    """Circle with optional centered text."""
+    x: float
+    y: float
+    radius: float
+    fill: str = 'white'
+    linewidth: float = 1
+    text: Optional[str] = None
+    fontsize: float = 9
+    bold: bool = True
+    edge: str = 'black'
+    id: Optional[str] = None
+
+
+@dataclass
+class Label:
+    """Free-standing text."""
+    x: float
+    y: float
+    text: str
+    fontsize: float = 9
+    bold: bool = False
+    italic: bool = False
+    ha: str = 'center'
+    va: str = 'center'
+    color: str = 'black'
+    rotation: float = 0
+
+
+@dataclass
+class TextBlock:
+    """Heading followed by evenly spaced lines, e.g. the bullet lists in side boxes."""
+    x: float
+    y: float
+    heading: str
+    lines: list
+    footer: Optional[str] = None
+    heading_fontsize: float = 9
+    fontsize: float = 8
+    heading_gap: float = 0.3
+    spacing: float = 0.2
+
+
+@dataclass
+class Arrow:
+    """
+    Straight arrow between two endpoints.
+
+    An endpoint is an (x, y) point in the parent frame, a 'box_id.anchor' string, or a
+    ('box_id.anchor', dx, dy) tuple. With level=True the end point keeps the start's y.
+    The optional label is centered over the arrow, label_dy above its start.
+    """
+    start: object
+    end: object
+    scale: float = 15
+    linewidth: float = 1
+    color: str = 'black'
+    linestyle: str = '-'
+    level: bool = False
+    label: Optional[str] = None
+    label_dy: float = 0.3
+    label_fontsize: float = 8
+
+
+@dataclass
+class Series:
+    """Equally spaced boxes centered at origin + i * step, each with centered text."""
+    origin: tuple
+    step: tuple
+    size: tuple
+    labels: list
+    fill: str = 'white'
+    linewidth: float = 1
+    fontsize: float = 9
+    bold: bool = True
+    captions: Optional[list] = None
+    caption_dy: float = 0.0
+    caption_fontsize: float = 9
+
+
+@dataclass
+class Layer:
+    """One horizontal band of a LayerStack."""
+    title: str
+    fill: str = 'white'
+    children: list = field(default_factory=list)
+    marker: Optional[tuple] = None
+    output: Optional[str] = None
+
+
+@dataclass
+class LayerStack:
+    """
+    Full-width layers stacked top to bottom, joined by connector arrows.
+
+    Layers may carry a numbered marker on the left and an output tag on the right edge.
+    """
+    x: float
+    y: float
+    width: float
+    height: float
+    pitch: float
+    layers: list
+    linewidth: float = 2
+    title_dy: float = 1.3
+    title_fontsize: float = 14
+    connector_drop: float = 0.3
+    connector_length: float = 0.5
+    connector_scale: float = 25
+    connector_width: float = 3
+    annotation_dy: float = 0.75
+    marker_x: float = 0.2
+    marker_fill: str = 'dark_gray'
+    output_x: float = 14.2
+    output_fill: str = 'medium_gray'
+
+
+@dataclass
+class Step:
+    """One box in a Flow; label is drawn beside the arrow leading into it."""
+    id: str
+    text: str
+    width: float = 4
+    height: float = 0.8
+    fill: str = 'white'
+    fontsize: float = 10
+    gap: Optional[float] = None
+    label: Optional[str] = None
+    connect: bool = True
+    children: list = field(default_factory=list)
+
+
+@dataclass
+class Flow:
+    """Vertical chain of steps centered on x, laid out downwards from top."""
+    x: float
+    top: float
+    steps: list
+    gap: float = 0.7
+    linewidth: float = 2
+    connector_scale: float = 20
+    connector_width: float = 2
+    label_dx: float = -0.7
+    label_dy: float = 0.3
+    label_fontsize: float = 9
+
+
+@dataclass
+class Diagram:
+    """Top-level spec: figure size in inches (also the data limits), palette and items."""
+    name: str
+    size: tuple
+    items: list
+    palette: dict = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------------
+
+class _Layout:
+    """Single-pass resolver from spec nodes to a flat display list."""
+
+    def __init__(self, palette):
+        self.palette = palette
+        self.elements = []
+        self.boxes = {}
+
+    def color(self, name):
+        return self.palette.get(name, name)
+
+    def rect(self, x, y, w, h, fill, edge, linewidth, box_id=None):
+        self.elements.append({
+            'kind': 'rect', 'x': x, 'y': y, 'w': w, 'h': h,
+            'facecolor': self.color(fill), 'edgecolor': self.color(edge), 'linewidth': linewidth,
+        })
+        if box_id is not None:
+            self.boxes[box_id] = (x, y, w, h)
+
+    def text(self, x, y, text, fontsize, bold=False, italic=False, ha='center', va='center',
+             color='black', rotation=0):
+        self.elements.append({
+            'kind': 'text', 'x': x, 'y': y, 'text': text, 'fontsize': fontsize,
+            'weight': 'bold' if bold else 'normal', 'style': 'italic' if italic else 'normal',
+            'ha': ha, 'va': va, 'color': self.color(color), 'rotation': rotation,
+        })
+
+    def arrow(self, start, end, color, linewidth, scale, linestyle='-'):
+        self.elements.append({
+            'kind': 'arrow', 'x0': start[0], 'y0': start[1], 'x1': end[0], 'y1': end[1],
+            'color': self.color(color), 'linewidth': linewidth, 'scale': scale,
+            'linestyle': linestyle,
+        })
+
+    def resolve_point(self, endpoint, dy):
+        if isinstance(endpoint, str):
+            endpoint = (endpoint, 0, 0)
+        if isinstance(endpoint[0], str):
+            reference, offset_x, offset_y = endpoint
+            box_id, _, anchor = reference.partition('.')
+            if box_id not in self.boxes:
+                raise ValueError(f"Arrow endpoint '{reference}' references unknown box "
+                                 f"(declare boxes before the arrows that use them)")
+            x, y, w, h = self.boxes[box_id]
+            fx, fy = ANCHORS[anchor or 'center']
+            return (x + fx * w + offset_x, y + fy * h + offset_y)
+        return (endpoint[0], endpoint[1] + dy)
+
+    def place(self, item, dy=0.0):
+        if isinstance(item, Box):
+            self.rect(item.x, item.y + dy, item.w, item.h, item.fill, item.edge, item.linewidth,
+                      item.id)
+            if item.text is not None:
+                self.text(item.x + item.w / 2, item.y + dy + item.h / 2, item.text, item.fontsize,
+                          bold=item.bold)
+        elif isinstance(item, Circle):
+            self.elements.append({
+                'kind': 'circle', 'x': item.x, 'y': item.y + dy, 'radius': item.radius,
+                'facecolor': self.color(item.fill), 'edgecolor': self.color(item.edge),
+                'linewidth': item.linewidth,
+            })
+            if item.id is not None:
+                self.boxes[item.id] = (item.x - item.radius, item.y + dy - item.radius,
+                                       2 * item.radius, 2 * item.radius)
+            if item.text is not None:
+                self.text(item.x, item.y + dy, item.text, item.fontsize, bold=item.bold)
+        elif isinstance(item, Label):
+            self.text(item.x, item.y + dy, item.text, item.fontsize, bold=item.bold,
+                      italic=item.italic, ha=item.ha, va=item.va, color=item.color,
+                      rotation=item.rotation)
+        elif isinstance(item, TextBlock):
+            self.text(item.x, item.y + dy, item.heading, item.heading_fontsize, bold=True)
+            y = item.y + dy - item.heading_gap
+            for line in item.lines:
+                self.text(item.x, y, line, item.fontsize)
+                y -= item.spacing
+            if item.footer is not None:
+                self.text(item.x, y, item.footer, item.fontsize, bold=True)
+        elif isinstance(item, Arrow):
+            start = self.resolve_point(item.start, dy)
+            end = self.resolve_point(item.end, dy)
+            if item.level:
+                end = (end[0], start[1])
+            self.arrow(start, end, item.color, item.linewidth, item.scale, item.linestyle)
+            if item.label is not None:
+                self.text((start[0] + end[0]) / 2, start[1] + item.label_dy, item.label,
+                          item.label_fontsize, bold=True)
+        elif isinstance(item, Series):
+            w, h = item.size
+            for i, label in enumerate(item.labels):
+                cx = item.origin[0] + i * item.step[0]
+                cy = item.origin[1] + i * item.step[1] + dy
+                self.rect(cx - w / 2, cy - h / 2, w, h, item.fill, 'black', item.linewidth)
+                self.text(cx, cy, label, item.fontsize, bold=item.bold)
+                if item.captions is not None:
+                    self.text(cx, cy + item.caption_dy, item.captions[i], item.caption_fontsize)
+        elif isinstance(item, LayerStack):
+            self.place_stack(item, dy)
+        elif isinstance(item, Flow):
+            self.place_flow(item, dy)
+        else:
+            raise TypeError(f"Unsupported spec node: {type(item).__name__}")
+
+    def place_stack(self, stack, dy):
+        center_x = stack.x + stack.width / 2
+        for i, layer in enumerate(stack.layers):
+            y = stack.y - i * stack.pitch + dy
+            self.rect(stack.x, y, stack.width, stack.height, layer.fill, 'black', stack.linewidth)
+            self.text(center_x, y + stack.title_dy, layer.title, stack.title_fontsize, bold=True)
+            for child in layer.children:
+                self.place(child, y)
+
+            anchor_y = y + stack.annotation_dy
+            if layer.marker is not None:
+                number, caption = layer.marker
+                self.rect(stack.marker_x, anchor_y - 0.4, 1, 0.8, stack.marker_fill, 'black', 1)
+                self.text(stack.marker_x + 0.5, anchor_y, number, 16, bold=True, color='white')
+                self.text(stack.marker_x + 1.3, anchor_y, caption, 9, bold=True, ha='left')
+                self.arrow((stack.marker_x + 1.2, anchor_y), (stack.x - 0.2, anchor_y),
+                           stack.marker_fill, 2, 12, '--')
+            if layer.output is not None:
+                self.rect(stack.output_x, anchor_y - 0.25, 1.2, 0.5, stack.output_fill, 'black', 1)
+                self.text(stack.output_x + 0.6, anchor_y, layer.output, 8, bold=True)
+                self.arrow((stack.output_x - 0.2, anchor_y), (stack.output_x, anchor_y),
+                           'black', 1, 10)
+
+            if i < len(stack.layers) - 1:
+                start_y = y - stack.connector_drop
+                self.arrow((center_x, start_y), (center_x, start_y - stack.connector_length),
+                           'black', stack.connector_width, stack.connector_scale)
+
+    def place_flow(self, flow, dy):
+        top = flow.top + dy
+        previous = None
+        for step in flow.steps:
+            if previous is not None:
+                top = previous[1] - (step.gap if step.gap is not None else flow.gap)
+            y = top - step.height
+
+            if previous is not None and previous[0].connect:
+                end = (flow.x, top)
+                self.arrow((flow.x, previous[1]), end, 'black', flow.connector_width,
+                           flow.connector_scale)
+                if step.label is not None:
+                    self.text(flow.x + flow.label_dx, end[1] + flow.label_dy, step.label,
+                              flow.label_fontsize, bold=True)
+
+            self.rect(flow.x - step.width / 2, y, step.width, step.height, step.fill, 'black',
+                      flow.linewidth, step.id)
+            self.text(flow.x, y + step.height / 2, step.text, step.fontsize, bold=True)
+            for child in step.children:
+                self.place(child, y)
+            previous = (step, y)
+
+
+def layout(diagram):
+    """Resolve a Diagram into a JSON-serializable display list in one pass."""
+    resolver = _Layout(diagram.palette)
+    for item in diagram.items:
+        resolver.place(item)
+    width, height = diagram.size
+    return {
+        'name': diagram.name,
+        'size': [width, height],
+        'elements': resolver.elements,
+    }
+
+
+def layout_json(diagram_or_layout):
+    """Canonical JSON for a diagram's layout, stable for diffs and hashing."""
+    resolved = diagram_or_layout
+    if isinstance(diagram_or_layout, Diagram):
+        resolved = layout(diagram_or_layout)
+    return json.dumps(resolved, sort_keys=True, indent=1, ensure_ascii=False)
+
+
+def layout_digest(diagram_or_layout):
+    """SHA-256 of the canonical layout JSON."""
+    return hashlib.sha256(layout_json(diagram_or_layout).encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+# Margin (data units) around arrows when checking overlap, wide enough to cover the head
+ARROW_MARGIN = 0.3
+
+
+def _element_extent(element):
+    """Axis-aligned (x0, y0, x1, y1) bounds of a shape element in data coordinates."""
+    kind = element['kind']
+    if kind == 'rect':
+        return (element['x'], element['y'],
+                element['x'] + element['w'], element['y'] + element['h'])
+    if kind == 'circle':
+        radius = element['radius']
+        return (element['x'] - radius, element['y'] - radius,
+                element['x'] + radius, element['y'] + radius)
+    return (min(element['x0'], element['x1']) - ARROW_MARGIN,
+            min(element['y0'], element['y1']) - ARROW_MARGIN,
+            max(element['x0'], element['x1']) + ARROW_MARGIN,
+            max(element['y0'], element['y1']) + ARROW_MARGIN)
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def batch_elements(elements):
+    """
+    Group shape elements into batches that can each be drawn as one collection.
+
+    Shapes are drawn in list order, so an element may only join an earlier batch of the same
+    kind ('patch' for rectangles and circles, 'arrow' for arrows) when it overlaps nothing in
+    the batches drawn after it. This keeps every visible stacking order (such as connector
+    arrows tucked under the next layer box) identical to per-artist drawing.
+    Returns a list of (kind, [elements]) in draw order; text elements are skipped.
+    """
+    batches = []
+    for element in elements:
+        if element['kind'] == 'text':
+            continue
+        kind = 'arrow' if element['kind'] == 'arrow' else 'patch'
+        extent = _element_extent(element)
+
+        target = None
+        for index in range(len(batches) - 1, -1, -1):
+            batch_kind, members, extents = batches[index]
+            if batch_kind == kind:
+                target = index
+                break
+            if any(_overlaps(extent, other) for other in extents):
+                break
+
+        if target is None:
+            batches.append((kind, [element], [extent]))
+        else:
+            batches[target][1].append(element)
+            batches[target][2].append(extent)
+    return [(kind, members) for kind, members, _ in batches]
+
+
+def _shape_collection_class():
+    """Build the ShapeCollection class on first use so matplotlib stays a lazy import."""
+    import numpy as np
+    from matplotlib.collections import Collection
+    from matplotlib.patches import ArrowStyle, ConnectionStyle
+    from matplotlib.transforms import IdentityTransform
+
+    class ShapeCollection(Collection):
+        """
+        A batch of same-kind shapes drawn as one path collection.
+
+        Each shape hands the renderer the same path and affine its own patch would:
+        rectangles and circles keep their unit path plus the patch transform (so pixel
+        snapping lands on the same pixels), and arrows are rebuilt in display coordinates
+        on every draw the way FancyArrowPatch does, since their geometry depends on the DPI.
+        """
+
+        def __init__(self, kind, elements, patches, **kwargs):
+            if kind == 'arrow':
+                # FancyArrowPatch strokes with round joins and caps
+                kwargs.update(joinstyle='round', capstyle='round')
+            else:
+                kwargs.update(joinstyle='miter', capstyle='butt')
+            super().__init__(transform=IdentityTransform(), **kwargs)
+            self._paths = []
+            self._kind = kind
+            self._elements = elements
+            self._patches = patches
+            self._connection = ConnectionStyle('arc3')
+            self._arrow_style = ArrowStyle('->')
+
+        def _arrow_paths(self, patch, element, dpi_cor):
+            transform = patch.get_transform()
+            start, end = transform.transform(
+                [(element['x0'], element['y0']), (element['x1'], element['y1'])])
+            # FancyArrowPatch defaults: shrinkA = shrinkB = 2 points
+            shaft = self._connection(start, end, shrinkA=2 * dpi_cor, shrinkB=2 * dpi_cor)
+            paths, _ = self._arrow_style(shaft, element['scale'] * dpi_cor,
+                                         element['linewidth'] * dpi_cor, None)
+            return paths
+
+        def set_paths(self, paths):
+            self._paths = paths
+            self.stale = True
+
+        def draw(self, renderer):
+            dpi_cor = renderer.points_to_pixels(1.)
+            paths, affines, facecolors, edgecolors, linewidths, linestyles = [], [], [], [], [], []
+            for patch, element in zip(self._patches, self._elements):
+                if self._kind == 'arrow':
+                    # Shaft and head are separate strokes, exactly like the patch draws them
+                    shape_paths = self._arrow_paths(patch, element, dpi_cor)
+                    affine = np.eye(3)
+                    facecolor = 'none'
+                else:
+                    shape_paths = [patch.get_path()]
+                    affine = patch.get_transform().get_affine().get_matrix()
+                    facecolor = patch.get_facecolor()
+                for path in shape_paths:
+                    paths.append(path)
+                    affines.append(affine)
+                    facecolors.append(facecolor)
+                    edgecolors.append(patch.get_edgecolor())
+                    linewidths.append(patch.get_linewidth())
+                    linestyles.append(patch.get_linestyle())
+            self.set_paths(paths)
+            self._transforms = np.array(affines)
+            self.set_facecolor(facecolors)
+            self.set_edgecolor(edgecolors)
+            self.set_linewidth(linewidths)
+            self.set_linestyle(linestyles)
+            super().draw(renderer)
+
+    return ShapeCollection
+
+
+def render(diagram_or_layout, batched=False, rc=None):
+    """
+    Draw a laid-out diagram with matplotlib and return the figure.
+
+    rc holds rcParams (figure DPI, font family, ...) applied while the figure is built, so
+    generators never have to touch the global matplotlib state at import time.
+    With batched=True, shapes are drawn as a handful of ShapeCollection artists (see
+    batch_elements) instead of one artist per shape.
+    """
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    with matplotlib.rc_context(rc or {}):
+        return _render(diagram_or_layout, batched, plt)
+
+
+def _render(diagram_or_layout, batched, plt):
+    from matplotlib.patches import Circle as CirclePatch, FancyArrowPatch, Rectangle
+
+    resolved = diagram_or_layout
+    if isinstance(diagram_or_layout, Diagram):
+        resolved = layout(diagram_or_layout)
+
+    width, height = resolved['size']
+    fig, ax = plt.subplots(1, 1, figsize=(width, height))
+    ax.set_xlim(0, width)
+    ax.set_ylim(0, height)
+    ax.axis('off')
+
+    def make_patch(element):
+        if element['kind'] == 'rect':
+            return Rectangle((element['x'], element['y']), element['w'], element['h'],
+                             facecolor=element['facecolor'],
+                             edgecolor=element['edgecolor'],
+                             linewidth=element['linewidth'])
+        if element['kind'] == 'circle':
+            return CirclePatch((element['x'], element['y']), element['radius'],
+                               facecolor=element['facecolor'],
+                               edgecolor=element['edgecolor'],
+                               linewidth=element['linewidth'])
+        return FancyArrowPatch((element['x0'], element['y0']),
+                               (element['x1'], element['y1']),
+                               arrowstyle='->',
+                               mutation_scale=element['scale'],
+                               color=element['color'],
+                               linewidth=element['linewidth'],
+                               linestyle=element['linestyle'])
+
+    if batched:
+        ShapeCollection = _shape_collection_class()
+
+        # Patches sit at zorder 1, so the collections take that zorder to keep the
+        # same position relative to the text
+        for kind, members in batch_elements(resolved['elements']):
+            patches = []
+            for element in members:
+                patch = make_patch(element)
+                patch.set_transform(ax.transData)
+                patches.append(patch)
+            ax.add_collection(ShapeCollection(kind, members, patches, zorder=1), autolim=False)
+
+    for element in resolved['elements']:
+        if element['kind'] == 'text':
+            ax.text(element['x'], element['y'], element['text'],
+                    fontsize=element['fontsize'], fontweight=element['weight'],
+                    style=element['style'], ha=element['ha'], va=element['va'],
+                    color=element['color'], rotation=element['rotation'])
+        elif not batched:
+            ax.add_patch(make_patch(element))
+
+    fig.tight_layout()
+    return fig
+
+
+def add_render_arguments(parser):
+    """Add the shared --batched option to a diagram CLI."""
+    parser.add_argument('--batched', action='store_true',
+                        help='Draw shapes as batched collections instead of one artist each')
+    return parser
+
+
+def main(argv=None):
+    """Print the resolved layout of a generator module's specs as JSON (no matplotlib needed)."""
+    parser = argparse.ArgumentParser(description='Dump diagram layouts as canonical JSON')
+    parser.add_argument('module', help='Generator module, e.g. generate_architecture_diagram')
+    parser.add_argument('--digest', action='store_true', help='Print layout digests only')
+    args = parser.parse_args(argv)
+
+    # Generators import this file as diagram_spec, not __main__, so use that module's classes
+    engine = importlib.import_module('diagram_spec')
+    module = importlib.import_module(args.module)
+    for name in sorted(dir(module)):
+        if not name.endswith('_spec') or not callable(getattr(module, name)):
+            continue
+        diagram = getattr(module, name)()
+        if not isinstance(diagram, engine.Diagram):
+            continue
+        if args.digest:
+            print(f"{engine.layout_digest(diagram)}  {diagram.name}")
+        else:
+            print(engine.layout_json(diagram))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
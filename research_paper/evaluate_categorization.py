@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Categorization Accuracy Evaluation
+Runs a labelled SMS corpus through each categorization layer and the hybrid across a process
+pool and prints per-layer coverage, accuracy and latency plus the hybrid confusion matrix.
+Without --corpus a seeded synthetic corpus is generated; learned patterns come from a separate
+seed, standing in for user corrections. --report records the hybrid accuracy in the run report
+the architecture diagram reads.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sms_pipeline.amount import extract_amount
+from sms_pipeline.evaluation import (ABSTAINED, LAYER_HYBRID, LAYERS, PlacesStub,
+                                     evaluate_corpus, write_labelled_jsonl)
+from sms_pipeline.learning import PatternIndex
+from sms_pipeline.models import Category
+from sms_pipeline.synthetic import generate_labelled_expenses
+
+DEFAULT_SIZE = 100000
+DEFAULT_TRAIN = 2000
+# Beside this script, where generate_architecture_diagram.py reads it
+RUN_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'sms_pipeline_run_report.json')
+
+
+def learned_patterns(count, seed):
+    """A PatternIndex learned from count labelled corrections."""
+    patterns = PatternIndex()
+    for message, category in generate_labelled_expenses(count, seed=seed):
+        amount = extract_amount(message.body.lower()) or 0.0
+        patterns.learn(message.body, amount, message.date, category)
+    return patterns
+
+
+def print_results(results):
+    layers = results['layers']
+    print(f"{'layer':<14}{'coverage':>10}{'accuracy':>10}{'precision':>11}{'p50 µs':>9}"
+          f"{'p99 µs':>9}")
+    for name in LAYERS:
+        layer = layers[name]
+        latency = layer['latency']
+        print(f"{name:<14}{layer['coverage']:>10.1%}{layer['accuracy']:>10.1%}"
+              f"{layer['precision']:>11.1%}{latency['p50_us']:>9.1f}{latency['p99_us']:>9.1f}")
+    deciding = ', '.join(f"{layer} {count:,}" for layer, count in results['hybrid_layers'].items())
+    print(f"\nHybrid decided by: {deciding}")
+
+    columns = [category.value for category in Category] + [ABSTAINED]
+    print("\nHybrid confusion matrix (rows: true category, columns: predicted)")
+    print(f"{'':<15}" + ''.join(f"{column[:11]:>12}" for column in columns))
+    for label, row in layers[LAYER_HYBRID]['matrix'].items():
+        print(f"{label:<15}" + ''.join(f"{row[column]:>12,}" for column in columns))
+
+
+def update_report(path, results):
+    """Record the hybrid accuracy and what it was measured on in the run report."""
+    report = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as source:
+            report = json.load(source)
+    hybrid = results['layers'][LAYER_HYBRID]
+    report['accuracy'] = hybrid['accuracy']
+    report['accuracy_evaluation'] = {
+        'corpus': results['corpus'],
+        'messages': hybrid['total'],
+        'seed': results['seed'],
+        'train_patterns': results['train_patterns'],
+        'coverage': {name: results['layers'][name]['coverage'] for name in LAYERS},
+        'accuracy': {name: results['layers'][name]['accuracy'] for name in LAYERS},
+    }
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+
+
+def main(argv=None):
+    """Evaluate the categorization layers on a labelled corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='Labelled JSONL corpus (records with a category field)')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                        help='Synthetic corpus size when no --corpus is given')
+    parser.add_argument('--write-corpus', metavar='PATH',
+                        help='Keep the generated synthetic corpus at PATH')
+    parser.add_argument('--train', type=int, default=DEFAULT_TRAIN,
+                        help='Learned patterns from labelled corrections (0 disables the layer)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes')
+    parser.add_argument('--shards', type=int, help='Corpus shards (default: 4 per worker)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    parser.add_argument('--report', nargs='?', const=RUN_REPORT, metavar='PATH',
+                        help="Record the hybrid accuracy in a run report (default: "
+                             f"{os.path.basename(RUN_REPORT)} beside this script)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = args.write_corpus or os.path.join(directory, 'labelled.jsonl')
+            write_labelled_jsonl(generate_labelled_expenses(args.size, seed=args.seed), corpus)
+        patterns = learned_patterns(args.train, seed=args.seed + 1) if args.train else None
+        print(f"Evaluating categorization on {corpus if args.corpus else 'synthetic corpus'} "
+              f"with {args.workers} workers, {args.train:,} learned patterns...\n")
+        start = time.perf_counter()
+        evaluator = evaluate_corpus(corpus, merchant_lookup=PlacesStub(), patterns=patterns,
+                                    workers=args.workers, shards=args.shards)
+        elapsed = time.perf_counter() - start
+
+    results = dict(evaluator.report(), corpus=args.corpus or 'synthetic', seed=args.seed,
+                   train_patterns=args.train, workers=args.workers, elapsed_s=elapsed)
+    print_results(results)
+    total = results['layers'][LAYER_HYBRID]['total']
+    print(f"\n{total:,} messages in {elapsed:.1f}s ({total / elapsed:,.0f} msgs/sec, "
+          f"every layer run on every message)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(dict(results, benchmark='categorization_accuracy'), output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    if args.report:
+        update_report(args.report, results)
+        print(f"✅ Recorded hybrid accuracy in {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
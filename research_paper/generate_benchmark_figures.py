@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmark Figure Generator
+Renders patent-style figures from measured benchmark result files: throughput against corpus
+size, per-stage latency, pattern cache hit-rate curves and traced memory over time. Long series
+are min/max decimated before plotting, so figures of millions of samples render quickly and the
+output files stay small.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from diagram_export import add_export_arguments, configure_matplotlib, export_figure
+from generate_architecture_diagram import PATENT_COLORS, RUN_REPORT
+
+# Set up the figure with high DPI for publication quality (applied while rendering only)
+RC_PARAMS = {
+    'figure.dpi': 300,
+    'savefig.dpi': 300,
+    'font.family': 'Arial',
+    'axes.edgecolor': PATENT_COLORS['black'],
+    'axes.labelcolor': PATENT_COLORS['black'],
+    'xtick.color': PATENT_COLORS['black'],
+    'ytick.color': PATENT_COLORS['black'],
+    'hatch.color': PATENT_COLORS['black'],
+}
+
+EXPORT_OPTIONS = {
+    'facecolor': 'white',
+    'edgecolor': 'none',
+    'pad_inches': 0.1,
+}
+
+FIGURE_SIZE = (8, 5)
+# Points kept per plotted series; two per bin, so spikes survive decimation
+MAX_POINTS = 2000
+
+# Series are told apart by grey level, line style, marker and hatching, never by hue
+SERIES_SHADES = ('black', 'dark_gray', 'medium_gray')
+LINE_STYLES = ('-', '--', '-.', ':')
+MARKERS = ('o', 's', '^', 'D', 'v', 'x')
+HATCHES = ('', '//', '..', 'xx', '\\\\', '++')
+
+OUTPUT_NAMES = {
+    'throughput': 'benchmark_throughput',
+    'stage_latency': 'benchmark_stage_latency',
+    'cache_hit_rate': 'benchmark_cache_hit_rate',
+    'memory': 'benchmark_memory',
+}
+
+
+def downsample(x, y, max_points=MAX_POINTS):
+    """
+    At most max_points of the (x, y) series: the minimum and maximum of each of max_points // 2
+    equal-count bins, in order, plus the first and last point. x must be sorted.
+    """
+    import numpy as np
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    count = len(x)
+    if count <= max_points:
+        return x, y
+    width = -(-count // max(1, (max_points - 2) // 2))
+    bins = -(-count // width)
+    padded = np.full(bins * width, np.nan)
+    padded[:count] = y
+    padded = padded.reshape(bins, width)
+    offsets = np.arange(bins) * width
+    keep = np.concatenate(([0, count - 1], offsets + np.nanargmin(padded, axis=1),
+                           offsets + np.nanargmax(padded, axis=1)))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def load_results(paths):
+    """
+    Benchmark name -> list of result documents, from the --json files of the benchmarks. A run
+    report's memory timeline is read from its memory_timeline_file when that file exists.
+    """
+    results = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as source:
+            result = json.load(source)
+        timeline_file = result.get('memory_timeline_file')
+        if timeline_file is not None and 'memory_timeline' not in result:
+            timeline_file = os.path.join(os.path.dirname(path), timeline_file)
+            if os.path.exists(timeline_file):
+                with open(timeline_file, encoding='utf-8') as source:
+                    result['memory_timeline'] = json.load(source)
+        results.setdefault(result.get('benchmark', 'unknown'), []).append(result)
+    return results
+
+
+def throughput_series(results):
+    """Series label -> sorted [(corpus size, items per second)] across every benchmark result."""
+    series = {}
+
+    def add(label, size, rate):
+        series.setdefault(label, []).append((size, rate))
+
+    for result in results.get('sms_pipeline', []):
+        for run in result['runs']:
+            add('SMS pipeline', run['size'], run['messages_per_sec'])
+    for result in results.get('sms_pipeline_trace', []):
+        add('SMS pipeline (traced)', result['size'], result['messages_per_sec'])
+    for result in results.get('batch_categorization', []):
+        for run in result['runs']:
+            add('Batch scoring', run['size'], run['rows_per_sec'])
+    for result in results.get('storage', []):
+        for run in result['runs']:
+            add(f"Storage {run['backend']}, batch {run['max_batch']}", run['expenses'],
+                run['expenses_per_sec'])
+    for result in results.get('ingestion', []):
+        for size_result in result['runs']:
+            for run in size_result['runs']:
+                add(f"Ingestion, {run['save_workers']} save workers", size_result['size'],
+                    run['messages_per_sec'])
+    return {label: sorted(points) for label, points in series.items()}
+
+
+def stage_latencies(results):
+    """(label, [(span name, summary)]) for the stage breakdown, or None without a report."""
+    for result in results.get('sms_pipeline_trace', []):
+        spans = list(result['stages'].items()) + list(result.get('spans', {}).items())
+        return f"{result['size']:,} SMS traced run", spans
+    for result in results.get('sms_pipeline', []):
+        run = max(result['runs'], key=lambda run: run['size'])
+        return f"{run['size']:,} SMS run", list(run['stages'].items())
+    return None
+
+
+def line_style(index):
+    return {
+        'color': PATENT_COLORS[SERIES_SHADES[index % len(SERIES_SHADES)]],
+        'linestyle': LINE_STYLES[index % len(LINE_STYLES)],
+        'marker': MARKERS[index % len(MARKERS)],
+        'markerfacecolor': PATENT_COLORS['white'],
+        'linewidth': 1.2,
+        'markersize': 5,
+    }
+
+
+def _axes(plt, title, size=FIGURE_SIZE, columns=1):
+    fig, axes = plt.subplots(1, columns, figsize=size)
+    fig.suptitle(title, fontsize=12, fontweight='bold')
+    for ax in (axes if columns > 1 else [axes]):
+        ax.set_facecolor(PATENT_COLORS['white'])
+        ax.grid(True, which='major', color=PATENT_COLORS['light_gray'], linewidth=0.6)
+        ax.set_axisbelow(True)
+    return fig, axes
+
+
+def create_throughput_figure(series, max_points=MAX_POINTS):
+    """Items per second against corpus size, one line per benchmark variant, log-log."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    with matplotlib.rc_context(RC_PARAMS):
+        fig, ax = _axes(plt, 'THROUGHPUT VS. CORPUS SIZE')
+        for index, (label, points) in enumerate(series.items()):
+            sizes, rates = downsample(*zip(*points), max_points=max_points)
+            style = line_style(index)
+            if len(points) > max_points:
+                style['marker'] = None
+            ax.plot(sizes, rates, label=label, **style)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Corpus size (messages or expenses)')
+        ax.set_ylabel('Throughput (items per second)')
+        ax.legend(fontsize=8, frameon=True, edgecolor=PATENT_COLORS['black'])
+        fig.tight_layout()
+    return fig
+
+
+def create_stage_latency_figure(label, spans):
+    """Median and p99 latency of each stage and span, next to each stage's share of the time."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from matplotlib.ticker import PercentFormatter
+
+    names = [name for name, _ in spans]
+    positions = np.arange(len(names))
+    with matplotlib.rc_context(RC_PARAMS):
+        fig, (latency_ax, share_ax) = _axes(plt, f"STAGE LATENCY BREAKDOWN ({label})",
+                                            size=(11, 0.35 * len(names) + 2), columns=2)
+        height = 0.38
+        for offset, key, shade, hatch in ((-height / 2, 'p50_us', 'white', HATCHES[1]),
+                                          (height / 2, 'p99_us', 'medium_gray', HATCHES[0])):
+            latency_ax.barh(positions + offset, [stats[key] for _, stats in spans], height,
+                            color=PATENT_COLORS[shade], edgecolor=PATENT_COLORS['black'],
+                            hatch=hatch, linewidth=0.6, label=key.replace('_us', ''))
+        latency_ax.set_xscale('log')
+        latency_ax.set_xlabel('Latency (µs)')
+        latency_ax.set_yticks(positions)
+        latency_ax.set_yticklabels(names, fontsize=8)
+        latency_ax.invert_yaxis()
+        latency_ax.legend(fontsize=8, edgecolor=PATENT_COLORS['black'])
+
+        # Spans nest inside the categorize stage, so shares are of the pipeline stages only
+        totals = [stats['mean_us'] * stats['count'] for _, stats in spans]
+        stage_total = sum(total for name, total in zip(names, totals) if '.' not in name
+                          and name != 'learning') or 1.0
+        shares = [total / stage_total for total in totals]
+        share_ax.barh(positions, shares, 0.6, color=PATENT_COLORS['light_gray'],
+                      edgecolor=PATENT_COLORS['black'], linewidth=0.6)
+        for position, share in zip(positions, shares):
+            share_ax.text(share, position, f" {share:.1%}", va='center', fontsize=7)
+        share_ax.set_xlim(0, max(shares) * 1.25 if shares else 1)
+        share_ax.xaxis.set_major_formatter(PercentFormatter(1.0))
+        share_ax.set_xlabel('Share of pipeline time')
+        share_ax.set_yticks(positions)
+        share_ax.set_yticklabels([])
+        share_ax.invert_yaxis()
+        fig.tight_layout()
+    return fig
+
+
+def create_cache_hit_rate_figure(runs):
+    """Pattern cache hit rate against memory budget, one curve per pattern limit per user."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import PercentFormatter
+
+    curves = {}
+    for run in runs:
+        curves.setdefault(run['max_patterns_per_user'], []).append(
+            (run['memory_budget_bytes'] / (1024 * 1024), run['hit_rate']))
+    with matplotlib.rc_context(RC_PARAMS):
+        fig, ax = _axes(plt, 'PATTERN CACHE HIT RATE VS. MEMORY BUDGET')
+        for index, (limit, points) in enumerate(sorted(curves.items())):
+            budgets, hit_rates = zip(*sorted(points))
+            ax.plot(budgets, hit_rates, label=f"{limit} patterns per user", **line_style(index))
+        ax.set_xscale('log', base=2)
+        ax.set_ylim(0, 1)
+        ax.yaxis.set_major_formatter(PercentFormatter(1.0))
+        ax.set_xlabel('Memory budget (MiB)')
+        ax.set_ylabel('Hit rate')
+        ax.legend(fontsize=8, edgecolor=PATENT_COLORS['black'])
+        fig.tight_layout()
+    return fig
+
+
+def create_memory_figure(timeline, peak_mb=None, max_points=MAX_POINTS):
+    """Traced memory against messages received, from a run report's memory_timeline."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    timeline = np.asarray(timeline, dtype=float)
+    messages, traced_mb = downsample(timeline[:, 1], timeline[:, 2], max_points=max_points)
+    with matplotlib.rc_context(RC_PARAMS):
+        fig, ax = _axes(plt, 'TRACED MEMORY OVER A PIPELINE RUN')
+        ax.fill_between(messages, traced_mb, color=PATENT_COLORS['light_gray'], linewidth=0)
+        ax.plot(messages, traced_mb, color=PATENT_COLORS['black'], linewidth=1)
+        if peak_mb is not None:
+            ax.axhline(peak_mb, color=PATENT_COLORS['dark_gray'], linestyle='--', linewidth=1,
+                       label=f"Peak {peak_mb:.1f} MB")
+            ax.legend(fontsize=8, edgecolor=PATENT_COLORS['black'], loc='lower right')
+        ax.set_xlim(messages[0], messages[-1])
+        ax.set_ylim(bottom=0)
+        ax.set_xlabel('Messages received')
+        ax.set_ylabel('Traced memory (MB)')
+        fig.tight_layout()
+    return fig
+
+
+def build_figures(results, max_points=MAX_POINTS):
+    """Yield (figure key, figure, None) for each figure the results support, or (key, None, why)."""
+    series = throughput_series(results)
+    if series:
+        yield 'throughput', create_throughput_figure(series, max_points=max_points), None
+    else:
+        yield 'throughput', None, 'no throughput results'
+
+    breakdown = stage_latencies(results)
+    if breakdown is not None:
+        yield 'stage_latency', create_stage_latency_figure(*breakdown), None
+    else:
+        yield 'stage_latency', None, 'no pipeline run report or pipeline benchmark'
+
+    cache_runs = [run for result in results.get('pattern_cache', []) for run in result['runs']]
+    if cache_runs:
+        yield 'cache_hit_rate', create_cache_hit_rate_figure(cache_runs), None
+    else:
+        yield 'cache_hit_rate', None, 'no pattern cache replay results'
+
+    traced = [result for result in results.get('sms_pipeline_trace', [])
+              if result.get('memory_timeline')]
+    if traced:
+        yield 'memory', create_memory_figure(traced[0]['memory_timeline'],
+                                             traced[0].get('peak_memory_mb'),
+                                             max_points=max_points), None
+    else:
+        yield 'memory', None, 'no run report with a memory timeline'
+
+
+def main(argv=None):
+    """Render the benchmark figures from benchmark result files."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('results', nargs='*',
+                        help='Result files written by the benchmarks with --json, or by '
+                             f"trace_sms_pipeline.py (default: {os.path.basename(RUN_REPORT)})")
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS,
+                        help='Points kept per plotted series after decimation')
+    add_export_arguments(parser, interactive=False)
+    args = parser.parse_args(argv)
+    configure_matplotlib(interactive=False)
+
+    paths = args.results or [path for path in (RUN_REPORT,) if os.path.exists(path)]
+    if not paths:
+        print("❌ No result files: run trace_sms_pipeline.py or a benchmark with --json first")
+        return 1
+    print(f"Generating benchmark figures from {len(paths)} result file(s)...")
+
+    import matplotlib.pyplot as plt
+
+    for key, fig, reason in build_figures(load_results(paths), max_points=args.max_points):
+        if fig is None:
+            print(f"⏭️  {key}: skipped, {reason}")
+            continue
+        basename = os.path.join(args.output_dir, OUTPUT_NAMES[key])
+        for output_file in export_figure(fig, basename, args.formats, dpi=args.dpi,
+                                         **EXPORT_OPTIONS):
+            print(f"✅ Saved: {output_file}")
+        plt.close(fig)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
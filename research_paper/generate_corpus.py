@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Synthetic SMS Corpus Generator
+Streams a seeded corpus with a configurable sender format mix, Zipf merchant popularity and
+duplicate, re-delivery, fraud and stale rates to a JSONL or CSV export or a columnar cache, and
+reports throughput, the label composition and a digest of the stream, so load and scaling runs
+can check they were fed the same input. --check runs every message through sender validation
+and reports acceptance per label; fraud messages should never be accepted.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from sms_pipeline import is_legitimate_financial_sender_indexed
+from sms_pipeline.exports import (COLUMNS_SUFFIX, date_to_millis, export_format, write_columns,
+                                  write_csv, write_jsonl)
+from sms_pipeline.synthetic import (FRAUD, MERCHANT_ZIPF, SENDER_FORMATS, SENDER_MIX,
+                                    CorpusGenerator)
+
+DEFAULT_MESSAGES = 1000000
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv, 'columns': write_columns}
+
+
+def sender_mix_arg(value):
+    """'trai=0.6,bank_code=0.4' -> (('trai', 0.6), ('bank_code', 0.4))."""
+    mix = []
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SENDER_FORMATS:
+            raise argparse.ArgumentTypeError(
+                f"unknown sender format {name!r} (choose from {', '.join(SENDER_FORMATS)})")
+        try:
+            mix.append((name, float(weight)))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {name}: {weight!r}")
+    return tuple(mix)
+
+
+def output_format(path, requested):
+    if requested:
+        return requested
+    return 'columns' if path.endswith(COLUMNS_SUFFIX) else export_format(path)
+
+
+class StreamTally:
+    """Counts labels (and sender validation outcomes) and digests messages as they stream."""
+
+    def __init__(self, check=False):
+        self.labels = Counter()
+        self.accepted = Counter()
+        self.check = check
+        self.digest = hashlib.sha256()
+
+    def stream(self, labelled):
+        labels, accepted, digest = self.labels, self.accepted, self.digest
+        for message, label, _ in labelled:
+            labels[label] += 1
+            digest.update(f"{message.sender}\x1f{message.body}\x1f"
+                          f"{date_to_millis(message.date)}\n".encode('utf-8'))
+            if self.check and is_legitimate_financial_sender_indexed(message.sender,
+                                                                     message.body.lower()):
+                accepted[label] += 1
+            yield message
+
+
+def main(argv=None):
+    """Generate a seeded synthetic SMS corpus and stream it to a file."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help='Output .jsonl or .csv export, or a .columns cache')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='Output format (default: from the output path)')
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES,
+                        help='Messages generated')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--days', type=int, default=7, help='Days the fresh messages span')
+    parser.add_argument('--sender-mix', type=sender_mix_arg, default=SENDER_MIX,
+                        metavar='FORMAT=WEIGHT,...',
+                        help='Bank and wallet sender formats (default: '
+                             f"{','.join(f'{name}={weight}' for name, weight in SENDER_MIX)})")
+    parser.add_argument('--zipf', type=float, default=MERCHANT_ZIPF,
+                        help='Merchant popularity Zipf exponent (0: uniform)')
+    parser.add_argument('--duplicate-rate', type=float, default=0.03,
+                        help='Share of verbatim re-sent expenses')
+    parser.add_argument('--redelivery-rate', type=float, default=0.02,
+                        help='Share of expenses delivered again minutes later')
+    parser.add_argument('--fraud-ratio', type=float, default=0.02,
+                        help='Share of phishing messages from rejected sender formats')
+    parser.add_argument('--stale-rate', type=float, default=0.02,
+                        help='Share of messages older than the sync window')
+    parser.add_argument('--check', action='store_true',
+                        help='Run sender validation on every message and report per label')
+    parser.add_argument('--json', metavar='PATH', help='Also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        fmt = output_format(args.output, args.format)
+        generator = CorpusGenerator(
+            seed=args.seed, days=args.days, sender_mix=args.sender_mix,
+            merchant_zipf=args.zipf, duplicate_rate=args.duplicate_rate,
+            redelivery_rate=args.redelivery_rate, fraud_ratio=args.fraud_ratio,
+            stale_rate=args.stale_rate)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Generating {args.messages:,} messages, seed {args.seed}, to {args.output} "
+          f"({fmt})...\n")
+
+    tally = StreamTally(check=args.check)
+    start = time.perf_counter()
+    rows = WRITERS[fmt](tally.stream(generator.labelled(args.messages)), args.output)
+    elapsed = time.perf_counter() - start
+    if os.path.isdir(args.output):
+        size = sum(entry.stat().st_size for entry in os.scandir(args.output))
+    else:
+        size = os.path.getsize(args.output)
+
+    print(f"{'label':<12}{'messages':>11}{'share':>8}" + (f"{'accepted':>10}" if args.check
+                                                         else ''))
+    for label, count in tally.labels.most_common():
+        line = f"{label:<12}{count:>11,}{count / rows:>8.1%}"
+        if args.check:
+            line += f"{tally.accepted[label] / count:>10.1%}"
+        print(line)
+    rate = rows / elapsed if elapsed else float('inf')
+    print(f"\n{rows:,} messages in {elapsed:.1f}s ({rate * 60 / 1e6:.2f}M msgs/min), "
+          f"{size / 1e6:,.1f} MB")
+    print(f"Stream digest: {tally.digest.hexdigest()}")
+    fraud_accepted = tally.accepted[FRAUD]
+    if args.check:
+        verdict = "✅" if not fraud_accepted else "❌"
+        print(f"{verdict} Fraud messages accepted by sender validation: {fraud_accepted}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'corpus_generation', 'output': args.output, 'format': fmt,
+                       'messages': rows, 'seed': args.seed, 'seconds': elapsed,
+                       'messages_per_minute': rate * 60, 'bytes': size,
+                       'digest': tally.digest.hexdigest(), 'labels': dict(tally.labels),
+                       'accepted': dict(tally.accepted) if args.check else None}, output,
+                      indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if fraud_accepted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
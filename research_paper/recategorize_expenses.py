@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Incremental Expense Re-categorization
+Categorizes a synthetic corpus through the pipeline into an expense store, indexes every expense
+by the rule that decided it and the table terms it matched, then applies a rule change (merchants
+moved, added or removed, keyword weights set) and re-categorizes only the affected expenses.
+Compares rows re-evaluated and time against re-categorizing everything, checks the incremental
+decisions and delta against that full pass, and writes the changed categories back to the store.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from sms_pipeline import REFERENCE_NOW, SmsPipeline, generate_messages
+from sms_pipeline.evaluation import PlacesStub
+from sms_pipeline.models import Category
+from sms_pipeline.recategorize import (RecategorizationIndex, RuleSet, apply_delta,
+                                       write_delta)
+from sms_pipeline.storage import EXPENSES, ExpenseStore, MemoryStorage
+
+DEFAULT_MESSAGES = 200000
+# Applied when no change is given: file Amazon purchases under Miscellaneous
+DEFAULT_MERCHANT = ('amazon', 'Miscellaneous')
+
+
+def category_arg(value):
+    """A Category by name, or None for 'none' (remove)."""
+    if value.lower() == 'none':
+        return None
+    try:
+        return Category[value]
+    except KeyError:
+        raise argparse.ArgumentTypeError(
+            f"unknown category {value!r} (choose from {', '.join(Category.__members__)}, none)")
+
+
+def changed_rules(rules, merchants, weights):
+    """rules with every --merchant and --weight edit applied, in order."""
+    for name, category in merchants:
+        rules = rules.with_merchant(name.lower(), category_arg(category))
+    for phrase, category, weight in weights:
+        category = category_arg(category)
+        if category is None:
+            raise argparse.ArgumentTypeError(f"--weight needs a category, not {category!r}")
+        rules = rules.with_weight(phrase.lower(), category,
+                                  None if weight.lower() == 'none' else float(weight))
+    return rules
+
+
+def compare(index, full, baseline, changes):
+    """Decisions, matched terms, postings and delta the incremental index gets wrong."""
+    mismatches = sum(1 for row, decision in enumerate(full.decisions)
+                     if decision != index.decisions[row]
+                     or decision.terms != index.decisions[row].terms)
+    mismatches += sum(1 for term in full.postings.keys() | index.postings.keys()
+                      if full.postings.get(term) != index.postings.get(term))
+    expected = [(full.keys[row], old, full.decisions[row]) for row, old in enumerate(baseline)
+                if old != full.decisions[row]]
+    got = [(change.key, change.old, change.new) for change in changes]
+    return mismatches + (expected != got)
+
+
+def main(argv=None):
+    """Re-categorize the expenses a rule change affects and check against a full pass."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES,
+                        help='Synthetic messages run through the pipeline')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--merchant', nargs=2, action='append', default=[],
+                        metavar=('NAME', 'CATEGORY'),
+                        help='List a merchant under CATEGORY, or remove it with none '
+                             f"(default: {' '.join(DEFAULT_MERCHANT)})")
+    parser.add_argument('--weight', nargs=3, action='append', default=[],
+                        metavar=('PHRASE', 'CATEGORY', 'WEIGHT'),
+                        help='Set a keyword weight for CATEGORY, or remove it with none')
+    parser.add_argument('--delta', metavar='PATH', help='Write the changed decisions as JSONL')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+    merchants = args.merchant or ([DEFAULT_MERCHANT] if not args.weight else [])
+
+    rules = RuleSet()
+    try:
+        new_rules = changed_rules(rules, merchants, args.weight)
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+    lookup = PlacesStub()
+    storage = MemoryStorage()
+    store = ExpenseStore(storage, flush_interval=float('inf'), now=REFERENCE_NOW)
+    pipeline = SmsPipeline(now=REFERENCE_NOW, merchant_lookup=lookup, sink=store, max_age=None)
+    expenses = pipeline.process(generate_messages(args.messages, seed=args.seed))
+    store.close()
+    print(f"Re-categorizing {len(expenses):,} expenses from {args.messages:,} messages, "
+          f"seed {args.seed}...\n")
+
+    start = time.perf_counter()
+    index = RecategorizationIndex(rules, merchant_lookup=lookup)
+    index.add_expenses(expenses)
+    index_time = time.perf_counter() - start
+    pipeline_mismatches = sum(1 for message in expenses
+                              if (index.decision(message.sms_hash).category,
+                                  index.decision(message.sms_hash).layer)
+                              != (message.category, message.layer))
+    baseline = list(index.decisions)
+
+    diff = rules.diff(new_rules)
+    start = time.perf_counter()
+    changes = index.update(new_rules)
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = RecategorizationIndex(new_rules, merchant_lookup=lookup)
+    full.add_expenses(expenses)
+    full_time = time.perf_counter() - start
+    mismatches = compare(index, full, baseline, changes) + pipeline_mismatches
+
+    commits = storage.commits
+    rewritten = apply_delta(changes, storage)
+    commits = storage.commits - commits
+    recategorized = sum(1 for change in changes if change.new.category != change.old.category)
+    stored = sum(1 for change in changes
+                 if storage.get(EXPENSES, change.key)['category'] == change.new.category.value)
+
+    runs = [
+        {'run': 'full', 'evaluated': len(full), 'seconds': full_time, 'speedup': 1.0},
+        {'run': 'incremental', 'evaluated': index.evaluated, 'seconds': update_time,
+         'speedup': full_time / update_time if update_time else float('inf')},
+    ]
+    edits = [f"{name} -> {category}" for name, category in merchants]
+    edits += [f"{phrase} ({category}) = {weight}" for phrase, category, weight in args.weight]
+    print(f"Rule change: {'; '.join(edits)}")
+    print(f"  {diff.summary()['changed_terms']} term(s) changed, "
+          f"{len(diff.added)} added, {len(diff.removed)} removed; "
+          f"index built in {index_time:.2f}s\n")
+    print(f"{'run':<14}{'re-evaluated':>14}{'share':>9}{'seconds':>10}{'speedup':>10}")
+    for run in runs:
+        print(f"{run['run']:<14}{run['evaluated']:>14,}{run['evaluated'] / len(full):>9.2%}"
+              f"{run['seconds']:>10.3f}{run['speedup']:>9.1f}x")
+    print(f"\n{len(changes):,} decision(s) changed, {recategorized:,} category change(s); "
+          f"{rewritten:,} expense document(s) rewritten in {commits} commit(s)")
+    verdict = "✅" if not mismatches and stored == len(changes) else "❌"
+    print(f"{verdict} Incremental vs full re-categorization: {mismatches} mismatches")
+
+    if args.delta:
+        write_delta(changes, args.delta)
+        print(f"✅ Saved: {args.delta}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'recategorization', 'expenses': len(full),
+                       'rule_change': edits, 'diff': diff.summary(), 'changes': len(changes),
+                       'recategorized': recategorized, 'rewritten': rewritten,
+                       'mismatches': mismatches, 'runs': runs}, output, indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 1 if mismatches or stored != len(changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
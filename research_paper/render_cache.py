@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Diagram Render Cache
+Content-addressed cache of exported diagram files so unchanged figures are never re-rendered.
+Entries are keyed on the laid-out figure spec, matplotlib version, DPI and format, and the
+cache directory is kept under a size cap with least-recently-used eviction.
+"""
+
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, '.render_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# The renderer and exporter sources are part of every key: changing them changes the bytes
+ENGINE_SOURCES = (
+    os.path.join(SCRIPT_DIR, 'diagram_spec.py'),
+    os.path.join(SCRIPT_DIR, 'diagram_export.py'),
+    os.path.join(SCRIPT_DIR, 'vector_export.py'),
+)
+
+
+def _package_version(name):
+    """Installed version of a package, read without importing it."""
+    from importlib import metadata  # Slow to import; only needed once a key is computed
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def file_digest(*paths):
+    """SHA-256 over the contents of one or more source files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def module_spec_digest(module_name, script_dir=SCRIPT_DIR):
+    """Fallback digest for factories without a spec: the generator module's whole source."""
+    return file_digest(os.path.join(script_dir, f"{module_name}.py"), *ENGINE_SOURCES)
+
+
+def layout_spec_digest(layout_digest, module_name=None, script_dir=SCRIPT_DIR):
+    """
+    Digest of a laid-out diagram spec (see diagram_spec.layout_digest) plus the engine and,
+    given module_name, the generator module, whose RC_PARAMS and create_* code shape the
+    rendered figure beyond what the layout records.
+    """
+    digest = hashlib.sha256(layout_digest.encode('utf-8'))
+    if module_name is None:
+        digest.update(file_digest(*ENGINE_SOURCES).encode('utf-8'))
+    else:
+        digest.update(module_spec_digest(module_name, script_dir).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_key(spec_digest, fmt, dpi, export_options=None, render_mode='artists'):
+    """Cache key for one exported file."""
+    payload = {
+        'spec': spec_digest,
+        'matplotlib': _package_version('matplotlib'),
+        'pillow': _package_version('Pillow'),
+        'dpi': dpi,
+        'format': fmt,
+        'export_options': export_options or {},
+        'render_mode': render_mode,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Size-capped, LRU-evicted directory of rendered diagram files keyed by content hash."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def restore(self, key, fmt, output_file):
+        """
+        Reuse a cached render for output_file. Returns False on a cache miss.
+
+        An output file that already holds the cached bytes is left untouched.
+        """
+        entry = self._entry_path(key, fmt)
+        try:
+            # Bump the modification time; it is the LRU clock
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+
+        if not (os.path.exists(output_file) and filecmp.cmp(entry, output_file, shallow=False)):
+            output_dir = os.path.dirname(output_file)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            shutil.copyfile(entry, output_file)
+        return True
+
+    def store(self, key, fmt, output_file):
+        """Copy a freshly rendered file into the cache and enforce the size cap."""
+        # Write to a temp file and rename so concurrent build workers never see partial entries
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(handle)
+        try:
+            shutil.copyfile(output_file, temp_path)
+            os.replace(temp_path, self._entry_path(key, fmt))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict()
+
+    def entries(self):
+        """(mtime, size, path) for every cache entry, oldest first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another worker
+            total -= size
+
+    def clear(self):
+        """Remove every cache entry."""
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
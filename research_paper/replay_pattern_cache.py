@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Learned Pattern Cache Replay
+Feeds a recorded (or seeded synthetic multi-tenant) pattern lookup trace through the bounded
+pattern cache for a grid of per-user limits and memory budgets, and reports hit rate, backend
+loads, evictions and load latency for each, to size the cache for the expected load.
+
+Trace files are JSON Lines, one call per line:
+{"op": "get" | "put" | "touch" | "invalidate", "t": seconds, "user": id, "key": pattern key}
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmark_pattern_index import learned_features
+from sms_pipeline import PatternCache
+from sms_pipeline.pattern_cache import CACHE_TTL_SECONDS, approximate_size
+
+DEFAULT_LIMITS = (50, 200)
+DEFAULT_BUDGETS_MB = (1, 4, 16, 64)
+DEFAULT_USERS = 20000
+DEFAULT_EVENTS = 200000
+DEFAULT_HOURS = 24
+# Share of gets followed by a touch of the matched pattern, and by a newly learned pattern
+TOUCH_RATE = 0.6
+LEARN_RATE = 0.02
+ZIPF_EXPONENT = 1.1
+PATTERN_POOL = 2000
+
+
+def synthetic_trace(users, events, hours, seed=0):
+    """Seeded multi-tenant trace: Zipf-popular users, Poisson arrivals over the given hours."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(users)]
+    picks = rng.choices(range(users), weights, k=events)
+    rate = events / (hours * 3600)
+    now = 0.0
+    learned = {}
+    trace = []
+    for user in picks:
+        now += rng.expovariate(rate)
+        user_id = f"user-{user:05d}"
+        trace.append(('get', now, user_id, None))
+        roll = rng.random()
+        if roll < LEARN_RATE:
+            learned[user_id] = learned.get(user_id, 0) + 1
+            trace.append(('put', now, user_id, f"{user_id}-new-{learned[user_id]}"))
+        elif roll < LEARN_RATE + TOUCH_RATE:
+            trace.append(('touch', now, user_id, f"{user_id}-{int(rng.paretovariate(1.2)) - 1}"))
+    return trace
+
+
+def read_trace(path):
+    with open(path, encoding='utf-8') as source:
+        return [(record['op'], float(record['t']), record.get('user'), record.get('key'))
+                for record in (json.loads(line) for line in source if line.strip())]
+
+
+def write_trace(trace, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        for op, moment, user_id, key in trace:
+            output.write(json.dumps({'op': op, 't': moment, 'user': user_id, 'key': key}) + '\n')
+
+
+class SyntheticBackend:
+    """Stand-in for the learned_patterns collection: a seeded pattern list per user."""
+
+    def __init__(self, pool, seed=0):
+        self.pool = pool
+        self.seed = seed
+        self.patterns = {}
+        # Patterns are shared pool entries, so each is sized once
+        self.sizes = {id(pattern): approximate_size(pattern) for pattern in pool}
+
+    def size_of(self, pattern):
+        return self.sizes[id(pattern)]
+
+    def _patterns(self, user_id):
+        patterns = self.patterns.get(user_id)
+        if patterns is None:
+            rng = random.Random(f"{self.seed}-{user_id}")
+            count = min(1000, int(rng.lognormvariate(3.0, 1.2)))
+            patterns = [(f"{user_id}-{n}", rng.choice(self.pool)) for n in range(count)]
+            self.patterns[user_id] = patterns
+        return patterns
+
+    def load(self, user_id):
+        return self._patterns(user_id)
+
+    def save(self, user_id, key):
+        pattern = self.pool[hash(key) % len(self.pool)]
+        self._patterns(user_id).insert(0, (key, pattern))
+        return pattern
+
+
+def replay(trace, backend, **cache_options):
+    """Run the trace through a fresh cache driven by the trace's own clock."""
+    moment = [0.0]
+    cache = PatternCache(backend.load, size_of=backend.size_of, clock=lambda: moment[0],
+                         **cache_options)
+    start = time.perf_counter()
+    for op, timestamp, user_id, key in trace:
+        moment[0] = timestamp
+        if op == 'get':
+            cache.get(user_id)
+        elif op == 'put':
+            cache.put(user_id, key, backend.save(user_id, key))
+        elif op == 'touch':
+            cache.touch(user_id, key)
+        elif op == 'invalidate':
+            cache.invalidate(user_id)
+    elapsed = time.perf_counter() - start
+    return cache, elapsed
+
+
+def main(argv=None):
+    """Replay a pattern lookup trace over a grid of cache sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trace', metavar='PATH', help='Recorded trace (JSON Lines) to replay')
+    parser.add_argument('--write-trace', metavar='PATH',
+                        help='Save the synthetic trace for later replays')
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS, help='Synthetic tenants')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENTS, help='Synthetic lookups')
+    parser.add_argument('--hours', type=float, default=DEFAULT_HOURS,
+                        help='Time span of the synthetic trace')
+    parser.add_argument('--limits', nargs='+', type=int, default=list(DEFAULT_LIMITS),
+                        help='Patterns kept per user')
+    parser.add_argument('--budgets', nargs='+', type=float, default=list(DEFAULT_BUDGETS_MB),
+                        help='Memory budgets in MiB across all users')
+    parser.add_argument('--ttl', type=float, default=CACHE_TTL_SECONDS / 60,
+                        help='Entry lifetime in minutes (default: the app\'s 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic trace seed')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace = read_trace(args.trace)
+        source = args.trace
+    else:
+        trace = synthetic_trace(args.users, args.events, args.hours, seed=args.seed)
+        source = (f"synthetic, {args.users:,} users over {args.hours:g}h, "
+                  f"Zipf {ZIPF_EXPONENT}, seed {args.seed}")
+        if args.write_trace:
+            write_trace(trace, args.write_trace)
+            print(f"✅ Saved: {args.write_trace}")
+    pool = learned_features(PATTERN_POOL, seed=args.seed)
+
+    print(f"Replaying {len(trace):,} pattern cache calls ({source}), "
+          f"TTL {args.ttl:g} min...\n")
+    print(f"{'limit':>6}{'budget':>9}{'hit rate':>10}{'loads':>10}{'evicted':>10}"
+          f"{'expired':>10}{'trimmed':>10}{'peak':>10}{'load p99':>11}{'calls/s':>11}")
+    runs = []
+    for limit in args.limits:
+        for budget in args.budgets:
+            backend = SyntheticBackend(pool, seed=args.seed)
+            cache, elapsed = replay(trace, backend, max_patterns_per_user=limit,
+                                    ttl=args.ttl * 60, memory_budget=int(budget * 1024 * 1024))
+            stats = cache.stats()
+            runs.append({'calls': len(trace), 'replay_s': elapsed, **stats})
+            print(f"{limit:>6}{budget:>6g}MiB{stats['hit_rate']:>10.1%}{stats['loads']:>10,}"
+                  f"{stats['evictions']:>10,}{stats['expirations']:>10,}"
+                  f"{stats['pattern_evictions']:>10,}"
+                  f"{stats['peak_size_bytes'] / 1024 / 1024:>7.1f}MiB"
+                  f"{stats['load_latency']['p99_us']:>9.1f}µs{len(trace) / elapsed:>11,.0f}")
+    print("\nloads: backend queries (_loadUserPatternsToCache); evicted: users dropped for the "
+          "budget;\nexpired: entries past the TTL; trimmed: patterns pushed out by newer ones")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'benchmark': 'pattern_cache', 'source': source, 'runs': runs}, output,
+                      indent=2)
+        print(f"✅ Saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+SMS Expense Pipeline
+Python reference implementation of the app's SMS-to-expense flow (lib/services): sender
+validation, expense keyword check, amount extraction, duplicate check, three-layer
+categorization and title generation, run as a streaming generator pipeline.
+"""
+
+from .amount import extract_amount
+from .categorizer import (categorize_by_indian_merchants, categorize_by_keyword_scoring,
+                          categorize_by_merchant_api, categorize_hybrid, categorize_with_layer,
+                          confidence_score)
+from .dedup import BloomFilter, DuplicateIndex, sms_hash
+from .extractor import Extraction, TransactionScanner, extract_transaction, scan_transaction
+from .keywords import is_expense_message
+from .matcher import CategoryIndex, TermMatcher, categorize_with_layer_indexed
+from .models import Category, SmsMessage
+from .pattern_cache import PatternCache
+from .pipeline import STAGES, SmsPipeline
+from .sender import has_authentic_banking_content, is_legitimate_financial_sender
+from .sender_index import SenderIndex, is_legitimate_financial_sender_indexed
+from .stats import LatencyHistogram
+from .synthetic import REFERENCE_NOW, generate_messages
+from .title import detect_payment_method, expense_title
+
+__all__ = [
+    'BloomFilter',
+    'Category',
+    'CategoryIndex',
+    'DuplicateIndex',
+    'Extraction',
+    'LatencyHistogram',
+    'PatternCache',
+    'REFERENCE_NOW',
+    'STAGES',
+    'SenderIndex',
+    'SmsMessage',
+    'SmsPipeline',
+    'TermMatcher',
+    'TransactionScanner',
+    'categorize_by_indian_merchants',
+    'categorize_by_keyword_scoring',
+    'categorize_by_merchant_api',
+    'categorize_hybrid',
+    'categorize_with_layer',
+    'categorize_with_layer_indexed',
+    'confidence_score',
+    'detect_payment_method',
+    'expense_title',
+    'extract_amount',
+    'extract_transaction',
+    'generate_messages',
+    'has_authentic_banking_content',
+    'is_expense_message',
+    'is_legitimate_financial_sender',
+    'is_legitimate_financial_sender_indexed',
+    'scan_transaction',
+    'sms_hash',
+]
@@ -0,0 +1,69 @@
+"""
+Amount Extraction Stage
+The amount regexes from _processSmsMessage in lib/services/sms_listener.dart: the INR / action /
+amount-label pattern first, then the credit card and Union Bank fallback pattern.
+"""
+
+import re
+
+# Every match of AMOUNT_PATTERN starts with one of these
+AMOUNT_PREFIXES = ('rs', 'inr', '₹', 'spent', 'charged', 'debited', 'withdrawn', 'paid',
+                   'amount', 'amt')
+
+# Currency of an amount whose match names one of the markers
+CURRENCY = 'INR'
+CURRENCY_MARKERS = ('rs', 'inr', '₹')
+
+AMOUNT_PATTERN = re.compile(
+    r'(?:rs[:\.]?\s*|inr\s*|₹\s*)([\d,]+(?:\.\d{1,2})?)'
+    r'|(?:spent|charged|debited|withdrawn|paid)\s*(?:rs[:\.]?\s*|inr\s*|₹\s*)?([\d,]+(?:\.\d{1,2})?)'
+    r'|(?:amount|amt)\s*(?:rs[:\.]?\s*|inr\s*|₹\s*)?([\d,]+(?:\.\d{1,2})?)',
+    re.IGNORECASE | re.ASCII,
+)
+
+FALLBACK_AMOUNT_PATTERN = re.compile(
+    r'([\d,]+\.\d{2})\s*(?:inr|rs|₹)?'
+    r'|(?:balance|bal)\s*(?:rs|inr|₹)?\s*([\d,]+(?:\.\d{2})?)'
+    r'|(?:your\s+account|a/c)\s*.*?([\d,]+(?:\.\d{2})?)',
+    re.IGNORECASE | re.ASCII,
+)
+
+
+def _parse_amount(match):
+    text = (match.group(1) or match.group(2) or match.group(3) or '0.0').replace(',', '')
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return amount if amount > 0 else None
+
+
+def _amount_match(body):
+    match = AMOUNT_PATTERN.search(body)
+    if match is None:
+        match = FALLBACK_AMOUNT_PATTERN.search(body)
+    return match
+
+
+def extract_amount(body):
+    """
+    Transaction amount in a lowercased SMS body, or None.
+
+    Like the app, the fallback pattern is only tried when the primary pattern finds nothing;
+    a primary match that does not parse to a positive number rejects the message.
+    """
+    match = _amount_match(body)
+    return _parse_amount(match) if match is not None else None
+
+
+def extract_amount_and_currency(body):
+    """
+    extract_amount() and CURRENCY when the matched amount text names a currency marker
+    (a bare "paid 500" has none), or (None, None).
+    """
+    match = _amount_match(body)
+    amount = _parse_amount(match) if match is not None else None
+    if amount is None:
+        return None, None
+    text = match.group(0)
+    return amount, CURRENCY if any(marker in text for marker in CURRENCY_MARKERS) else None
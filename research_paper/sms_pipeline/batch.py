@@ -0,0 +1,346 @@
+"""
+Vectorized Batch Categorization
+Scores columnar batches of SMS bodies, amounts and timestamps with NumPy array operations: the
+five Layer 2 category scores, the keyword category, the Layer 0 merchant database category and
+the smart categorizer's amount and time range buckets. Results match the per-message functions
+in categorizer.py exactly. Imported on its own (sms_pipeline.batch) so the streaming pipeline
+does not pay for NumPy.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .categorizer import (CATEGORY_SCORING, INDIAN_MERCHANTS, KEYWORD_CONFIDENCE_THRESHOLD,
+                          LAYER_KEYWORDS, LAYER_MERCHANT_DB, MERCHANT_NAME_KEYWORDS,
+                          MERCHANT_VARIATIONS, _food_adjustment, _leisure_adjustment,
+                          _misc_adjustment, _travel_adjustment, _work_adjustment,
+                          categorize_extracted_merchant, extract_wallet_merchant)
+from .learning import AMOUNT_RANGE_LIMITS
+from .models import Category
+
+# Category codes used by the batch arrays, in Layer 2 scoring order
+BATCH_CATEGORIES = tuple(category for category, _, _, _ in CATEGORY_SCORING)
+NO_CATEGORY = -1
+
+# _getEnhancedAmountRange: the first bucket whose upper bound an amount does not exceed
+AMOUNT_RANGE_BOUNDS = np.array(AMOUNT_RANGE_LIMITS, dtype=np.float64)
+
+# _getTimeRange, indexed by hour of day
+_HOUR_TIME_RANGE = np.array([3] * 6 + [0] * 6 + [1] * 5 + [2] * 4 + [3] * 3, dtype=np.int8)
+
+# Bytes compared at once when verifying a candidate term position
+_WORD_BYTES = 8
+
+# Rows scored per chunk, which bounds the size of the byte and candidate matrices
+CHUNK_ROWS = 65536
+
+
+@dataclass(slots=True)
+class SmsBatch:
+    """A columnar batch: bodies (str array), amounts (float64) and timestamps (datetime64[s])."""
+    bodies: np.ndarray
+    amounts: np.ndarray
+    timestamps: np.ndarray
+
+    def __len__(self):
+        return len(self.bodies)
+
+    @classmethod
+    def from_columns(cls, bodies, amounts, timestamps=None):
+        bodies = np.asarray(bodies, dtype=str)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if timestamps is None:
+            timestamps = np.zeros(len(bodies), dtype='datetime64[s]')
+        return cls(bodies, amounts, np.asarray(timestamps, dtype='datetime64[s]'))
+
+    @classmethod
+    def from_messages(cls, messages):
+        """Batch from SmsMessage records, using each record's extracted amount."""
+        messages = list(messages)
+        return cls.from_columns([message.body for message in messages],
+                                [message.amount for message in messages],
+                                [message.date for message in messages])
+
+
+def amount_ranges(amounts):
+    """Index into AMOUNT_RANGES for every amount."""
+    return np.searchsorted(AMOUNT_RANGE_BOUNDS, amounts, side='left').astype(np.int8)
+
+
+def time_ranges(timestamps):
+    """Index into TIME_RANGES for every timestamp."""
+    hours = (timestamps.astype('datetime64[h]') - timestamps.astype('datetime64[D]'))
+    return _HOUR_TIME_RANGE[hours.astype(np.int64)]
+
+
+def lowered_bytes(bodies):
+    """
+    Lowercased bodies as an (n, width) uint8 matrix of code points, zero-padded.
+
+    ASCII letters are lowercased arithmetically; every other code point becomes 0x80, which
+    no ASCII term can match. The only code points whose lowercase contains ASCII letters are
+    U+0130 and U+212A, so rows containing them are lowercased with str.lower() first.
+    """
+    bodies = np.asarray(bodies, dtype=str)
+    points = _code_points(bodies)
+    special = ((points == 0x130) | (points == 0x212A)).any(axis=1)
+    if special.any():
+        rows = np.flatnonzero(special)
+        lowered = [str(bodies[row]).lower() for row in rows]
+        width = max(points.shape[1], max(len(body) for body in lowered))
+        bodies = bodies.astype(f'<U{width}')
+        bodies[rows] = lowered
+        points = _code_points(bodies)
+    matrix = np.minimum(points, 0x80).astype(np.uint8)
+    matrix |= ((matrix >= 0x41) & (matrix <= 0x5A)) * np.uint8(0x20)
+    return matrix
+
+
+def _code_points(bodies):
+    width = max(bodies.dtype.itemsize // 4, 1)
+    return bodies.view(np.uint32).reshape(len(bodies), width)
+
+
+class ByteTermMatcher:
+    """
+    Which of a fixed set of ASCII terms occur in each row of a byte matrix.
+
+    Every row position whose leading bytes start some term is found at once with a lookup
+    table over all n-grams of the matrix. The few candidate positions are then sorted by n-gram,
+    and each term checks its full bytes only at the candidates sharing its prefix.
+    """
+
+    def __init__(self, terms):
+        self.terms = tuple(dict.fromkeys(term for term in terms if term))
+        self.term_bytes = [term.encode('ascii') for term in self.terms]
+        self.anchor_length = min(3, min(len(term) for term in self.term_bytes))
+        self.anchors = np.array([self._code(term[:self.anchor_length])
+                                 for term in self.term_bytes], dtype=np.int32)
+        self.is_anchor = np.zeros(1 << (8 * self.anchor_length), dtype=bool)
+        self.is_anchor[self.anchors] = True
+        self.max_length = max(len(term) for term in self.term_bytes)
+        # (leading word, mask) of every term, matching the candidate words built in presence()
+        self.words = []
+        for term in self.term_bytes:
+            head = term[:_WORD_BYTES]
+            shift = 8 * (_WORD_BYTES - len(head))
+            self.words.append((np.uint64(self._code(head) << shift),
+                               np.uint64(((1 << (8 * len(head))) - 1) << shift)))
+
+    def _code(self, prefix):
+        code = 0
+        for byte in prefix:
+            code = (code << 8) | byte
+        return code
+
+    def index(self, term):
+        return self.terms.index(term)
+
+    def presence(self, matrix):
+        """(rows, terms) bool matrix: does the row contain the term."""
+        rows_count, width = matrix.shape
+        found = np.zeros((rows_count, len(self.terms)), dtype=bool)
+        if width < self.anchor_length:
+            return found
+
+        positions = width - self.anchor_length + 1
+        codes = matrix[:, :positions].astype(np.int32)
+        for offset in range(1, self.anchor_length):
+            codes <<= 8
+            codes |= matrix[:, offset:offset + positions]
+        candidates = np.flatnonzero(self.is_anchor[codes])
+        anchors = codes.ravel()[candidates]
+        order = np.argsort(anchors, kind='stable')
+        candidates, anchors = candidates[order], anchors[order]
+        rows, cols = np.divmod(candidates, positions)
+
+        # The first eight bytes at every candidate as one big-endian word, zero padded past
+        # the row end, so most terms are checked with a single masked compare
+        padded = np.zeros((rows_count, width + self.max_length), dtype=np.uint8)
+        padded[:, :width] = matrix
+        flat = padded.ravel()
+        starts_at = rows * padded.shape[1] + cols
+        words = np.zeros(len(candidates), dtype=np.uint64)
+        for offset in range(_WORD_BYTES):
+            words <<= np.uint64(8)
+            words |= flat[starts_at + offset]
+
+        starts = np.searchsorted(anchors, self.anchors, side='left')
+        ends = np.searchsorted(anchors, self.anchors, side='right')
+        for column, (term, start, end) in enumerate(zip(self.term_bytes, starts, ends)):
+            if start == end:
+                continue
+            word, mask = self.words[column]
+            hit = (words[start:end] & mask) == word
+            term_rows = rows[start:end][hit]
+            if len(term) > _WORD_BYTES:
+                tail = np.frombuffer(term[_WORD_BYTES:], dtype=np.uint8)
+                tail_at = starts_at[start:end][hit] + _WORD_BYTES
+                window = flat[tail_at[:, None] + np.arange(len(tail))]
+                term_rows = term_rows[(window == tail).all(axis=1)]
+            found[term_rows, column] = True
+        return found
+
+
+class BatchCategorizer:
+    """
+    Layer 0 and Layer 2 categorization over SmsBatch columns.
+
+    The term matcher covers the merchant database with its variations, the keyword weights,
+    'wallet' for the misc amount adjustment and the merchant-name keywords that gate the wallet
+    merchant rule. Each scoring row's adjust function is replaced by its array form from
+    VECTOR_ADJUSTMENTS; a table with any other adjust function is rejected.
+    """
+
+    def __init__(self, merchants=INDIAN_MERCHANTS, variations=MERCHANT_VARIATIONS,
+                 scoring=CATEGORY_SCORING):
+        unknown = [category.value for category, _, _, adjust in scoring
+                   if adjust not in VECTOR_ADJUSTMENTS]
+        if unknown:
+            raise ValueError(f"No vectorized amount adjustment for: {', '.join(unknown)}")
+        self.scoring = scoring
+        self.adjustments = [VECTOR_ADJUSTMENTS[adjust] for _, _, _, adjust in scoring]
+        self.categories = tuple(category for category, _, _, _ in scoring)
+        code = {category: index for index, category in enumerate(self.categories)}
+        self.merchant_terms = []
+        for category, names in merchants:
+            terms = [term for name in names for term in (name,) + tuple(variations.get(name, ()))]
+            self.merchant_terms.append((code[category], terms))
+        name_keywords = [keyword for _, keywords in MERCHANT_NAME_KEYWORDS for keyword in keywords]
+
+        self.matcher = ByteTermMatcher(
+            [phrase for _, weights, _, _ in scoring for phrase, _ in weights]
+            + [term for _, terms in self.merchant_terms for term in terms]
+            + ['wallet'] + name_keywords)
+        column = self.matcher.index
+        self.weight_columns = [[(column(phrase), weight) for phrase, weight in weights]
+                               for _, weights, _, _ in scoring]
+        self.merchant_columns = [(category_code, np.array([column(term) for term in terms]))
+                                 for category_code, terms in self.merchant_terms]
+        self.wallet_column = column('wallet')
+        self.name_keyword_columns = np.array([column(keyword) for keyword in name_keywords])
+
+    def _scores(self, found, amounts):
+        """(rows, categories) Layer 2 scores, accumulated in table order like the reference."""
+        wallet = found[:, self.wallet_column]
+        scores = np.empty((len(amounts), len(self.scoring)), dtype=np.float64)
+        for row, ((_, _, base, _), columns, adjust) in enumerate(
+                zip(self.scoring, self.weight_columns, self.adjustments)):
+            score = np.full(len(amounts), base, dtype=np.float64)
+            for column, weight in columns:
+                score += np.where(found[:, column], weight, 0.0)
+            scores[:, row] = np.clip(adjust(score, amounts, wallet), 0.0, 1.0)
+        return scores
+
+    def score(self, batch):
+        """
+        Score every row of the batch.
+
+        Returns a dict of arrays: 'scores' (rows x BATCH_CATEGORIES), 'keyword_category' and
+        'merchant_category' (codes into BATCH_CATEGORIES, NO_CATEGORY for no merchant match),
+        'wallet_candidate' (rows whose wallet merchant could decide Layer 0), 'amount_range'
+        and 'time_range'.
+        """
+        rows = len(batch)
+        scores = np.empty((rows, len(self.scoring)), dtype=np.float64)
+        merchant_category = np.full(rows, NO_CATEGORY, dtype=np.int8)
+        wallet_candidate = np.zeros(rows, dtype=bool)
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = slice(start, min(start + CHUNK_ROWS, rows))
+            found = self.matcher.presence(lowered_bytes(batch.bodies[chunk]))
+            scores[chunk] = self._scores(found, batch.amounts[chunk])
+            decided = np.zeros(found.shape[0], dtype=bool)
+            categories = merchant_category[chunk]
+            for category_code, columns in self.merchant_columns:
+                hit = found[:, columns].any(axis=1) & ~decided
+                categories[hit] = category_code
+                decided |= hit
+            wallet_candidate[chunk] = found[:, self.name_keyword_columns].any(axis=1)
+
+        return {
+            'scores': scores,
+            'keyword_category': keyword_categories(scores, self.categories),
+            'merchant_category': merchant_category,
+            'wallet_candidate': wallet_candidate,
+            'amount_range': amount_ranges(batch.amounts),
+            'time_range': time_ranges(batch.timestamps),
+        }
+
+    def categorize(self, batch):
+        """
+        Hybrid category codes and layer names without a merchant API (Layer 1 resolves nothing).
+
+        The wallet merchant rule is regex extraction and stays per message, but it only runs on
+        rows whose body contains a merchant-name keyword; any other row cannot be decided by it.
+        """
+        result = self.score(batch)
+        codes = result['merchant_category'].copy()
+        code = {category: index for index, category in enumerate(self.categories)}
+        for row in np.flatnonzero(result['wallet_candidate']):
+            wallet_merchant = extract_wallet_merchant(batch.bodies[row].lower())
+            if wallet_merchant is not None:
+                category = categorize_extracted_merchant(wallet_merchant)
+                if category is not None:
+                    codes[row] = code[category]
+        from_keywords = codes == NO_CATEGORY
+        codes[from_keywords] = result['keyword_category'][from_keywords]
+        layers = np.where(from_keywords, LAYER_KEYWORDS, LAYER_MERCHANT_DB)
+        return codes, layers
+
+
+# The amount adjustments of categorizer.py as array operations, by the function they replace;
+# wallet marks the rows whose body contains 'wallet'
+def _food_vector(score, amounts, wallet):
+    score = score + np.where(amounts < 500, 0.3, 0.0)
+    return score - np.where(amounts > 2000, 0.2, 0.0)
+
+
+def _travel_vector(score, amounts, wallet):
+    score = score + np.where(amounts > 1000, 0.3, 0.0)
+    return score + np.where(amounts > 5000, 0.4, 0.0)
+
+
+def _work_vector(score, amounts, wallet):
+    return score + np.where((amounts > 500) & (amounts < 2000), 0.3, 0.0)
+
+
+def _leisure_vector(score, amounts, wallet):
+    return score
+
+
+def _misc_vector(score, amounts, wallet):
+    return score + np.where((amounts < 100) & wallet, 0.3, 0.0)
+
+
+VECTOR_ADJUSTMENTS = {
+    _food_adjustment: _food_vector,
+    _travel_adjustment: _travel_vector,
+    _work_adjustment: _work_vector,
+    _leisure_adjustment: _leisure_vector,
+    _misc_adjustment: _misc_vector,
+}
+
+
+def keyword_categories(scores, categories=BATCH_CATEGORIES):
+    """Layer 2 decision per row: the later category wins ties, Miscellaneous below threshold."""
+    best = np.zeros(len(scores), dtype=np.int8)
+    best_score = scores[:, 0].copy()
+    for column in range(1, scores.shape[1]):
+        better = scores[:, column] >= best_score
+        best[better] = column
+        best_score[better] = scores[better, column]
+    misc = categories.index(Category.Miscellaneous)
+    best[best_score <= KEYWORD_CONFIDENCE_THRESHOLD] = misc
+    return best
+
+
+_default_categorizer = None
+
+
+def default_batch_categorizer():
+    """The BatchCategorizer over the built-in tables, built on first use."""
+    global _default_categorizer
+    if _default_categorizer is None:
+        _default_categorizer = BatchCategorizer()
+    return _default_categorizer
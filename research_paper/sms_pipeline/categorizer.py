@@ -0,0 +1,439 @@
+"""
+Three-Layer Categorization Stage
+Python port of ExpenseCategorizer from lib/services/expense_categorizer.dart:
+Layer 0 Indian merchant database (wallet-aware), Layer 1 merchant API lookup, Layer 2 weighted
+keyword scoring. Every function takes the SMS body and lowercases it like the app does.
+"""
+
+import re
+
+from .models import Category
+
+LAYER_MERCHANT_DB = 'merchant_db'
+LAYER_MERCHANT_API = 'merchant_api'
+LAYER_KEYWORDS = 'keywords'
+
+# Layer 0 merchant sets, checked category by category in this order
+INDIAN_MERCHANTS = (
+    (Category.Food, (
+        'zomato', 'swiggy', 'uber eats', 'foodpanda', 'dunzo',
+        'dominos', 'pizza hut', 'mcdonalds', 'kfc', 'burger king',
+        'starbucks', 'cafe coffee day', 'barista', 'costa coffee',
+        'haldirams', 'bikanervala', 'subway', 'taco bell',
+        'wow momo', 'faasos', 'behrouz biryani', 'oven story',
+        'box8', 'freshmenu', 'licious', 'bigbasket', 'grofers',
+        'fresh to home', 'country delight', 'milk basket',
+        'dmart ready', 'nature basket', 'spencer retail',
+    )),
+    (Category.Travel, (
+        'uber', 'ola', 'rapido', 'meru', 'taxi for sure',
+        'makemytrip', 'goibibo', 'cleartrip', 'yatra', 'ixigo',
+        'irctc', 'redbus', 'abhibus', 'orange travels',
+        'indigo', 'spicejet', 'air india', 'vistara', 'go air',
+        'indian oil', 'bharat petroleum', 'hindustan petroleum',
+        'reliance petrol', 'shell', 'hp petrol', 'essar oil',
+        'fastag', 'parivahan', 'vahan', 'rc book',
+    )),
+    (Category.Leisure, (
+        'bookmyshow', 'paytm movies', 'netflix', 'amazon prime',
+        'hotstar', 'zee5', 'sony liv', 'voot', 'alt balaji',
+        'cult fit', 'gold gym', 'fitness first', 'talwalkars',
+        'flipkart', 'amazon', 'myntra', 'ajio', 'nykaa',
+        'big bazaar', 'reliance digital', 'croma', 'vijay sales',
+        'lifestyle', 'pantaloons', 'westside', 'max fashion',
+        'pvr', 'inox', 'cinepolis', 'carnival cinemas',
+    )),
+    (Category.Work, (
+        'microsoft', 'adobe', 'zoom', 'google workspace',
+        'notion', 'slack', 'dropbox', 'canva', 'figma',
+        'razorpay', 'payu', 'instamojo', 'cashfree',
+        'freshworks', 'zoho', 'clevertap', 'postman',
+        'github', 'gitlab', 'aws', 'azure', 'gcp',
+    )),
+    (Category.Miscellaneous, (
+        'sbi', 'hdfc', 'icici', 'axis', 'kotak', 'pnb',
+        'paytm', 'phonepe', 'gpay', 'mobikwik', 'freecharge',
+        'bharatpe', 'cred', 'jupiter', 'niyo', 'fi money',
+        'slice', 'uni cards', 'onecard',
+    )),
+)
+
+MERCHANT_VARIATIONS = {
+    'dominos': ('domino', 'dominos pizza'),
+    'mcdonalds': ('mcdonald', 'mc donald', 'mc donalds'),
+    'starbucks': ('starbuck',),
+    'uber': ('uber india', 'uber trip'),
+    'ola': ('ola cabs', 'ola cab'),
+    'zomato': ('zomato india',),
+    'swiggy': ('swiggy india',),
+    'amazon': ('amazon india', 'amazon.in'),
+    'flipkart': ('flipkart india',),
+}
+
+# Keywords in an extracted merchant name
+MERCHANT_NAME_KEYWORDS = (
+    (Category.Food, ('restaurant', 'cafe', 'pizza', 'burger', 'food', 'kitchen', 'dhaba',
+                     'biryani')),
+    (Category.Travel, ('travels', 'transport', 'taxi', 'cab', 'petrol', 'fuel', 'parking')),
+    (Category.Leisure, ('mall', 'store', 'shop', 'mart', 'retail', 'fashion', 'gym', 'spa')),
+    (Category.Work, ('office', 'tech', 'software', 'solutions', 'services', 'consulting')),
+)
+
+_FLAGS = re.IGNORECASE | re.ASCII
+
+CARD_MERCHANT_PATTERNS = tuple(re.compile(pattern, _FLAGS) for pattern in (
+    # Axis Bank credit card: "Spent INR 4006.35Axis Bank Card no. XX542823-12-25 13:18:48 ISTRBL BANK LT"
+    r'spent\s+inr\s+[\d,]+\.?\d*\s*axis\s+bank\s+card\s+no\.\s+\w+\s*-?\s*\d{2}-\d{2}\s+'
+    r'\d{2}:\d{2}:\d{2}\s+([A-Z][A-Z0-9\s]{2,25}?)(?:\s*avl\s+limit|\Z)',
+    # Generic Axis Bank pattern (fallback)
+    r'axis\s+bank\s+card.*?\d{2}:\d{2}:\d{2}\s+([A-Z][A-Z0-9\s]{2,25}?)(?:\s*avl\s+limit|not\s+you|\Z)',
+    # Generic credit card patterns
+    r'(?:spent|charged|debited)\s+(?:inr|rs\.?)\s*[\d,]+\.?\d*.*?(?:at|from)\s+([a-zA-Z][a-zA-Z0-9\s]{2,20})',
+    r'transaction\s+(?:at|on)\s+([a-zA-Z][a-zA-Z0-9\s]{2,20})',
+    r'card\s+no\.?\s+\w+.*?(?:at|from)\s+([a-zA-Z][a-zA-Z0-9\s]{2,20})',
+))
+# The literals each card pattern's matches start with, in pattern order
+CARD_MERCHANT_LEADS = (('spent',), ('axis',), ('spent', 'charged', 'debited'), ('transaction',),
+                       ('card',))
+_MERCHANT_SUFFIX = re.compile(r'\s+(bank|ltd|limited|pvt|private|inc|corp)\Z', _FLAGS)
+_QUOTED_MERCHANT = re.compile(r'"([^"]+)"')
+_DIGITS_ONLY = re.compile(r'\d+', re.ASCII)
+_NO_LETTERS = re.compile(r'[^a-zA-Z]*')
+
+WALLET_PAYEE_PREFIXES = (
+    'paid to ', 'payment to ', 'transferred to ', 'payment made to ', 'sent money to ',
+    'upi payment to ', 'upi transaction to ',
+)
+PAYEE_STOP_WORDS = (' via', ' using', ' through', ' on', ' at', ' for', ' of')
+
+INVALID_MERCHANT_WORDS = frozenset((
+    'upi', 'payment', 'transaction', 'transfer', 'wallet', 'account',
+    'mobile', 'number', 'phone', 'via', 'using', 'through', 'from', 'to',
+    'rs', 'inr', 'rupees', 'amount', 'balance', 'available', 'successful',
+    'failed', 'pending', 'completed', 'debited', 'credited', 'charged',
+    'your', 'you', 'the', 'and', 'or', 'for', 'with', 'on', 'at', 'in',
+    'avl', 'limit', 'not',
+))
+
+# Merchants looked up through the Layer 1 API when they appear in the body
+KNOWN_MERCHANTS = (
+    'dominos', 'mcdonalds', 'starbucks', 'uber', 'ola', 'zomato', 'swiggy',
+    'netflix', 'amazon', 'flipkart', 'paytm', 'phonepe', 'gpay', 'mobikwik',
+    'pizza hut', 'kfc', 'burger king', 'subway', 'dunkin donuts',
+    'makemytrip', 'goibibo', 'cleartrip', 'irctc', 'redbus',
+    'bookmyshow', 'pvr', 'inox', 'big bazaar', 'reliance digital',
+)
+
+# Foursquare category name keywords, checked in this order
+PLACE_CATEGORY_KEYWORDS = (
+    (Category.Food, ('restaurant', 'food', 'cafe', 'bar', 'pizza', 'bakery', 'fast food',
+                     'diner')),
+    (Category.Travel, ('hotel', 'airport', 'gas station', 'taxi', 'transport', 'travel',
+                       'parking', 'rental')),
+    (Category.Work, ('office', 'coworking', 'business', 'bank', 'professional', 'service')),
+    (Category.Leisure, ('entertainment', 'movie', 'theater', 'gym', 'spa', 'shopping', 'mall',
+                        'store', 'recreation', 'sports')),
+)
+
+# Layer 2 keyword weights per category: (phrase, weight)
+FOOD_WEIGHTS = (
+    ('restaurant', 0.9), ('food', 0.8), ('dining', 0.8), ('cafe', 0.7), ('pizza', 0.9),
+    ('burger', 0.8),
+    ('zomato', 0.95), ('swiggy', 0.95), ('uber eats', 0.95), ('foodpanda', 0.9),
+    ('dominos', 0.98), ('mcdonalds', 0.98), ('kfc', 0.98), ('starbucks', 0.95), ('subway', 0.9),
+    ('delivery', 0.6), ('order', 0.5), ('meal', 0.7),
+)
+TRAVEL_WEIGHTS = (
+    ('uber', 0.98), ('ola', 0.98), ('taxi', 0.9), ('cab', 0.9),
+    ('makemytrip', 0.95), ('goibibo', 0.95), ('cleartrip', 0.95), ('irctc', 0.98),
+    ('indigo', 0.98), ('spicejet', 0.98), ('air india', 0.98),
+    ('flight', 0.8), ('hotel', 0.8), ('booking', 0.6), ('travel', 0.7), ('fuel', 0.7),
+    ('petrol', 0.8), ('parking', 0.6),
+)
+WORK_WEIGHTS = (
+    ('microsoft', 0.95), ('adobe', 0.95), ('zoom', 0.9), ('slack', 0.9), ('notion', 0.9),
+    ('office', 0.8), ('business', 0.7), ('subscription', 0.6), ('software', 0.8),
+    ('license', 0.8),
+)
+LEISURE_WEIGHTS = (
+    ('netflix', 0.98), ('amazon prime', 0.95), ('spotify', 0.95), ('disney', 0.95),
+    ('youtube premium', 0.9),
+    ('movie', 0.9), ('cinema', 0.9), ('theater', 0.8), ('bookmyshow', 0.95),
+    ('shopping', 0.7), ('mall', 0.6), ('gym', 0.8), ('spa', 0.8), ('salon', 0.7),
+    ('amazon', 0.6), ('flipkart', 0.6),
+)
+MISC_WEIGHTS = (
+    ('atm', 0.8), ('cash withdrawal', 0.9), ('withdrawn', 0.7),
+    ('debited from your mobikwik wallet', 0.7), ('debited from your paytm wallet', 0.7),
+    ('debited from your phonepe wallet', 0.7), ('debited from your wallet', 0.6),
+    ('wallet balance debited', 0.6),
+    ('bank', 0.5), ('transfer', 0.4),
+)
+
+KEYWORD_CONFIDENCE_THRESHOLD = 0.3
+
+
+# ---------------------------------------------------------------------------
+# Layer 0: Indian merchant database
+# ---------------------------------------------------------------------------
+
+def contains_merchant(body, merchant):
+    """Direct substring match, or one of the merchant's known spelling variations."""
+    if merchant in body:
+        return True
+    for variation in MERCHANT_VARIATIONS.get(merchant, ()):
+        if variation in body:
+            return True
+    return False
+
+
+def is_valid_merchant_name(name):
+    """Rejects extracted text that is only filler words, digits or punctuation."""
+    clean_name = name.strip().lower()
+    valid_words = [word for word in clean_name.split(' ')
+                   if len(word) >= 2 and word not in INVALID_MERCHANT_WORDS]
+    return (bool(valid_words)
+            and 2 <= len(clean_name) <= 30
+            and not _DIGITS_ONLY.fullmatch(clean_name)
+            and not _NO_LETTERS.fullmatch(clean_name))
+
+
+def card_merchant_name(name):
+    """A merchant captured by a card pattern without its bank/ltd suffix, lowercased, or None."""
+    merchant_name = _MERCHANT_SUFFIX.sub('', name.strip())
+    return merchant_name.lower() if is_valid_merchant_name(merchant_name) else None
+
+
+def payee_merchant_name(text):
+    """The payee at the start of the text following a "paid to " style prefix, or None."""
+    # The first stop word in list order that occurs ends the name
+    for stop_word in PAYEE_STOP_WORDS:
+        stop_index = text.find(stop_word)
+        if stop_index != -1:
+            text = text[:stop_index]
+            break
+    merchant_name = text.strip()
+    if 3 <= len(merchant_name) <= 25 and is_valid_merchant_name(merchant_name):
+        return merchant_name.lower()
+    return None
+
+
+def extract_wallet_merchant(body):
+    """
+    Merchant named in a card, wallet or UPI SMS, lowercased, or None.
+
+    Card transaction patterns are tried first, then "paid to ..." style payee phrases,
+    then a quoted merchant name.
+    """
+    for pattern in CARD_MERCHANT_PATTERNS:
+        match = pattern.search(body)
+        if match is not None and match.group(1) is not None:
+            merchant_name = card_merchant_name(match.group(1))
+            if merchant_name is not None:
+                return merchant_name
+
+    for prefix in WALLET_PAYEE_PREFIXES:
+        index = body.find(prefix)
+        if index == -1:
+            continue
+        merchant_name = payee_merchant_name(body[index + len(prefix):])
+        if merchant_name is not None:
+            return merchant_name
+
+    match = _QUOTED_MERCHANT.search(body)
+    if match is not None:
+        merchant_name = match.group(1).strip()
+        if is_valid_merchant_name(merchant_name):
+            return merchant_name.lower()
+
+    # Wallet debit notifications without merchant info fall through to keyword scoring
+    return None
+
+
+def categorize_extracted_merchant(merchant_name):
+    """Category implied by words in an extracted merchant name, or None."""
+    merchant = merchant_name.lower()
+    for category, keywords in MERCHANT_NAME_KEYWORDS:
+        for keyword in keywords:
+            if keyword in merchant:
+                return category
+    return None
+
+
+def categorize_by_indian_merchants(sms_body, merchants=INDIAN_MERCHANTS):
+    """Layer 0: wallet merchant extraction, then the Indian merchant database."""
+    body = sms_body.lower()
+
+    wallet_merchant = extract_wallet_merchant(body)
+    if wallet_merchant is not None:
+        category = categorize_extracted_merchant(wallet_merchant)
+        if category is not None:
+            return category
+
+    for category, names in merchants:
+        for merchant in names:
+            if contains_merchant(body, merchant):
+                return category
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Layer 1: merchant API
+# ---------------------------------------------------------------------------
+
+def extract_merchant_names(sms_body):
+    """Candidate merchant names for the API lookup, without duplicates, in discovery order."""
+    body = sms_body.lower()
+    merchants = []
+    wallet_merchant = extract_wallet_merchant(body)
+    if wallet_merchant is not None:
+        merchants.append(wallet_merchant)
+    for merchant in KNOWN_MERCHANTS:
+        if merchant in body:
+            merchants.append(merchant)
+    return list(dict.fromkeys(merchants))
+
+
+def map_place_category(place_category):
+    """Map a Foursquare place category name to an expense category, or None."""
+    name = place_category.lower()
+    for category, keywords in PLACE_CATEGORY_KEYWORDS:
+        for keyword in keywords:
+            if keyword in name:
+                return category
+    return None
+
+
+def categorize_by_merchant_api(sms_body, merchant_lookup=None):
+    """
+    Layer 1: look candidate merchant names up with merchant_lookup(name) -> Category or None.
+
+    Without a lookup the layer behaves like the app with no Foursquare key configured:
+    names are still extracted, but nothing is resolved.
+    """
+    return resolve_merchant_names(extract_merchant_names(sms_body), merchant_lookup)
+
+
+def resolve_merchant_names(merchant_names, merchant_lookup):
+    """
+    First category merchant_lookup resolves for the candidate names, or None. A failed lookup
+    counts as no match, and None (keyword scoring) only follows once every name is tried.
+    """
+    for merchant_name in merchant_names:
+        if len(merchant_name) < 3 or merchant_lookup is None:
+            continue
+        try:
+            category = merchant_lookup(merchant_name)
+        except Exception:
+            continue  # _searchFoursquareMerchant returns null on errors; try the next name
+        if category is not None:
+            return category
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Layer 2: keyword scoring
+# ---------------------------------------------------------------------------
+
+def _weighted_score(body, weights, score=0.0):
+    for phrase, weight in weights:
+        if phrase in body:
+            score += weight
+    return score
+
+
+def _clamp(score):
+    return min(max(score, 0.0), 1.0)
+
+
+def _food_adjustment(score, body, amount):
+    if amount < 500:
+        score += 0.3  # Small amounts often food
+    if amount > 2000:
+        score -= 0.2  # Large amounts less likely food
+    return score
+
+
+def _travel_adjustment(score, body, amount):
+    if amount > 1000:
+        score += 0.3  # Large amounts often travel
+    if amount > 5000:
+        score += 0.4  # Very large amounts very likely travel
+    return score
+
+
+def _work_adjustment(score, body, amount):
+    if 500 < amount < 2000:
+        score += 0.3  # Typical software costs
+    return score
+
+
+def _leisure_adjustment(score, body, amount):
+    return score
+
+
+def _misc_adjustment(score, body, amount):
+    if amount < 100 and 'wallet' in body:
+        score += 0.3  # Small wallet amounts often miscellaneous
+    return score
+
+
+# (category, keyword weights, base score, amount adjustment). Scoring order matters: on a tie
+# the later category wins, as in the app's reduce()
+CATEGORY_SCORING = (
+    (Category.Food, FOOD_WEIGHTS, 0.0, _food_adjustment),
+    (Category.Travel, TRAVEL_WEIGHTS, 0.0, _travel_adjustment),
+    (Category.Work, WORK_WEIGHTS, 0.0, _work_adjustment),
+    (Category.Leisure, LEISURE_WEIGHTS, 0.0, _leisure_adjustment),
+    (Category.Miscellaneous, MISC_WEIGHTS, 0.2, _misc_adjustment),
+)
+
+
+def keyword_scores(sms_body, amount):
+    """Layer 2 score of every category, in scoring order."""
+    body = sms_body.lower()
+    return [(category, _clamp(adjust(_weighted_score(body, weights, base), body, amount)))
+            for category, weights, base, adjust in CATEGORY_SCORING]
+
+
+def best_keyword_category(scores):
+    """Best-scoring category when its score clears the threshold, else Miscellaneous."""
+    best_category, best_score = None, None
+    for category, score in scores:
+        if best_score is None or score >= best_score:
+            best_category, best_score = category, score
+    if best_score > KEYWORD_CONFIDENCE_THRESHOLD:
+        return best_category
+    return Category.Miscellaneous
+
+
+def categorize_by_keyword_scoring(sms_body, amount):
+    """Layer 2: weighted keyword scoring with amount adjustments."""
+    return best_keyword_category(keyword_scores(sms_body, amount))
+
+
+def confidence_score(sms_body, category):
+    """The app's getConfidenceScore: the category's keyword score with a zero amount."""
+    return dict(keyword_scores(sms_body, 0.0))[category]
+
+
+# ---------------------------------------------------------------------------
+# Hybrid
+# ---------------------------------------------------------------------------
+
+def categorize_with_layer(sms_body, amount, merchant_lookup=None):
+    """categorize_hybrid() plus the name of the layer that decided."""
+    category = categorize_by_indian_merchants(sms_body)
+    if category is not None:
+        return category, LAYER_MERCHANT_DB
+
+    category = categorize_by_merchant_api(sms_body, merchant_lookup)
+    if category is not None:
+        return category, LAYER_MERCHANT_API
+
+    return categorize_by_keyword_scoring(sms_body, amount), LAYER_KEYWORDS
+
+
+def categorize_hybrid(sms_body, amount, merchant_lookup=None):
+    """Three-layer categorization: merchant database, merchant API, keyword scoring."""
+    return categorize_with_layer(sms_body, amount, merchant_lookup)[0]
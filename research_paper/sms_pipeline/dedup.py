@@ -0,0 +1,149 @@
+"""
+Duplicate Check Stage
+Mirrors _createSmsHash, _checkIfSmsAlreadyProcessed and _checkIfExpenseExists from
+lib/services/sms_listener.dart with the processed-hash collection and the saved expenses held
+in memory instead of Firestore. Hashes saved this session live in a set, hashes from earlier
+syncs sit behind a Bloom filter, and saved expenses are indexed by (amount, time bucket), so
+no check scans the expense history.
+"""
+
+import math
+from datetime import timedelta
+
+# Same amount within this many whole minutes counts as the same expense
+DUPLICATE_WINDOW_MINUTES = 5
+
+# Default Bloom filter sizing
+BLOOM_CAPACITY = 1000000
+BLOOM_ERROR_RATE = 0.01
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def sms_hash(sender, amount, date):
+    """The app's duplicate key: sender, amount, and day/hour/minute of the message."""
+    return f"{sender}_{amount!r}_{date.day}_{date.hour}_{date.minute}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for capacity items at error_rate false positives; past capacity it keeps working
+    with a rising false positive rate. Positions come from double hashing of hash(), so a
+    filter is only meaningful within one process.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, item):
+        value = hash(item) & _HASH_MASK
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        bits, size = self.bits, self.size
+        for index in range(self.hash_count):
+            position = (first + index * step) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        """False means never added; True means probably added."""
+        value = hash(item) & _HASH_MASK
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        bits, size = self.bits, self.size
+        for index in range(self.hash_count):
+            position = (first + index * step) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def fill_ratio(self):
+        return sum(bin(byte).count('1') for byte in self.bits) / self.size
+
+
+class DuplicateIndex:
+    """
+    In-memory stand-in for the processed_sms and user_expenses collections.
+
+    backend, when given, holds the hashes processed by earlier syncs (anything supporting
+    iteration and `in`, like the processed_sms collection). It is loaded into a Bloom filter
+    once, and only hashes the filter reports as possibly present are looked up in it, which is
+    the query the app sends to Firestore for every message. Saved expense times are bucketed by
+    amount and window-sized time buckets, so the expense check compares the few times in three
+    buckets instead of scanning the last seven days.
+    """
+
+    def __init__(self, window_minutes=DUPLICATE_WINDOW_MINUTES, backend=None,
+                 bloom_capacity=BLOOM_CAPACITY, bloom_error_rate=BLOOM_ERROR_RATE):
+        # Duration.inMinutes truncates, so anything under window_minutes + 1 minutes matches
+        self.window = timedelta(minutes=window_minutes + 1)
+        self.bucket_minutes = window_minutes + 1
+        self.processed = set()
+        self.times_by_bucket = {}
+        self.backend = backend
+        self.bloom = None
+        if backend is not None:
+            self.bloom = BloomFilter(max(bloom_capacity, len(backend)), bloom_error_rate)
+            for key in backend:
+                self.bloom.add(key)
+        self.backend_queries = 0
+        self.bloom_false_positives = 0
+
+    def _bucket(self, date):
+        # Times under one bucket width apart are in the same or adjacent buckets
+        return (date.toordinal() * 1440 + date.hour * 60 + date.minute) // self.bucket_minutes
+
+    def is_processed(self, key):
+        """True when an SMS with this hash was saved this session or by an earlier sync."""
+        if key in self.processed:
+            return True
+        if self.backend is None or key not in self.bloom:
+            return False
+        self.backend_queries += 1
+        if key in self.backend:
+            return True
+        self.bloom_false_positives += 1
+        return False
+
+    def expense_exists(self, amount, date):
+        """True when an expense of the same amount was saved within the window."""
+        bucket = self._bucket(date)
+        window = self.window
+        times_by_bucket = self.times_by_bucket
+        for neighbour in (bucket - 1, bucket, bucket + 1):
+            for existing in times_by_bucket.get((amount, neighbour), ()):
+                if abs(date - existing) < window:
+                    return True
+        return False
+
+    def is_duplicate(self, key, amount, date):
+        """True when the hash was already processed or the same amount was saved nearby."""
+        return self.is_processed(key) or self.expense_exists(amount, date)
+
+    def add(self, key, amount, date):
+        """Record a saved expense and mark its SMS as processed."""
+        self.processed.add(key)
+        self.times_by_bucket.setdefault((amount, self._bucket(date)), []).append(date)
+
+    def discard(self, key, amount, date):
+        """Undo add() for an expense whose save failed, so a retry is not taken for a duplicate."""
+        self.processed.discard(key)
+        times = self.times_by_bucket.get((amount, self._bucket(date)))
+        if times and date in times:
+            times.remove(date)
+
+    def stats(self):
+        """Lookup counters, ready for JSON."""
+        return {
+            'processed': len(self.processed),
+            'backend_queries': self.backend_queries,
+            'bloom_false_positives': self.bloom_false_positives,
+            'bloom_fill_ratio': self.bloom.fill_ratio() if self.bloom is not None else None,
+            'expense_buckets': len(self.times_by_bucket),
+        }
+
+    def __len__(self):
+        return len(self.processed)
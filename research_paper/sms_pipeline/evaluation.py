@@ -0,0 +1,226 @@
+"""
+Categorization Accuracy Evaluation
+Runs labelled expense SMS through every categorization layer on its own (merchant database,
+merchant API against an offline places stub, keyword scoring, learned patterns) and through the
+hybrid combination the app uses, collecting a confusion matrix and a latency histogram per
+layer. Labelled corpora are JSONL files with a category field, sharded by byte range across a
+process pool; shard results merge in shard order, so the counts are deterministic.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .amount import extract_amount
+from .categorizer import (categorize_by_indian_merchants, categorize_by_keyword_scoring,
+                          categorize_by_merchant_api, categorize_with_layer, map_place_category)
+from .exports import date_to_millis, parse_date, read_records, split_export
+from .merchant_api import normalize_merchant_name
+from .models import Category
+from .stats import LatencyHistogram
+
+LAYER_LEARNED = 'learned'
+LAYER_HYBRID = 'hybrid'
+LAYERS = ('merchant_db', 'merchant_api', 'keywords', LAYER_LEARNED, LAYER_HYBRID)
+
+# Column of the confusion matrix for messages a layer leaves undecided
+ABSTAINED = 'none'
+
+# Foursquare category names the places stub answers with, by normalized merchant name.
+# Names missing here resolve to nothing, like places Foursquare does not know.
+STUB_PLACES = {
+    'dominos': 'Pizza Place', 'mcdonalds': 'Fast Food Restaurant', 'starbucks': 'Cafe',
+    'zomato': 'Food Delivery Service', 'swiggy': 'Food Delivery Service',
+    'pizza hut': 'Pizza Place', 'kfc': 'Fast Food Restaurant', 'burger king': 'Fast Food',
+    'subway': 'Sandwich Restaurant', 'uber': 'Taxi Service', 'ola': 'Taxi Service',
+    'makemytrip': 'Travel Agency', 'goibibo': 'Travel Agency', 'cleartrip': 'Travel Agency',
+    'irctc': 'Rail Transport', 'redbus': 'Bus Transport', 'netflix': 'Movie Streaming',
+    'bookmyshow': 'Movie Theater', 'pvr': 'Movie Theater', 'inox': 'Movie Theater',
+    'amazon': 'Online Store', 'flipkart': 'Online Store', 'big bazaar': 'Department Store',
+    'reliance digital': 'Electronics Store', 'paytm': 'Financial Service',
+    'phonepe': 'Financial Service', 'gpay': 'Financial Service', 'mobikwik': 'Financial Service',
+    'green leaf restaurant': 'Restaurant', 'city cafe': 'Cafe',
+    'annapurna kitchen': 'Indian Restaurant', 'sharma general store': 'Grocery Store',
+    'metro parking': 'Parking', 'sai fuel station': 'Gas Station', 'raj travels': 'Travel Agency',
+    'techno solutions': 'Business Service', 'urban fashion mall': 'Shopping Mall',
+    'fitzone gym': 'Gym', 'new book depot': 'Bookstore',
+}
+
+
+class PlacesStub:
+    """Offline merchant_lookup for Layer 1: place categories from a fixed table."""
+
+    def __init__(self, places=STUB_PLACES):
+        self.places = places
+
+    def __call__(self, merchant_name):
+        place = self.places.get(normalize_merchant_name(merchant_name))
+        return map_place_category(place) if place else None
+
+
+class ConfusionMatrix:
+    """Counts of (true category, predicted category or ABSTAINED)."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, label, predicted):
+        self.counts[label, predicted] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def decided(self):
+        return sum(count for (_, predicted), count in self.counts.items()
+                   if predicted != ABSTAINED)
+
+    @property
+    def correct(self):
+        return sum(count for (label, predicted), count in self.counts.items()
+                   if label == predicted)
+
+    def summary(self):
+        """Coverage, accuracy (over all messages), precision (over decided ones) and the matrix."""
+        total, decided, correct = self.total, self.decided, self.correct
+        columns = [category.value for category in Category] + [ABSTAINED]
+        return {
+            'total': total,
+            'decided': decided,
+            'correct': correct,
+            'coverage': decided / total if total else 0.0,
+            'accuracy': correct / total if total else 0.0,
+            'precision': correct / decided if decided else 0.0,
+            'matrix': {category.value: {column: self.counts[category.value, column]
+                                        for column in columns}
+                       for category in Category},
+        }
+
+
+class LayerEvaluator:
+    """
+    Categorizes labelled messages with every layer and records how each one did.
+
+    merchant_lookup serves Layer 1 and patterns, a learning.PatternIndex, the learned layer.
+    The hybrid is the pipeline's three-layer categorizer with the smart categorizer's learned
+    pattern check for results that come out Miscellaneous.
+    """
+
+    def __init__(self, merchant_lookup=None, patterns=None):
+        self.merchant_lookup = merchant_lookup
+        self.patterns = patterns
+        self.matrices = {name: ConfusionMatrix() for name in LAYERS}
+        self.latency = {name: LatencyHistogram() for name in LAYERS}
+        self.deciding = Counter()
+
+    # -- layers: each returns a Category, or None when it leaves the message undecided ----
+
+    def layer_merchant_db(self, body, amount, date):
+        return categorize_by_indian_merchants(body)
+
+    def layer_merchant_api(self, body, amount, date):
+        return categorize_by_merchant_api(body, self.merchant_lookup)
+
+    def layer_keywords(self, body, amount, date):
+        return categorize_by_keyword_scoring(body, amount)
+
+    def layer_learned(self, body, amount, date):
+        if self.patterns is None:
+            return None
+        match = self.patterns.match(body, amount, date)
+        return match[0] if match is not None else None
+
+    def layer_hybrid(self, body, amount, date):
+        category, layer = categorize_with_layer(body, amount, self.merchant_lookup)
+        if category is Category.Miscellaneous:
+            learned = self.layer_learned(body, amount, date)
+            if learned is not None:
+                category, layer = learned, LAYER_LEARNED
+        self.deciding[layer] += 1
+        return category
+
+    def evaluate(self, body, amount, date, label):
+        """Run every layer on one message whose true category is label."""
+        clock = time.perf_counter
+        for name in LAYERS:
+            start = clock()
+            category = getattr(self, f"layer_{name}")(body, amount, date)
+            self.latency[name].record(clock() - start)
+            self.matrices[name].add(label.value,
+                                    category.value if category is not None else ABSTAINED)
+
+    def merge(self, other):
+        for name in LAYERS:
+            self.matrices[name].merge(other.matrices[name])
+            self.latency[name].merge(other.latency[name])
+        self.deciding.update(other.deciding)
+
+    def report(self):
+        """Per-layer accuracy, confusion matrix and latency, ready for JSON."""
+        return {
+            'layers': {name: dict(self.matrices[name].summary(),
+                                  latency=self.latency[name].summary())
+                       for name in LAYERS},
+            'hybrid_layers': dict(self.deciding.most_common()),
+        }
+
+
+def write_labelled_jsonl(examples, path):
+    """Write (SmsMessage, Category) pairs as a labelled JSONL corpus; returns the count."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        for message, category in examples:
+            output.write(json.dumps({'sender': message.sender, 'body': message.body,
+                                     'date': date_to_millis(message.date),
+                                     'category': category.value}, ensure_ascii=False))
+            output.write('\n')
+            count += 1
+    return count
+
+
+def read_labelled(path, start=0, end=None):
+    """
+    Yield (body, amount, date, category) for the labelled JSONL records starting in
+    [start, end). A record without an amount gets the one extract_amount() finds (0.0 if none).
+    """
+    categories = {category.value: category for category in Category}
+    for record in read_records(path, start, end):
+        body = record['body']
+        amount = record.get('amount')
+        if amount is None:
+            amount = extract_amount(body.lower()) or 0.0
+        yield body, amount, parse_date(record.get('date')), categories[record['category']]
+
+
+def evaluate_shard(path, start, end, merchant_lookup=None, patterns=None):
+    """A LayerEvaluator over one byte range of a labelled corpus."""
+    evaluator = LayerEvaluator(merchant_lookup, patterns)
+    for body, amount, date, label in read_labelled(path, start, end):
+        evaluator.evaluate(body, amount, date, label)
+    return evaluator
+
+
+def evaluate_corpus(path, merchant_lookup=None, patterns=None, workers=None, shards=None):
+    """
+    Evaluate a labelled corpus across worker processes: shards default to four per worker so
+    the pool stays busy, and results merge in shard order. One worker runs in process.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_export(path, shards or workers * 4)
+    total = LayerEvaluator(merchant_lookup, patterns)
+    if workers == 1:
+        for start, end in ranges:
+            total.merge(evaluate_shard(path, start, end, merchant_lookup, patterns))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_shard, path, start, end, merchant_lookup, patterns)
+                   for start, end in ranges]
+        for future in futures:
+            total.merge(future.result())
+    return total
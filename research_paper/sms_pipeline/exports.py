@@ -0,0 +1,448 @@
+"""
+SMS Export Reader
+Streams SmsMessage records out of CSV and JSONL inbox exports through a memory map instead of
+loading the export the way a Python reproduction of syncSmsMessages() in
+lib/services/sms_listener.dart would. Exports split into byte ranges that worker processes read
+independently, and a columnar on-disk cache lets repeated evaluation runs skip the parsing.
+Peak memory does not grow with the export size.
+"""
+
+import csv
+import json
+import mmap
+import os
+import shutil
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from .models import SmsMessage
+
+COLUMNS_FORMAT = 'sms-columns'
+COLUMNS_VERSION = 1
+COLUMNS_SUFFIX = '.columns'
+
+# Column files of a cache directory: raw little-endian arrays, read back through memoryviews
+_SENDER_CODES = 'sender_codes.u32'
+_BODY_OFFSETS = 'body_offsets.u64'
+_BODIES = 'bodies.utf8'
+_DATES = 'dates.i64'
+_SENDERS = 'senders.json'
+_META = 'meta.json'
+
+# Stored for a message without a date
+NO_DATE = -(1 << 63)
+
+# Rows buffered per column before they are appended to the cache files
+WRITE_CHUNK_ROWS = 65536
+# Bytes scanned at a time when placing CSV shard boundaries
+SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+# Mapped pages already read are handed back to the OS every this many bytes, otherwise they
+# stay resident and count against the process until the map closes
+RELEASE_BYTES = 1024 * 1024
+
+_EPOCH = datetime(1970, 1, 1)
+_SENDER_FIELDS = ('sender', 'address')
+
+
+def export_format(path):
+    """'columns' for a cache directory, otherwise 'csv' or 'jsonl' by file extension."""
+    if os.path.isdir(path):
+        return 'columns'
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f"Unknown export format: {path}")
+
+
+def date_to_millis(date):
+    """Milliseconds since the epoch of a naive UTC datetime, as the app's SmsMessage.date."""
+    if date is None:
+        return None
+    return (date - _EPOCH) // timedelta(milliseconds=1)
+
+
+def millis_to_date(millis):
+    return None if millis == NO_DATE else _EPOCH + timedelta(milliseconds=millis)
+
+
+def parse_date(value):
+    """Export date field: milliseconds since the epoch (number or digits) or an ISO 8601 string."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return millis_to_date(int(value))
+    if value.lstrip('-').isdigit():
+        return millis_to_date(int(value))
+    return datetime.fromisoformat(value)
+
+
+def _message(sender, body, date):
+    return SmsMessage(sender=sender or '', body=body or '', date=parse_date(date))
+
+
+@contextmanager
+def _mapped(path):
+    """Read-only memory map of a file, or None for an empty file (which mmap rejects)."""
+    with open(path, 'rb') as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+class _PageReleaser:
+    """Drops the pages of a map below a read position from the process, where supported."""
+
+    def __init__(self, mapped, start=0):
+        self.mapped = mapped
+        self.released = start - start % mmap.PAGESIZE
+        self.enabled = mapped is not None and hasattr(mmap, 'MADV_DONTNEED')
+
+    def advance(self, position):
+        if self.enabled and position - self.released >= RELEASE_BYTES:
+            end = position - position % mmap.PAGESIZE
+            self.mapped.madvise(mmap.MADV_DONTNEED, self.released, end - self.released)
+            self.released = end
+
+
+def _record_start(mapped, position):
+    """The first line start at or after position."""
+    if position <= 0:
+        return 0
+    if mapped[position - 1] == 0x0A:
+        return position
+    newline = mapped.find(b'\n', position)
+    return len(mapped) if newline < 0 else newline + 1
+
+
+def _lines(mapped, start, end):
+    """(start, end) of each line beginning in [start, end), newline excluded."""
+    pages = _PageReleaser(mapped, start)
+    position = start
+    while position < end:
+        newline = mapped.find(b'\n', position)
+        if newline < 0:
+            newline = len(mapped)
+        yield position, newline
+        position = newline + 1
+        pages.advance(position)
+
+
+def _csv_header(mapped):
+    """Column indexes of sender, body and date, and the offset where the data rows start."""
+    header_end = mapped.find(b'\n')
+    header_end = len(mapped) if header_end < 0 else header_end + 1
+    names = next(csv.reader([mapped[:header_end].decode('utf-8-sig')]))
+    names = [name.strip().lower() for name in names]
+    sender = next((names.index(field) for field in _SENDER_FIELDS if field in names), None)
+    if 'body' not in names:
+        raise ValueError("CSV export has no 'body' column")
+    date = names.index('date') if 'date' in names else None
+    return (sender, names.index('body'), date), header_end
+
+
+def _jsonl_records(mapped, start, end):
+    for line_start, line_end in _lines(mapped, _record_start(mapped, start), end):
+        line = mapped[line_start:line_end].strip()
+        if line:
+            yield json.loads(line)
+
+
+def _read_jsonl(mapped, start, end):
+    for record in _jsonl_records(mapped, start, end):
+        sender = next((record[field] for field in _SENDER_FIELDS if field in record), '')
+        yield _message(sender, record.get('body'), record.get('date'))
+
+
+def _read_csv(mapped, start, end):
+    (sender, body, date), header_end = _csv_header(mapped)
+    start = max(_record_start(mapped, start), header_end)
+    # Quoted fields may span lines; csv.reader pulls further lines until the record closes
+    lines = (mapped[line_start:min(line_end + 1, len(mapped))].decode('utf-8')
+             for line_start, line_end in _lines(mapped, start, end))
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        yield _message(row[sender] if sender is not None else '', row[body],
+                       row[date] if date is not None else None)
+
+
+def read_export(path, start=0, end=None):
+    """
+    Yield the SmsMessage records of an export lazily.
+
+    For CSV and JSONL files start and end are byte offsets: every record that starts in
+    [start, end) is read, so a shard that begins mid-line skips to the next line. CSV shards
+    should come from split_export(), which keeps quoted multi-line bodies whole. For a columnar
+    cache start and end are row numbers.
+    """
+    kind = export_format(path)
+    if kind == 'columns':
+        yield from read_columns(path, start, end)
+        return
+    with _mapped(path) as mapped:
+        if mapped is None:
+            return
+        end = len(mapped) if end is None else min(end, len(mapped))
+        reader = _read_csv if kind == 'csv' else _read_jsonl
+        yield from reader(mapped, start, end)
+
+
+def read_records(path, start=0, end=None):
+    """The raw objects of a JSONL export, lazily, for callers that need extra fields."""
+    if export_format(path) != 'jsonl':
+        raise ValueError(f"Not a JSONL export: {path}")
+    with _mapped(path) as mapped:
+        if mapped is None:
+            return
+        end = len(mapped) if end is None else min(end, len(mapped))
+        yield from _jsonl_records(mapped, start, end)
+
+
+def _csv_boundaries(mapped, targets):
+    """
+    The first record start at or after each (ascending) target offset: the first newline
+    outside a quoted field. A newline is outside quotes when the quotes before it are even in
+    number, since escaped quotes come in pairs; they are counted once, chunk by chunk.
+    """
+    boundaries = []
+    scanned = quotes = 0
+
+    def quotes_before(offset):
+        nonlocal scanned, quotes
+        while scanned < offset:
+            chunk_end = min(offset, scanned + SCAN_CHUNK_BYTES)
+            quotes += mapped[scanned:chunk_end].count(b'"')
+            scanned = chunk_end
+        return quotes
+
+    for target in targets:
+        newline = mapped.find(b'\n', max(target - 1, boundaries[-1] if boundaries else 0))
+        while newline >= 0 and quotes_before(newline) % 2:
+            newline = mapped.find(b'\n', newline + 1)
+        boundaries.append(len(mapped) if newline < 0 else newline + 1)
+    return boundaries
+
+
+def split_export(path, shards):
+    """
+    [(start, end)] ranges covering the export in shards roughly equal parts: byte ranges that
+    begin on record boundaries for CSV and JSONL files, row ranges for a columnar cache.
+    """
+    shards = max(1, shards)
+    if export_format(path) == 'columns':
+        rows = read_meta(path)['rows']
+        edges = [rows * index // shards for index in range(shards + 1)]
+        return [(start, end) for start, end in zip(edges, edges[1:]) if end > start]
+    csv_export = export_format(path) == 'csv'
+    with _mapped(path) as mapped:
+        if mapped is None:
+            return []
+        size = len(mapped)
+        first = _csv_header(mapped)[1] if csv_export else 0
+        targets = [first + (size - first) * index // shards for index in range(1, shards)]
+        if csv_export:
+            edges = _csv_boundaries(mapped, targets)
+        else:
+            edges = [_record_start(mapped, target) for target in targets]
+    edges = [first] + edges + [size]
+    return [(start, end) for start, end in zip(edges, edges[1:]) if end > start]
+
+
+def map_export(path, function, workers=None, shards=None):
+    """
+    Run function(path, start, end) on every shard in worker processes and return the results
+    in shard order. function must be picklable (a module-level function); it typically loops
+    over read_export(path, start, end).
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_export(path, shards or workers)
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(ranges)))) as pool:
+        futures = [pool.submit(function, path, start, end) for start, end in ranges]
+        return [future.result() for future in futures]
+
+
+def write_jsonl(messages, path):
+    """Write messages as a JSONL export with millisecond dates; returns the record count."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        for message in messages:
+            output.write(json.dumps({'sender': message.sender, 'body': message.body,
+                                     'date': date_to_millis(message.date)},
+                                    ensure_ascii=False))
+            output.write('\n')
+            count += 1
+    return count
+
+
+def write_csv(messages, path):
+    """
+    Write messages as a CSV export (sender, body, date in milliseconds); returns the count.
+    Every field is quoted: with '\n' line endings the csv module would leave a bare '\r' in a
+    body unquoted, and the reader would reject the row.
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        writer = csv.writer(output, lineterminator='\n', quoting=csv.QUOTE_ALL)
+        writer.writerow(('sender', 'body', 'date'))
+        for message in messages:
+            millis = date_to_millis(message.date)
+            writer.writerow((message.sender, message.body, '' if millis is None else millis))
+            count += 1
+    return count
+
+
+def source_fingerprint(path):
+    """What a columnar cache records about its export, to notice when the export changed."""
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_columns(messages, path, source=None):
+    """
+    Write messages as a columnar cache directory and return the row count.
+
+    Bodies are one UTF-8 blob with row offsets, senders are dictionary codes and dates are
+    milliseconds; columns are appended chunk by chunk, so memory stays flat. The directory is
+    built beside path and moved into place when complete.
+    """
+    building = f"{path}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    senders = {}
+    rows = 0
+    body_end = 0
+
+    outputs = [open(os.path.join(building, name), 'wb')
+               for name in (_SENDER_CODES, _BODY_OFFSETS, _BODIES, _DATES)]
+    codes_file, offsets_file, bodies_file, dates_file = outputs
+    try:
+        codes, offsets, dates, bodies = array('I'), array('Q', [0]), array('q'), []
+        for message in messages:
+            code = senders.get(message.sender)
+            if code is None:
+                code = senders[message.sender] = len(senders)
+            encoded = message.body.encode('utf-8')
+            body_end += len(encoded)
+            codes.append(code)
+            offsets.append(body_end)
+            millis = date_to_millis(message.date)
+            dates.append(NO_DATE if millis is None else millis)
+            bodies.append(encoded)
+            rows += 1
+            if len(codes) == WRITE_CHUNK_ROWS:
+                for column, output in ((codes, codes_file), (offsets, offsets_file),
+                                       (dates, dates_file)):
+                    column.tofile(output)
+                    del column[:]
+                bodies_file.write(b''.join(bodies))
+                bodies.clear()
+        for column, output in ((codes, codes_file), (offsets, offsets_file),
+                               (dates, dates_file)):
+            column.tofile(output)
+        bodies_file.write(b''.join(bodies))
+    finally:
+        for output in outputs:
+            output.close()
+
+    with open(os.path.join(building, _SENDERS), 'w', encoding='utf-8') as output:
+        json.dump(list(senders), output, ensure_ascii=False)
+    with open(os.path.join(building, _META), 'w', encoding='utf-8') as output:
+        json.dump({'format': COLUMNS_FORMAT, 'version': COLUMNS_VERSION, 'rows': rows,
+                   'source': source}, output)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(building, path)
+    return rows
+
+
+def read_meta(path):
+    with open(os.path.join(path, _META), encoding='utf-8') as source:
+        meta = json.load(source)
+    if meta.get('format') != COLUMNS_FORMAT or meta.get('version') != COLUMNS_VERSION:
+        raise ValueError(f"Not a version {COLUMNS_VERSION} columnar SMS cache: {path}")
+    return meta
+
+
+def read_columns(path, start=0, end=None):
+    """Yield the SmsMessage records of rows [start, end) of a columnar cache."""
+    rows = read_meta(path)['rows']
+    end = rows if end is None else min(end, rows)
+    if start >= end:
+        return
+    with open(os.path.join(path, _SENDERS), encoding='utf-8') as source:
+        senders = json.load(source)
+    with _mapped(os.path.join(path, _SENDER_CODES)) as codes_map, \
+            _mapped(os.path.join(path, _BODY_OFFSETS)) as offsets_map, \
+            _mapped(os.path.join(path, _DATES)) as dates_map, \
+            _mapped(os.path.join(path, _BODIES)) as bodies_map:
+        codes = memoryview(codes_map).cast('I')
+        offsets = memoryview(offsets_map).cast('Q')
+        dates = memoryview(dates_map).cast('q')
+        # Every body may be empty, which leaves nothing to map
+        bodies = memoryview(bodies_map) if bodies_map is not None else memoryview(b'')
+        body_pages = _PageReleaser(bodies_map, offsets[start])
+        column_pages = [(_PageReleaser(mapped, start * view.itemsize), view.itemsize)
+                        for mapped, view in ((codes_map, codes), (offsets_map, offsets),
+                                             (dates_map, dates))]
+        try:
+            for row in range(start, end):
+                body_end = offsets[row + 1]
+                yield SmsMessage(sender=senders[codes[row]],
+                                 body=str(bodies[offsets[row]:body_end], 'utf-8'),
+                                 date=millis_to_date(dates[row]))
+                body_pages.advance(body_end)
+                if row % WRITE_CHUNK_ROWS == 0:
+                    for pages, itemsize in column_pages:
+                        pages.advance(row * itemsize)
+        finally:
+            # The maps cannot close while views of them are alive
+            for view in (codes, offsets, dates, bodies):
+                view.release()
+
+
+def read_bodies(path, start=0, end=None):
+    """
+    Yield the UTF-8 bodies of rows [start, end) of a columnar cache as memoryviews of the
+    mapped bodies column, without decoding them. Each view is released when the next row is
+    read, so copy it to keep it.
+    """
+    rows = read_meta(path)['rows']
+    end = rows if end is None else min(end, rows)
+    if start >= end:
+        return
+    with _mapped(os.path.join(path, _BODY_OFFSETS)) as offsets_map, \
+            _mapped(os.path.join(path, _BODIES)) as bodies_map:
+        offsets = memoryview(offsets_map).cast('Q')
+        bodies = memoryview(bodies_map) if bodies_map is not None else memoryview(b'')
+        body_pages = _PageReleaser(bodies_map, offsets[start])
+        try:
+            for row in range(start, end):
+                body_end = offsets[row + 1]
+                with bodies[offsets[row]:body_end] as body:
+                    yield body
+                body_pages.advance(body_end)
+        finally:
+            offsets.release()
+            bodies.release()
+
+
+def cached_export(path, cache_path=None):
+    """
+    Path of an up-to-date columnar cache of a CSV or JSONL export, parsing the export into
+    cache_path (default: beside it, with a .columns suffix) when the cache is missing or was
+    built from a different version of the file.
+    """
+    cache_path = cache_path or f"{path}{COLUMNS_SUFFIX}"
+    source = source_fingerprint(path)
+    try:
+        if read_meta(cache_path)['source'] == source:
+            return cache_path
+    except (OSError, ValueError):
+        pass
+    write_columns(read_export(path), cache_path, source=source)
+    return cache_path
@@ -0,0 +1,200 @@
+"""
+Single-Pass Transaction Extraction
+Extracts the amount, currency, payment method, merchant candidate and transaction type of an SMS
+in one scan of its UTF-8 bytes, where the app lowercases the body and runs the amount regexes,
+the _detectPaymentMethod contains chain, the merchant patterns and the keyword checks one after
+another. Every phrase those stages test is compiled into one byte-level trie that is tried at
+each position, recording which phrases occur. The amount and merchant regexes are ordinary
+searches of the lowercased bytes, run only when a phrase their matches start with was found.
+
+Bodies can be bytes, bytearray, memoryview or mmap slices (a columnar cache's bodies column, for
+instance) and only the merchant name is ever decoded: the scan runs on a lowercased copy of the
+bytes, which costs far less than case-insensitive matching in the regex engine. str bodies are
+encoded once. Case folding is ASCII only, so results are identical to extract_transaction()
+except on bodies with one of the few non-ASCII characters that lowercase to ASCII letters
+(Kelvin sign, dotted I).
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .amount import (AMOUNT_PATTERN, AMOUNT_PREFIXES, CURRENCY, CURRENCY_MARKERS,
+                     FALLBACK_AMOUNT_PATTERN, extract_amount_and_currency)
+from .categorizer import (_QUOTED_MERCHANT, CARD_MERCHANT_LEADS, CARD_MERCHANT_PATTERNS,
+                          WALLET_PAYEE_PREFIXES, card_merchant_name, extract_wallet_merchant,
+                          is_valid_merchant_name, payee_merchant_name)
+from .keywords import TRANSACTION_TERMS, transaction_type
+from .matcher import _trie_pattern
+from .title import PAYMENT_TERMS, detect_payment_method, payment_method
+
+# Scan hit sequences whose derived fields are remembered; one per message template
+SCAN_MEMO_SIZE = 65536
+
+_QUOTE = '"'
+_CURRENCY_MARKERS = tuple(marker.encode('utf-8') for marker in CURRENCY_MARKERS)
+
+
+@dataclass(slots=True)
+class Extraction:
+    """The transaction fields of one SMS; fields a message does not have are None."""
+    amount: float = None
+    currency: str = None
+    payment_method: str = None
+    merchant: str = None
+    transaction_type: str = None
+
+
+def extract_transaction(body):
+    """The multi-pass reference: each field from its own pipeline stage function."""
+    body_lower = body.lower()
+    amount, currency = extract_amount_and_currency(body_lower)
+    return Extraction(amount, currency, detect_payment_method(body),
+                      extract_wallet_merchant(body_lower), transaction_type(body_lower))
+
+
+def _lowercase_pattern(pattern):
+    """
+    A case-insensitive str pattern compiled for lowercased UTF-8 bytes. The patterns only use
+    A-Z inside classes, where a-z matches the same lowercased text; dropping IGNORECASE saves
+    the engine folding every character it compares.
+    """
+    source = pattern.pattern.replace('A-Z', 'a-z').encode('utf-8')
+    return re.compile(source, pattern.flags & ~(re.UNICODE | re.IGNORECASE))
+
+
+def _parse_amount(match):
+    text = (match.group(1) or match.group(2) or match.group(3) or b'0.0').replace(b',', b'')
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return amount if amount > 0 else None
+
+
+class TransactionScanner:
+    """
+    extract_transaction() in one pass over the body's bytes.
+
+    The scan finds every phrase the amount, payment method, merchant and keyword checks test;
+    the amount and merchant regexes then only run when a literal their matches start with
+    was seen. What the found phrases decide (payment method, transaction type and which
+    regexes to run) is memoized per sequence of scan hits, which messages sent from the same
+    template share, for memo_size sequences.
+    """
+
+    def __init__(self, memo_size=SCAN_MEMO_SIZE):
+        self.amount_pattern = _lowercase_pattern(AMOUNT_PATTERN)
+        self.fallback_pattern = _lowercase_pattern(FALLBACK_AMOUNT_PATTERN)
+        self.merchant_patterns = tuple(_lowercase_pattern(pattern)
+                                       for pattern in CARD_MERCHANT_PATTERNS)
+        self.quoted_pattern = _lowercase_pattern(_QUOTED_MERCHANT)
+
+        terms = set(PAYMENT_TERMS).union(TRANSACTION_TERMS, AMOUNT_PREFIXES, _QUOTE,
+                                         WALLET_PAYEE_PREFIXES, *CARD_MERCHANT_LEADS)
+        # The trie is built over the terms' UTF-8 bytes, one latin-1 character per byte
+        encoded = {term.encode('utf-8').decode('latin-1'): term for term in terms}
+        trie = {}
+        for term in encoded:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = True
+        # The leading class lets the engine skip positions no term starts with cheaply
+        first_bytes = ''.join(sorted(re.escape(char) for char in trie))
+        self.pattern = re.compile(f"(?=[{first_bytes}])(?=({_trie_pattern(trie)}))"
+                                  .encode('latin-1'))
+
+        # Longest term at a position -> every term that is a prefix of it
+        self._prefixes = {}
+        for term in encoded:
+            self._prefixes[term.encode('latin-1')] = tuple(
+                encoded[term[:end]] for end in range(1, len(term) + 1) if term[:end] in encoded)
+        self.profile = lru_cache(maxsize=memo_size)(self._profile)
+
+    def _profile(self, hits):
+        """
+        What the terms behind a sequence of scan hits decide: the payment method, the
+        transaction type, whether an amount match can start anywhere, the card patterns that
+        can match and the payee prefixes present (in WALLET_PAYEE_PREFIXES order, as bytes).
+        """
+        terms = set().union(*map(self._prefixes.__getitem__, hits))
+        return (payment_method(terms), transaction_type(terms),
+                not terms.isdisjoint(AMOUNT_PREFIXES),
+                tuple(pattern for pattern, leads in zip(self.merchant_patterns,
+                                                        CARD_MERCHANT_LEADS)
+                      if not terms.isdisjoint(leads)),
+                tuple(prefix.encode('utf-8') for prefix in WALLET_PAYEE_PREFIXES
+                      if prefix in terms),
+                _QUOTE in terms)
+
+    def scan(self, body):
+        """The Extraction of one body: bytes-like UTF-8, or str."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif not isinstance(body, (bytes, bytearray)):
+            body = bytes(body)
+        body = body.lower()
+        method, kind, has_amount, card_patterns, payees, quoted = self.profile(
+            tuple(self.pattern.findall(body)))
+        amount, currency = self._amount(body, has_amount)
+        return Extraction(amount, currency, method,
+                          self._merchant(body, card_patterns, payees, quoted), kind)
+
+    def _amount(self, body, has_amount):
+        match = self.amount_pattern.search(body) if has_amount else None
+        if match is None:
+            match = self.fallback_pattern.search(body)
+            if match is None:
+                return None, None
+        amount = _parse_amount(match)
+        if amount is None:
+            return None, None
+        text = match.group(0)
+        return amount, CURRENCY if any(marker in text for marker in _CURRENCY_MARKERS) else None
+
+    def _merchant(self, body, card_patterns, payees, quoted):
+        """extract_wallet_merchant(): card patterns, then payee phrases, then a quoted name."""
+        for pattern in card_patterns:
+            match = pattern.search(body)
+            if match is not None and match.group(1) is not None:
+                merchant_name = card_merchant_name(str(match.group(1), 'utf-8'))
+                if merchant_name is not None:
+                    return merchant_name
+
+        for prefix in payees:
+            text = body[body.find(prefix) + len(prefix):]
+            merchant_name = payee_merchant_name(str(text, 'utf-8'))
+            if merchant_name is not None:
+                return merchant_name
+
+        match = self.quoted_pattern.search(body) if quoted else None
+        if match is not None:
+            # Decoded names are lowercased again for letters bytes.lower() leaves alone
+            merchant_name = str(match.group(1), 'utf-8').strip().lower()
+            if is_valid_merchant_name(merchant_name):
+                return merchant_name
+        return None
+
+    def memo_stats(self):
+        """Scan memo counters, ready for JSON."""
+        info = self.profile.cache_info()
+        lookups = info.hits + info.misses
+        return {'hits': info.hits, 'misses': info.misses, 'sequences': info.currsize,
+                'hit_rate': info.hits / lookups if lookups else 0.0}
+
+
+_default_scanner = None
+
+
+def default_scanner():
+    """The TransactionScanner over the built-in tables, built on first use."""
+    global _default_scanner
+    if _default_scanner is None:
+        _default_scanner = TransactionScanner()
+    return _default_scanner
+
+
+def scan_transaction(body):
+    """Drop-in replacement for extract_transaction() backed by the default scanner."""
+    return default_scanner().scan(body)
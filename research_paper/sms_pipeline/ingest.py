@@ -0,0 +1,272 @@
+"""
+Asyncio Ingestion Service
+Concurrent replacement for syncSmsMessages() in lib/services/sms_listener.dart, which awaits
+_processSmsMessage for the last 50 inbox messages one at a time. Messages flow through bounded
+queues into validation, categorization and persistence workers, so slow saves overlap instead of
+adding up, and a watermark replaces the fixed 50-message window so whole histories can be
+backfilled and resumed.
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+from .pipeline import SmsPipeline
+
+# Pipeline stages run by the validation and categorization workers; persistence is the save stage
+VALIDATION_STAGES = ('received', 'sender', 'keywords', 'amount', 'duplicate')
+CATEGORIZATION_STAGES = ('categorize', 'title')
+QUEUES = ('validate', 'categorize', 'save')
+
+# Default bound of each stage queue and the default worker counts
+QUEUE_SIZE = 1000
+VALIDATE_WORKERS = 1
+CATEGORIZE_WORKERS = 1
+SAVE_WORKERS = 32
+# How often a buffering sink is asked to flush writes older than its flush interval
+FLUSH_CHECK_SECONDS = 0.1
+
+# Queue sentinel telling a worker that its upstream is finished
+_DONE = object()
+
+
+async def _iterate(messages):
+    if hasattr(messages, '__aiter__'):
+        async for message in messages:
+            yield message
+    else:
+        for message in messages:
+            yield message
+
+
+class IngestionService:
+    """
+    Queue-and-worker ingestion around an SmsPipeline.
+
+    messages (any iterable or async iterable of SmsMessage) are read into a bounded queue, so a
+    slow stage blocks the reader instead of buffering the inbox in memory. Validation workers run
+    the received to duplicate stages and reserve the SMS hash in the same step, with no await in
+    between, so a re-delivered copy queued behind a message is still caught. Categorization
+    workers run categorize and title, in executor threads when executor is given (for blocking
+    merchant lookups). Save workers await store(message), the persistence coroutine, so up to
+    save_workers saves are in flight at once. A sink with maybe_flush() (an ExpenseStore) is
+    asked to flush every flush_check seconds, so buffered saves reach storage while the inbox
+    is quiet instead of waiting for the next put.
+
+    Messages older than watermark are skipped. With the source in date order, oldest first, the
+    watermark then advances to the date of the newest message such that it and every message
+    before it have finished, so a later run started from it loses nothing. A message that
+    raises in any stage, the sink included, is counted, its hash reservation (if any) is
+    released, and the watermark stays before it so the next run retries it; expenses already
+    saved after it are then caught by the duplicate check. Only messages before it are tracked
+    for the watermark from then on. A worker that crashes outside a message cancels the run,
+    and run() raises its error.
+    """
+
+    def __init__(self, pipeline=None, store=None, watermark=None, queue_size=QUEUE_SIZE,
+                 validate_workers=VALIDATE_WORKERS, categorize_workers=CATEGORIZE_WORKERS,
+                 save_workers=SAVE_WORKERS, executor=None, flush_check=FLUSH_CHECK_SECONDS):
+        self.pipeline = pipeline if pipeline is not None else SmsPipeline(max_age=None)
+        self.store = store
+        self.watermark = watermark
+        self.queue_size = queue_size
+        self.workers = {'validate': validate_workers, 'categorize': categorize_workers,
+                        'save': save_workers}
+        self.executor = executor
+        self.flush_check = flush_check
+        self.skipped = 0
+        self.errors = Counter()
+        self.max_depth = Counter()
+        self.reader_wait = 0.0
+        self.elapsed = 0.0
+        # Dates of accepted messages by sequence number, until the watermark passes them
+        self._dates = {}
+        self._finished = set()
+        self._next = 0
+        # Sequence number of the first failed message, which the watermark cannot pass
+        self._stalled = None
+
+    # -- workers -------------------------------------------------------------
+
+    async def _read(self, messages, queue):
+        clock = time.perf_counter
+        # The watermark moves during the run; skip against where it started
+        watermark = self.watermark
+        sequence = 0
+        async for message in _iterate(messages):
+            if watermark is not None and message.date < watermark:
+                self.skipped += 1
+                continue
+            self.pipeline.received += 1
+            if self._stalled is None:
+                self._dates[sequence] = message.date
+            if queue.full():
+                start = clock()
+                await queue.put((sequence, message))
+                self.reader_wait += clock() - start
+            else:
+                await queue.put((sequence, message))
+            self._track_depth(queue, 'validate')
+            sequence += 1
+
+    async def _validate(self, inbox, outbox):
+        pipeline = self.pipeline
+        while (item := await inbox.get()) is not _DONE:
+            sequence, message = item
+            try:
+                keep = pipeline.run_stages(message, VALIDATION_STAGES)
+                if keep:
+                    pipeline.duplicates.add(message.sms_hash, message.amount, message.date)
+            except Exception:
+                self._fail(sequence, 'validate')
+                continue
+            if not keep:
+                self._finish(sequence)
+                continue
+            await outbox.put(item)
+            self._track_depth(outbox, 'categorize')
+
+    async def _categorize(self, inbox, outbox):
+        pipeline = self.pipeline
+        loop = asyncio.get_running_loop()
+        clock = time.perf_counter
+        while (item := await inbox.get()) is not _DONE:
+            sequence, message = item
+            try:
+                if self.executor is None:
+                    pipeline.run_stages(message, CATEGORIZATION_STAGES)
+                else:
+                    start = clock()
+                    await loop.run_in_executor(self.executor, pipeline.stage_categorize, message)
+                    pipeline.latency['categorize'].record(clock() - start)
+                    pipeline.run_stages(message, CATEGORIZATION_STAGES[1:])
+            except Exception:
+                self._fail(sequence, 'categorize', message)
+                continue
+            await outbox.put(item)
+            self._track_depth(outbox, 'save')
+
+    async def _save(self, inbox, outbox=None):
+        pipeline = self.pipeline
+        clock = time.perf_counter
+        while (item := await inbox.get()) is not _DONE:
+            sequence, message = item
+            start = clock()
+            try:
+                if self.store is not None:
+                    await self.store(message)
+            except Exception:
+                self._fail(sequence, 'save', message)
+                continue
+            pipeline.latency['save'].record(clock() - start)
+            if pipeline.sink is not None:
+                try:
+                    pipeline.sink(message)
+                except Exception:
+                    self._fail(sequence, 'sink', message)
+                    continue
+            pipeline.saved += 1
+            self._finish(sequence)
+
+    async def _flush_periodically(self, maybe_flush):
+        while True:
+            await asyncio.sleep(self.flush_check)
+            try:
+                maybe_flush()
+            except Exception:
+                self.errors['flush'] += 1
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _track_depth(self, queue, name):
+        depth = queue.qsize()
+        if depth > self.max_depth[name]:
+            self.max_depth[name] = depth
+
+    def _fail(self, sequence, stage, message=None):
+        self.errors[stage] += 1
+        if message is not None:
+            self.pipeline.duplicates.discard(message.sms_hash, message.amount, message.date)
+        if self._stalled is None or sequence < self._stalled:
+            # The watermark cannot pass this message, so stop tracking it and everything after
+            self._stalled = sequence
+            self._dates = {seq: date for seq, date in self._dates.items() if seq < sequence}
+            self._finished = {seq for seq in self._finished if seq < sequence}
+
+    def _finish(self, sequence):
+        if self._stalled is not None and sequence >= self._stalled:
+            return
+        self._finished.add(sequence)
+        if sequence != self._next:
+            return
+        finished, dates = self._finished, self._dates
+        watermark = self.watermark
+        while self._next in finished:
+            finished.remove(self._next)
+            date = dates.pop(self._next)
+            if watermark is None or date > watermark:
+                watermark = date
+            self._next += 1
+        self.watermark = watermark
+
+    # -- running -------------------------------------------------------------
+
+    async def _drive(self, messages, stages, tasks):
+        await self._read(messages, stages[0][1])
+        # Shut the stages down in order, each once its upstream has drained
+        for (_, inbox, _), workers in zip(stages, tasks):
+            for _ in workers:
+                await inbox.put(_DONE)
+            await asyncio.wait(workers)
+
+    async def run(self, messages):
+        """Ingest every message and return the report."""
+        queues = [asyncio.Queue(self.queue_size) for _ in QUEUES]
+        stages = ((self._validate, queues[0], queues[1]),
+                  (self._categorize, queues[1], queues[2]),
+                  (self._save, queues[2], None))
+        start = time.perf_counter()
+        tasks = [[asyncio.create_task(work(inbox, outbox)) for _ in range(self.workers[name])]
+                 for name, (work, inbox, outbox) in zip(QUEUES, stages)]
+        # Supervise the reader and every worker together, so the first to crash ends the run
+        # instead of leaving the rest blocked on a queue nobody drains
+        running = [asyncio.create_task(self._drive(messages, stages, tasks))]
+        running += [task for workers in tasks for task in workers]
+        # Runs until cancelled, so it is not supervised with the rest
+        maybe_flush = getattr(self.pipeline.sink, 'maybe_flush', None)
+        background = ([asyncio.create_task(self._flush_periodically(maybe_flush))]
+                      if maybe_flush is not None else [])
+        try:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_EXCEPTION)
+            for task in running:
+                if task in done and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in running + background:
+                task.cancel()
+            await asyncio.gather(*running, *background, return_exceptions=True)
+        self.elapsed = time.perf_counter() - start
+        return self.report()
+
+    def report(self):
+        """The pipeline report plus queue, worker and watermark figures, ready for JSON."""
+        report = self.pipeline.report()
+        report.update({
+            'skipped_by_watermark': self.skipped,
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None,
+            'errors': dict(self.errors),
+            'workers': dict(self.workers),
+            'queue_size': self.queue_size,
+            'max_queue_depth': {name: self.max_depth[name] for name in QUEUES},
+            'reader_wait_s': self.reader_wait,
+            'elapsed_s': self.elapsed,
+            'messages_per_sec': report['received'] / self.elapsed if self.elapsed else 0.0,
+        })
+        return report
+
+
+def ingest(messages, **options):
+    """Run an IngestionService over messages to completion and return the service."""
+    service = IngestionService(**options)
+    asyncio.run(service.run(messages))
+    return service
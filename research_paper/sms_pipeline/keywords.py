@@ -0,0 +1,111 @@
+"""
+Expense Keyword Stage
+The credit/income exclusion, promotional exclusion and expense keyword check from
+_processSmsMessage in lib/services/sms_listener.dart. All checks take the lowercased body, or
+the set of TRANSACTION_TERMS found in one, since each of them is a series of membership tests.
+"""
+
+CREDIT_PHRASES = (
+    'credited to your', 'amount credited',
+    'withdrawn to your', 'amount withdrawn to', 'withdrawal to your',
+    'cash withdrawn to', 'money withdrawn to', 'deposited to your',
+    'amount deposited', 'transfer to your account', 'received in your account',
+)
+
+PROMO_PHRASES = (
+    'get cashback', 'download the app', 'limited time offer', 'congratulations',
+    'you have won', 'click here', 'visit our website', 'terms and conditions',
+    'offer valid till', 'verification is pending', 'complete kyc', 'update your',
+    'activate your',
+)
+
+EXPENSE_PHRASES = (
+    'debited', 'purchase', 'spent', 'withdrawn', 'paid',
+    'has been debited from your', 'wallet balance debited', 'amount debited from wallet',
+    # Credit card transaction patterns
+    'card no.', 'credit card', 'debit card', 'avl limit', 'available limit',
+    'transaction on', 'charged to',
+    # Bank-specific patterns
+    'axis bank', 'hdfc bank', 'icici bank', 'sbi card', 'kotak bank', 'union bank',
+    'unionbank', 'ubi',
+    # Additional expense keywords
+    'withdraw', 'payment', 'transfer', 'pos', 'atm', 'online', 'mobile banking',
+    'net banking',
+    # Wallet-specific expense patterns
+    'paytm wallet', 'phonepe wallet', 'gpay wallet', 'amazon pay wallet',
+    'mobikwik wallet', 'freecharge wallet', 'ola money', 'jio money', 'airtel money',
+    'wallet payment', 'paid using', 'payment from wallet', 'wallet to bank',
+    'money debited', 'amount paid', 'transaction successful', 'payment successful',
+    # UPI and digital payment patterns
+    'upi transaction', 'upi payment', 'paid via upi', 'bhim upi',
+)
+
+# 'credited' is income when it comes with 'rs' and no 'debited', or with a CREDIT_CONTEXTS word
+CREDITED = 'credited'
+CREDITED_AMOUNT = 'rs'
+CREDITED_UNLESS = 'debited'
+CREDIT_CONTEXTS = ('cashback', 'refund', 'salary', 'interest')
+
+# A lead word with any of its context words is expense wording too
+EXPENSE_CONTEXTS = (
+    ('inr', ('limit', 'card', 'wallet')),
+    ('rs', ('debited', 'paid')),
+    ('transaction', ('successful', 'completed')),
+)
+
+# Every phrase is_credit_or_income() and mentions_expense() look for
+TRANSACTION_TERMS = (CREDIT_PHRASES + EXPENSE_PHRASES
+                     + (CREDITED, CREDITED_AMOUNT, CREDITED_UNLESS) + CREDIT_CONTEXTS
+                     + tuple(term for lead, contexts in EXPENSE_CONTEXTS
+                             for term in (lead,) + contexts))
+
+
+def is_credit_or_income(body):
+    """Income, refunds, deposits and transfers into the account are never expenses."""
+    for phrase in CREDIT_PHRASES:
+        if phrase in body:
+            return True
+    if CREDITED in body:
+        if CREDITED_AMOUNT in body and CREDITED_UNLESS not in body:
+            return True
+        for context in CREDIT_CONTEXTS:
+            if context in body:
+                return True
+    return False
+
+
+def is_promotional(body):
+    """Offers, KYC reminders and other service messages."""
+    for phrase in PROMO_PHRASES:
+        if phrase in body:
+            return True
+    if 'cashback' in body and 'cashback received' not in body:
+        return True
+    return 'offer' in body and 'transaction' not in body
+
+
+def mentions_expense(body):
+    """Debit, card, wallet and UPI wording that marks a potential expense."""
+    for phrase in EXPENSE_PHRASES:
+        if phrase in body:
+            return True
+    for lead, contexts in EXPENSE_CONTEXTS:
+        if lead in body:
+            for context in contexts:
+                if context in body:
+                    return True
+    return False
+
+
+def is_expense_message(body):
+    """The full keyword stage: not income, not promotional, and expense wording present."""
+    return not is_credit_or_income(body) and not is_promotional(body) and mentions_expense(body)
+
+
+def transaction_type(body):
+    """'credit' for income and transfers in, 'debit' for expense wording, otherwise None."""
+    if is_credit_or_income(body):
+        return 'credit'
+    if mentions_expense(body):
+        return 'debit'
+    return None
@@ -0,0 +1,403 @@
+"""
+Smart Learning Pattern Index
+Python port of the learned-pattern features and similarity score from
+lib/services/smart_categorizer.dart, plus PatternIndex: patterns stored as fixed-width records
+in blocks keyed by (amount range, time range, source), searched best block first so top-k
+matches over 100k+ patterns per user skip most of them. Results equal a full similarity() scan.
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+
+
+# Similarity thresholds of the smart categorizer
+HIGH_CONFIDENCE_THRESHOLD = 0.85
+MEDIUM_CONFIDENCE_THRESHOLD = 0.70
+LOW_CONFIDENCE_THRESHOLD = 0.55
+
+AMOUNT_RANGES = ('micro', 'tiny', 'small', 'medium', 'large', 'xlarge', 'xxlarge', 'huge',
+                 'massive')
+AMOUNT_RANGE_LIMITS = (10, 25, 50, 100, 200, 500, 1000, 2000)
+TIME_RANGES = ('morning', 'afternoon', 'evening', 'night')
+SMS_SOURCES = ('mobikwik', 'paytm', 'phonepe', 'gpay', 'bank')
+TRANSACTION_TYPES = ('wallet', 'upi', 'card', 'atm', 'bank')
+FINGERPRINT_KEYWORDS = ('bank', 'card', 'credited', 'debited', 'paid', 'transaction', 'upi',
+                        'wallet')
+
+# _calculateEnhancedSimilarityScore weights, in the order they are summed
+FEATURE_WEIGHTS = (
+    ('amountRange', 0.25),
+    ('timeRange', 0.20),
+    ('smsSource', 0.15),
+    ('transactionType', 0.15),
+    ('fingerprint', 0.10),
+    ('dayOfWeek', 0.05),
+    ('isWeekend', 0.05),
+    ('hasMerchantInfo', 0.05),
+)
+ADJACENT_AMOUNT_CREDIT = 0.7
+EXACT_AMOUNT_BONUS = 0.1
+
+_UPPERCASE_WORD = re.compile(r'\b[A-Z]{2,}\b')
+_DIGIT = re.compile(r'\d', re.ASCII)
+
+
+# ---------------------------------------------------------------------------
+# Features
+# ---------------------------------------------------------------------------
+
+def amount_range(amount):
+    """_getEnhancedAmountRange."""
+    for name, limit in zip(AMOUNT_RANGES, AMOUNT_RANGE_LIMITS):
+        if amount <= limit:
+            return name
+    return AMOUNT_RANGES[-1]
+
+
+def time_range(time):
+    """_getTimeRange."""
+    hour = time.hour
+    if 6 <= hour < 12:
+        return 'morning'
+    if 12 <= hour < 17:
+        return 'afternoon'
+    if 17 <= hour < 21:
+        return 'evening'
+    return 'night'
+
+
+def sms_source(sms_body):
+    body = sms_body.lower()
+    for source in ('mobikwik', 'paytm', 'phonepe'):
+        if source in body:
+            return source
+    if 'gpay' in body or 'google pay' in body:
+        return 'gpay'
+    return 'bank'
+
+
+def transaction_type(sms_body):
+    body = sms_body.lower()
+    for kind in ('wallet', 'upi', 'card', 'atm'):
+        if kind in body:
+            return kind
+    return 'bank'
+
+
+def has_useful_merchant_info(sms_body):
+    return ('"' in sms_body or 'paid to' in sms_body or 'payment to' in sms_body
+            or 'at ' in sms_body or 'from ' in sms_body
+            or _UPPERCASE_WORD.search(sms_body) is not None)
+
+
+def sms_fingerprint(sms_body):
+    body = sms_body.lower()
+    return '|'.join(keyword for keyword in FINGERPRINT_KEYWORDS if keyword in body)
+
+
+def extract_features(sms_body, amount, time):
+    """_extractEnhancedLearningFeatures: the feature map stored with every learned pattern."""
+    return {
+        'amountRange': amount_range(amount),
+        'exactAmount': amount,
+        'timeRange': time_range(time),
+        'hourOfDay': time.hour,
+        'dayOfWeek': time.isoweekday(),
+        'isWeekend': time.isoweekday() >= 6,
+        'smsSource': sms_source(sms_body),
+        'transactionType': transaction_type(sms_body),
+        'hasQuotes': '"' in sms_body,
+        'hasMerchantInfo': has_useful_merchant_info(sms_body),
+        'smsLength': len(sms_body),
+        'wordCount': len(sms_body.split(' ')),
+        'containsNumbers': _DIGIT.search(sms_body) is not None,
+        'fingerprint': sms_fingerprint(sms_body),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Similarity
+# ---------------------------------------------------------------------------
+
+def is_amount_similar(amount1, amount2):
+    """_isAmountSimilarEnhanced: absolute tolerance for small amounts, relative above."""
+    difference = abs(amount1 - amount2)
+    average = (amount1 + amount2) / 2
+    if average <= 50:
+        return difference <= 15
+    if average <= 200:
+        return difference <= 25
+    if average <= 1000:
+        return difference / average <= 0.20
+    return difference / average <= 0.15
+
+
+def are_adjacent_amount_ranges(range1, range2):
+    if range1 not in AMOUNT_RANGES or range2 not in AMOUNT_RANGES:
+        return False
+    return abs(AMOUNT_RANGES.index(range1) - AMOUNT_RANGES.index(range2)) == 1
+
+
+def similarity(features1, features2):
+    """_calculateEnhancedSimilarityScore: weighted share of matching features, 0 to 1."""
+    if not features2:
+        return 0.0
+    score = 0.0
+    total_weight = 0.0
+    for feature, weight in FEATURE_WEIGHTS:
+        if feature in features1 and feature in features2:
+            total_weight += weight
+            if features1[feature] == features2[feature]:
+                score += weight
+            elif feature == 'amountRange' and are_adjacent_amount_ranges(features1[feature],
+                                                                         features2[feature]):
+                score += weight * ADJACENT_AMOUNT_CREDIT
+    if 'exactAmount' in features1 and 'exactAmount' in features2:
+        if is_amount_similar(features1['exactAmount'], features2['exactAmount']):
+            score += EXACT_AMOUNT_BONUS
+            total_weight += EXACT_AMOUNT_BONUS
+    return score / total_weight if total_weight > 0 else 0.0
+
+
+def usage_weight(usage_count):
+    """_calculateUsageWeight."""
+    return (min(max(usage_count, 1), 100) / 100.0) * 0.8 + 0.2
+
+
+def recency_weight(last_used, now=None):
+    """_calculateRecencyWeight."""
+    if last_used is None:
+        return 0.1
+    days = ((now or datetime.now()) - last_used).days
+    if days <= 7:
+        return 1.0
+    if days <= 30:
+        return 0.7
+    if days <= 90:
+        return 0.4
+    return 0.1
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+# One learned pattern inside a block; the block key holds the other three features
+PATTERN_DTYPE = np.dtype([
+    ('id', '<u4'),
+    ('amount', '<f8'),
+    ('transaction_type', 'u1'),
+    ('fingerprint', 'u1'),
+    ('day_of_week', 'u1'),
+    ('is_weekend', '?'),
+    ('has_merchant_info', '?'),
+])
+
+
+def _ordered_sum(values):
+    # Left to right like similarity(); sum() compensates rounding on newer Pythons
+    total = 0.0
+    for value in values:
+        total += value
+    return total
+
+
+_WEIGHTS = dict(FEATURE_WEIGHTS)
+_TOTAL_WEIGHT = _ordered_sum(weight for _, weight in FEATURE_WEIGHTS)
+_TOTAL_WEIGHT_WITH_BONUS = _TOTAL_WEIGHT + EXACT_AMOUNT_BONUS
+# Largest score a pattern can gain from the features outside the block key
+_UNKEYED_WEIGHT = sum(weight for feature, weight in FEATURE_WEIGHTS
+                      if feature not in ('amountRange', 'timeRange', 'smsSource'))
+# Score bounds are compared with this much slack so float rounding never prunes a match
+_BOUND_SLACK = 1e-9
+
+
+def _fingerprint_code(fingerprint):
+    keywords = fingerprint.split('|') if fingerprint else ()
+    return sum(1 << FINGERPRINT_KEYWORDS.index(keyword) for keyword in keywords)
+
+
+def encode_features(features):
+    """(block key, record fields) of a feature map."""
+    key = (AMOUNT_RANGES.index(features['amountRange']), TIME_RANGES.index(features['timeRange']),
+           SMS_SOURCES.index(features['smsSource']))
+    record = (float(features['exactAmount']),
+              TRANSACTION_TYPES.index(features['transactionType']),
+              _fingerprint_code(features['fingerprint']), features['dayOfWeek'],
+              bool(features['isWeekend']), bool(features['hasMerchantInfo']))
+    return key, record
+
+
+class _Block:
+    """Growable array of PATTERN_DTYPE records sharing one block key."""
+
+    def __init__(self):
+        self.records = np.empty(16, dtype=PATTERN_DTYPE)
+        self.size = 0
+
+    def append(self, pattern_id, record):
+        if self.size == len(self.records):
+            grown = np.empty(2 * len(self.records), dtype=PATTERN_DTYPE)
+            grown[:self.size] = self.records
+            self.records = grown
+        self.records[self.size] = (pattern_id,) + record
+        self.size += 1
+
+    def view(self):
+        return self.records[:self.size]
+
+
+def _amounts_similar(amount, amounts):
+    """is_amount_similar() of one amount against an array, with the same float operations."""
+    difference = np.abs(amount - amounts)
+    average = (amount + amounts) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = difference / average
+    return np.where(average <= 50, difference <= 15,
+                    np.where(average <= 200, difference <= 25,
+                             np.where(average <= 1000, relative <= 0.20, relative <= 0.15)))
+
+
+class PatternIndex:
+    """
+    Learned patterns of one user, searchable by similarity, with no cap on their number.
+
+    Patterns are blocked by (amount range, time range, source). For a query the three keyed
+    features give every block an exact upper bound on its scores, so blocks are scored in
+    bound order, as whole arrays, until no remaining block can reach the k-th best score.
+    """
+
+    def __init__(self):
+        self.blocks = {}
+        self._block_keys = []
+        self._key_array = np.empty((0, 3), dtype=np.int16)
+        self.categories = []
+        self.usage_counts = []
+        self.last_used = []
+
+    def __len__(self):
+        return len(self.categories)
+
+    def add(self, features, category, usage_count=1, last_used=None):
+        """Store a pattern and return its id."""
+        key, record = encode_features(features)
+        pattern_id = len(self.categories)
+        self.blocks.setdefault(key, _Block()).append(pattern_id, record)
+        self.categories.append(category)
+        self.usage_counts.append(usage_count)
+        self.last_used.append(last_used)
+        return pattern_id
+
+    def learn(self, sms_body, amount, time, category):
+        """learnFromUserCorrection: store the features of a corrected SMS."""
+        return self.add(extract_features(sms_body, amount, time), category, last_used=time)
+
+    def _keyed_scores(self, key):
+        """Score from the three block-key features for every block, summed like similarity()."""
+        if len(self._block_keys) != len(self.blocks):
+            self._block_keys = list(self.blocks)
+            self._key_array = np.array(self._block_keys, dtype=np.int16).reshape(-1, 3)
+        keys = self._key_array
+        amount_distance = np.abs(keys[:, 0] - key[0])
+        score = np.where(amount_distance == 0, _WEIGHTS['amountRange'],
+                         np.where(amount_distance == 1,
+                                  _WEIGHTS['amountRange'] * ADJACENT_AMOUNT_CREDIT, 0.0))
+        score += np.where(keys[:, 1] == key[1], _WEIGHTS['timeRange'], 0.0)
+        score += np.where(keys[:, 2] == key[2], _WEIGHTS['smsSource'], 0.0)
+        return score
+
+    def _score_block(self, keyed, record, records):
+        """similarity() of the query against every record of one block."""
+        amount, transaction, fingerprint, day, weekend, merchant = record
+        score = np.full(len(records), keyed)
+        score += np.where(records['transaction_type'] == transaction,
+                          _WEIGHTS['transactionType'], 0.0)
+        score += np.where(records['fingerprint'] == fingerprint, _WEIGHTS['fingerprint'], 0.0)
+        score += np.where(records['day_of_week'] == day, _WEIGHTS['dayOfWeek'], 0.0)
+        score += np.where(records['is_weekend'] == weekend, _WEIGHTS['isWeekend'], 0.0)
+        score += np.where(records['has_merchant_info'] == merchant,
+                          _WEIGHTS['hasMerchantInfo'], 0.0)
+        similar = _amounts_similar(amount, records['amount'])
+        return np.where(similar, (score + EXACT_AMOUNT_BONUS) / _TOTAL_WEIGHT_WITH_BONUS,
+                        score / _TOTAL_WEIGHT)
+
+    def _bounds(self, key):
+        """Keyed score and upper bound on the similarity of every block."""
+        keyed = self._keyed_scores(key)
+        best = keyed + _UNKEYED_WEIGHT
+        return keyed, np.maximum(best / _TOTAL_WEIGHT,
+                                 (best + EXACT_AMOUNT_BONUS) / _TOTAL_WEIGHT_WITH_BONUS)
+
+    def top_k(self, features, k=5, min_similarity=0.0):
+        """
+        The k most similar patterns as (similarity, pattern id), best first.
+
+        Ties keep the earlier pattern first, and patterns below min_similarity are left out.
+        """
+        key, record = encode_features(features)
+        keyed, bounds = self._bounds(key)
+        order = np.argsort(-bounds, kind='stable')
+
+        best_scores = np.empty(0)
+        best_ids = np.empty(0, dtype=np.uint32)
+        floor = min_similarity
+        for block in order:
+            if bounds[block] < floor - _BOUND_SLACK:
+                break
+            records = self.blocks[self._block_keys[block]].view()
+            scores = self._score_block(keyed[block], record, records)
+            keep = scores >= floor
+            best_scores = np.concatenate((best_scores, scores[keep]))
+            best_ids = np.concatenate((best_ids, records['id'][keep]))
+            if len(best_scores) > k:
+                # Keep the k best so far plus anything tied with the k-th
+                floor = max(floor, np.partition(best_scores, len(best_scores) - k)[-k])
+                keep = best_scores >= floor
+                best_scores, best_ids = best_scores[keep], best_ids[keep]
+
+        order = np.lexsort((best_ids, -best_scores))[:k]
+        return [(float(best_scores[index]), int(best_ids[index])) for index in order]
+
+    def best_match(self, features, threshold=HIGH_CONFIDENCE_THRESHOLD):
+        """(category, similarity, pattern id) of the most similar pattern at or above threshold."""
+        matches = self.top_k(features, k=1, min_similarity=threshold)
+        if not matches:
+            return None
+        score, pattern_id = matches[0]
+        return self.categories[pattern_id], score, pattern_id
+
+    def first_match(self, features, threshold=HIGH_CONFIDENCE_THRESHOLD):
+        """
+        (category, similarity, pattern id) of the earliest added pattern at or above threshold.
+        Only blocks whose bound reaches the threshold are scored, and a block is skipped once
+        its first id is past the earliest match found.
+        """
+        key, record = encode_features(features)
+        keyed, bounds = self._bounds(key)
+        first = None
+        for block in np.flatnonzero(bounds >= threshold - _BOUND_SLACK):
+            records = self.blocks[self._block_keys[block]].view()
+            # Ids grow in the order patterns were added, within a block too
+            if first is not None and records['id'][0] > first[1]:
+                continue
+            scores = self._score_block(keyed[block], record, records)
+            hits = np.flatnonzero(scores >= threshold)
+            if len(hits) and (first is None or records['id'][hits[0]] < first[1]):
+                first = float(scores[hits[0]]), int(records['id'][hits[0]])
+        if first is None:
+            return None
+        score, pattern_id = first
+        return self.categories[pattern_id], score, pattern_id
+
+    def match(self, sms_body, amount, time, threshold=HIGH_CONFIDENCE_THRESHOLD, first=False):
+        """
+        _checkCachedPatterns over every learned pattern instead of the top 50. The app returns
+        the first cached pattern at or above the threshold; first=True does the same in the
+        order patterns were added, while the default returns the most similar pattern.
+        """
+        features = extract_features(sms_body, amount, time)
+        if first:
+            return self.first_match(features, threshold)
+        return self.best_match(features, threshold)
@@ -0,0 +1,172 @@
+"""
+Compiled Multi-Pattern Matcher
+Builds the merchant database, merchant variations and Layer 2 keyword tables into one compiled
+index, so categorizing a message is a single scan of its body instead of one substring search
+per merchant and keyword. Results are identical to the reference functions in categorizer.py.
+"""
+
+import re
+
+from .categorizer import (CATEGORY_SCORING, INDIAN_MERCHANTS, KNOWN_MERCHANTS, LAYER_KEYWORDS,
+                          LAYER_MERCHANT_API, LAYER_MERCHANT_DB, MERCHANT_VARIATIONS, _clamp,
+                          best_keyword_category, categorize_extracted_merchant,
+                          extract_wallet_merchant, resolve_merchant_names)
+
+_END = ''  # Trie key marking the end of a term
+
+
+def _trie_pattern(node):
+    """Regex for a trie node; alternatives are greedy so the longest term wins."""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if _END in node:
+        # A shorter term ends here, so the continuation is optional
+        return '(?:' + body + ')?'
+    return body
+
+
+class TermMatcher:
+    """
+    Finds which of a fixed set of terms occur in a text, in one pass.
+
+    The terms are factored into a trie and compiled into a single regex that is tried at every
+    position of the text by the regex engine. Each position yields the longest term starting
+    there; every shorter term that is a prefix of it is recovered from a precomputed table, so
+    find_all() returns exactly the terms for which `term in text` is true.
+    """
+
+    def __init__(self, terms):
+        self.terms = frozenset(term for term in terms if term)
+        trie = {}
+        for term in self.terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[_END] = True
+        self.pattern = re.compile('(?=(' + _trie_pattern(trie) + '))') if self.terms else None
+
+        # term -> every term that is a prefix of it (including itself)
+        self._prefixes = {}
+        for term in self.terms:
+            self._prefixes[term] = tuple(term[:end] for end in range(1, len(term) + 1)
+                                         if term[:end] in self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def find_all(self, text):
+        """Set of terms that occur anywhere in text."""
+        if self.pattern is None:
+            return set()
+        prefixes = self._prefixes
+        found = set()
+        for longest in set(self.pattern.findall(text)):
+            found.update(prefixes[longest])
+        return found
+
+
+class CategoryIndex:
+    """
+    The three-layer categorizer over one TermMatcher.
+
+    merchants and variations default to the Layer 0 tables, and scoring to the Layer 2 table;
+    Layer 1 is shared with the reference implementation.
+    """
+
+    def __init__(self, merchants=INDIAN_MERCHANTS, variations=MERCHANT_VARIATIONS,
+                 scoring=CATEGORY_SCORING, known_merchants=KNOWN_MERCHANTS):
+        self.scoring = scoring
+
+        # term -> index of the first Layer 0 category that lists it (directly or as a variation)
+        self.merchant_rank = {}
+        self.merchant_categories = [category for category, _ in merchants]
+        for rank, (_, names) in enumerate(merchants):
+            for name in names:
+                for term in (name,) + tuple(variations.get(name, ())):
+                    self.merchant_rank.setdefault(term, rank)
+
+        # term -> [(scoring row, position in the row's weights, weight)]
+        self.keyword_weights = {}
+        for row, (_, weights, _, _) in enumerate(scoring):
+            for position, (phrase, weight) in enumerate(weights):
+                self.keyword_weights.setdefault(phrase, []).append((row, position, weight))
+
+        # term -> position in the Layer 1 candidate order
+        self.known_rank = {}
+        for rank, name in enumerate(known_merchants):
+            self.known_rank.setdefault(name, rank)
+
+        self.matcher = TermMatcher(list(self.merchant_rank) + list(self.keyword_weights)
+                                   + list(self.known_rank))
+
+    def merchant_db_category(self, wallet_merchant, found):
+        """Layer 0 from the extracted wallet merchant and the matched terms."""
+        if wallet_merchant is not None:
+            category = categorize_extracted_merchant(wallet_merchant)
+            if category is not None:
+                return category
+        ranks = [self.merchant_rank[term] for term in found if term in self.merchant_rank]
+        return self.merchant_categories[min(ranks)] if ranks else None
+
+    def merchant_names(self, wallet_merchant, found):
+        """Layer 1 candidate names, in the order extract_merchant_names() finds them."""
+        merchants = []
+        if wallet_merchant is not None:
+            merchants.append(wallet_merchant)
+        merchants.extend(sorted((term for term in found if term in self.known_rank),
+                                key=self.known_rank.__getitem__))
+        return list(dict.fromkeys(merchants))
+
+    def keyword_scores(self, body, amount, found):
+        """Layer 2 scores over the matched terms, summed in table order like the reference."""
+        matched = [[] for _ in self.scoring]
+        for term in found:
+            for row, position, weight in self.keyword_weights.get(term, ()):
+                matched[row].append((position, weight))
+        scores = []
+        for (category, _, base, adjust), hits in zip(self.scoring, matched):
+            score = base
+            for _, weight in sorted(hits):
+                score += weight
+            scores.append((category, _clamp(adjust(score, body, amount))))
+        return scores
+
+    def categorize_with_layer(self, sms_body, amount, merchant_lookup=None):
+        """Same result as categorizer.categorize_with_layer(), from one scan of the body."""
+        body = sms_body.lower()
+        found = self.matcher.find_all(body)
+        wallet_merchant = extract_wallet_merchant(body)
+
+        category = self.merchant_db_category(wallet_merchant, found)
+        if category is not None:
+            return category, LAYER_MERCHANT_DB
+
+        if merchant_lookup is not None:
+            category = resolve_merchant_names(self.merchant_names(wallet_merchant, found),
+                                              merchant_lookup)
+            if category is not None:
+                return category, LAYER_MERCHANT_API
+
+        return best_keyword_category(self.keyword_scores(body, amount, found)), LAYER_KEYWORDS
+
+    def categorize(self, sms_body, amount, merchant_lookup=None):
+        return self.categorize_with_layer(sms_body, amount, merchant_lookup)[0]
+
+
+_default_index = None
+
+
+def default_category_index():
+    """The CategoryIndex over the built-in tables, built on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = CategoryIndex()
+    return _default_index
+
+
+def categorize_with_layer_indexed(sms_body, amount, merchant_lookup=None):
+    """Drop-in replacement for categorize_with_layer() backed by the default index."""
+    return default_category_index().categorize_with_layer(sms_body, amount, merchant_lookup)
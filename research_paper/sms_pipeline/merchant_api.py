@@ -0,0 +1,350 @@
+"""
+Merchant API Resolution
+Cached replacement for ExpenseCategorizer._searchFoursquareMerchant from
+lib/services/expense_categorizer.dart, which sends one Places API request for every merchant
+name Layer 0 cannot place. Names are normalized, results (including "no match") are memoized on
+disk with an expiry, concurrent lookups of one name share a single request, and requests go
+through a token-bucket rate limiter. A local stub of the Places search endpoint stands in for
+the real API in benchmarks.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, quote, urlsplit
+from urllib.request import Request, urlopen
+
+from .categorizer import map_place_category
+from .models import Category
+from .stats import LatencyHistogram
+
+FOURSQUARE_URL = 'https://api.foursquare.com'
+SEARCH_PATH = '/v3/places/search'
+REQUEST_TIMEOUT_SECONDS = 10.0
+
+# A found category is trusted for a month; "no match" is retried after a day
+POSITIVE_TTL_SECONDS = 30 * 24 * 3600
+NEGATIVE_TTL_SECONDS = 24 * 3600
+
+# Default request budget: requests per second, and how many may go out back to back
+RATE_PER_SECOND = 10.0
+RATE_BURST = 10
+
+# Trailing words that name the company form rather than the merchant
+CORPORATE_SUFFIXES = frozenset(('pvt', 'private', 'ltd', 'limited', 'llp', 'inc', 'corp', 'co'))
+
+_WEB_AFFIXES = re.compile(r'^www\.|\.(?:com|in|co\.in)$')
+_CATEGORIES = {category.value: category for category in Category}
+
+
+def normalize_merchant_name(name):
+    """
+    Lookup key for a merchant name: case, Latin accents, punctuation, spacing, web
+    prefixes/suffixes, company form suffixes and trailing terminal or store numbers removed.
+    "" when nothing is left.
+    """
+    text = ' '.join(_WEB_AFFIXES.sub('', word)
+                    for word in unicodedata.normalize('NFKC', name).lower().split())
+    chars = []
+    for char in text:
+        if not char.isascii():
+            base = unicodedata.normalize('NFD', char)[0]
+            if base.isascii():
+                char = base
+        # Punctuation, symbols, separators and control characters split words
+        chars.append(' ' if unicodedata.category(char)[0] in 'PSZC' else char)
+    words = ''.join(chars).split()
+    while words and (words[-1] in CORPORATE_SUFFIXES or words[-1].isdigit()):
+        words.pop()
+    return ' '.join(words)
+
+
+class MerchantMemo:
+    """
+    Memo of lookup results by normalized name, in memory and optionally in a SQLite file.
+
+    A stored category of None is a negative result: the API was asked and placed nothing.
+    Entries expire positive_ttl or negative_ttl seconds (by clock) after they were stored.
+    put() is remember() followed by persist(), the SQLite write, which callers holding a lock
+    can run separately once they have released it.
+    """
+
+    def __init__(self, path=None, positive_ttl=POSITIVE_TTL_SECONDS,
+                 negative_ttl=NEGATIVE_TTL_SECONDS, clock=time.time):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        # name -> (category or None, expires at)
+        self.entries = {}
+        self.connection = None
+        # Serializes writes to the shared connection
+        self.write_lock = threading.Lock()
+        if path is not None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS merchant_memo '
+                                    '(name TEXT PRIMARY KEY, category TEXT, expires_at REAL)')
+            now = clock()
+            for name, category, expires_at in self.connection.execute(
+                    'SELECT name, category, expires_at FROM merchant_memo WHERE expires_at > ?',
+                    (now,)):
+                self.entries[name] = (_CATEGORIES.get(category), expires_at)
+
+    def get(self, name):
+        """(True, category or None) for a live entry, (False, None) when the API must be asked."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return False, None
+        if entry[1] <= self.clock():
+            del self.entries[name]
+            return False, None
+        return True, entry[0]
+
+    def put(self, name, category):
+        self.persist(name, category, self.remember(name, category))
+
+    def remember(self, name, category):
+        """Store an entry in memory only; returns its expiry time for persist()."""
+        ttl = self.positive_ttl if category is not None else self.negative_ttl
+        expires_at = self.clock() + ttl
+        self.entries[name] = (category, expires_at)
+        return expires_at
+
+    def persist(self, name, category, expires_at):
+        """Write an entry to the SQLite file, if there is one."""
+        if self.connection is None:
+            return
+        with self.write_lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO merchant_memo (name, category, expires_at) '
+                'VALUES (?, ?, ?)',
+                (name, category.value if category is not None else None, expires_at))
+            self.connection.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        with self.write_lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class RateLimiter:
+    """Thread-safe token bucket: acquire() blocks until a request may go out."""
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=RATE_BURST, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        """Take one token, sleeping first if the bucket is empty; returns the wait in seconds."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Going negative reserves a future token, so waiters are served in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class PlacesClient:
+    """
+    The _searchFoursquareMerchant request: the first search result's first category, mapped
+    with map_place_category(). Rate limiting (429) and server errors raise, so they are never
+    memoized as "no match"; other non-200 answers are a miss, as in the app.
+    """
+
+    def __init__(self, api_key='', base_url=FOURSQUARE_URL, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, merchant_name):
+        request = Request(f"{self.base_url}{SEARCH_PATH}?query={quote(merchant_name)}&limit=1",
+                          headers={'Authorization': self.api_key, 'Accept': 'application/json'})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except HTTPError as error:
+            if error.code == 429 or error.code >= 500:
+                raise
+            return None
+        results = data.get('results') or []
+        if not results:
+            return None
+        categories = results[0].get('categories') or []
+        if not categories:
+            return None
+        return map_place_category(str(categories[0].get('name') or ''))
+
+
+class MerchantResolver:
+    """
+    Layer 1 merchant lookup with the merchant_lookup(name) -> Category or None signature.
+
+    fetch(normalized_name) asks the API and may raise; errors propagate (so Layer 1 falls back
+    to keyword scoring, as before) and are not memoized. Concurrent calls for a name already
+    being fetched wait for that request instead of sending their own. Safe to call from
+    executor threads; a fetched result is written to the memo file outside the lock that
+    lookups take.
+    """
+
+    def __init__(self, fetch, memo=None, rate_limiter=None):
+        self.fetch = fetch
+        self.memo = memo if memo is not None else MerchantMemo()
+        self.rate_limiter = rate_limiter
+        self.lock = threading.Lock()
+        # normalized name -> Future of the request in flight
+        self.in_flight = {}
+        self.lookups = 0
+        self.memo_hits = 0
+        self.negative_hits = 0
+        self.coalesced = 0
+        self.requests = 0
+        self.errors = 0
+        self.request_latency = LatencyHistogram()
+
+    def __call__(self, merchant_name):
+        name = normalize_merchant_name(merchant_name)
+        with self.lock:
+            self.lookups += 1
+            if not name:
+                return None
+            found, category = self.memo.get(name)
+            if found:
+                self.memo_hits += 1
+                if category is None:
+                    self.negative_hits += 1
+                return category
+            future = self.in_flight.get(name)
+            owner = future is None
+            if owner:
+                future = self.in_flight[name] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            category = self.fetch(name)
+            elapsed = time.perf_counter() - start
+        except BaseException as error:
+            with self.lock:
+                self.requests += 1
+                self.errors += 1
+                del self.in_flight[name]
+            future.set_exception(error)
+            raise
+        with self.lock:
+            self.requests += 1
+            self.request_latency.record(elapsed)
+            expires_at = self.memo.remember(name, category)
+            del self.in_flight[name]
+        future.set_result(category)
+        self.memo.persist(name, category, expires_at)
+        return category
+
+    @property
+    def hit_rate(self):
+        return self.memo_hits / self.lookups if self.lookups else 0.0
+
+    def stats(self):
+        """Lookup counters, ready for JSON."""
+        return {
+            'lookups': self.lookups,
+            'memo_hits': self.memo_hits,
+            'negative_hits': self.negative_hits,
+            'coalesced': self.coalesced,
+            'requests': self.requests,
+            'errors': self.errors,
+            'hit_rate': self.hit_rate,
+            'memo_size': len(self.memo),
+            'rate_limit_wait_s': self.rate_limiter.waited if self.rate_limiter else 0.0,
+            'request_latency': self.request_latency.summary(),
+        }
+
+
+class _PlacesHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path != SEARCH_PATH:
+            self.send_error(404)
+            return
+        query = parse_qs(url.query).get('query', [''])[0]
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        category_name = server.places.get(normalize_merchant_name(query))
+        results = []
+        if category_name is not None:
+            categories = [{'name': category_name}] if category_name else []
+            results.append({'name': query, 'categories': categories})
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubPlacesServer:
+    """
+    Local stand-in for the Places search endpoint on 127.0.0.1.
+
+    places maps normalized merchant names to a place category name ("" for a place without
+    categories); other queries return no results. Every request sleeps latency seconds first.
+    Use as a context manager; url is the base URL to give PlacesClient.
+    """
+
+    def __init__(self, places, latency=0.0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _PlacesHandler)
+        self.server.daemon_threads = True
+        self.server.places = places
+        self.server.latency = latency
+        self.server.requests = 0
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -0,0 +1,34 @@
+"""
+SMS Pipeline Records
+The message record that flows through the pipeline stages and the expense categories.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+
+
+class Category(Enum):
+    """Expense categories, in the same order as the app's Category enum."""
+    Food = 'Food'
+    Leisure = 'Leisure'
+    Travel = 'Travel'
+    Miscellaneous = 'Miscellaneous'
+    Work = 'Work'
+
+
+@dataclass(slots=True)
+class SmsMessage:
+    """
+    One inbox SMS. The stages fill in the derived fields as the message moves through the
+    pipeline; a message that survives every stage is an expense.
+    """
+    sender: str
+    body: str
+    date: object  # datetime
+    body_lower: str = ''
+    amount: float = 0.0
+    sms_hash: str = ''
+    category: Category = None
+    layer: str = ''
+    payment_method: str = ''
+    title: str = ''
@@ -0,0 +1,234 @@
+"""
+Learned Pattern Cache
+Bounded replacement for SmartCategorizer's _userPatternCache and _cacheTimestamps from
+lib/services/smart_categorizer.dart: per-user pattern limits, LRU eviction across users, a TTL,
+a memory budget shared by all users, and hit/miss/eviction/load-latency counters.
+"""
+
+import sys
+import time
+from collections import OrderedDict
+
+from .stats import LatencyHistogram
+
+# Same limits as the app: 50 patterns per user, reloaded after 30 minutes
+MAX_PATTERNS_PER_USER = 50
+CACHE_TTL_SECONDS = 30 * 60
+# Default memory budget across all users
+MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Per-user bookkeeping (entry object, OrderedDict and its links), counted against the budget
+ENTRY_OVERHEAD_BYTES = 400
+
+
+def approximate_size(value):
+    """Rough deep size in bytes of a pattern built from dicts, lists, strings and numbers."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += approximate_size(key) + approximate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += approximate_size(item)
+    return size
+
+
+class _Entry:
+    __slots__ = ('patterns', 'loaded_at', 'size')
+
+    def __init__(self, loaded_at):
+        # key -> (pattern, size), most recently used first
+        self.patterns = OrderedDict()
+        self.loaded_at = loaded_at
+        self.size = ENTRY_OVERHEAD_BYTES
+
+
+class PatternCache:
+    """
+    Per-user learned pattern cache.
+
+    loader(user_id) returns the user's patterns as (key, pattern) pairs, best first, like the
+    usageCount-ordered Firestore query in _loadUserPatternsToCache; only the first
+    max_patterns_per_user are kept. Users are evicted least recently used first when the
+    estimated size of all cached patterns passes memory_budget, or when max_users is set and
+    exceeded. clock returns seconds and can be replaced to replay recorded traces; load latency
+    is always measured with perf_counter. When trace is a list, every call is appended to it as
+    an (op, time, user_id, key) tuple.
+    """
+
+    def __init__(self, loader, max_patterns_per_user=MAX_PATTERNS_PER_USER,
+                 ttl=CACHE_TTL_SECONDS, memory_budget=MEMORY_BUDGET_BYTES, max_users=None,
+                 size_of=approximate_size, clock=time.monotonic, trace=None):
+        self.loader = loader
+        self.max_patterns_per_user = max_patterns_per_user
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.max_users = max_users
+        self.size_of = size_of
+        self.clock = clock
+        self.trace = trace
+        # user_id -> _Entry, least recently used first
+        self.users = OrderedDict()
+        self.size = 0
+        self.peak_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.pattern_evictions = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.load_latency = LatencyHistogram()
+
+    def get(self, user_id):
+        """The user's patterns, most recently used first, loaded when missing or stale."""
+        now = self.clock()
+        if self.trace is not None:
+            self.trace.append(('get', now, user_id, None))
+        entry = self.users.get(user_id)
+        if entry is not None:
+            if now - entry.loaded_at <= self.ttl:
+                self.hits += 1
+                self.users.move_to_end(user_id)
+                return [pattern for pattern, _ in entry.patterns.values()]
+            self.expirations += 1
+            self._drop(user_id)
+        self.misses += 1
+        entry = self._load(user_id, now)
+        return [pattern for pattern, _ in entry.patterns.values()]
+
+    def put(self, user_id, key, pattern):
+        """
+        Cache a newly learned or updated pattern at the front, as _cachePattern does.
+
+        Users that are not cached are left alone: their next get loads the saved pattern from
+        the backend along with the rest, instead of caching a list holding only this one.
+        """
+        if self.trace is not None:
+            self.trace.append(('put', self.clock(), user_id, key))
+        entry = self.users.get(user_id)
+        if entry is None:
+            return
+        self._remove_pattern(entry, key)
+        self._insert(entry, key, pattern)
+        self.users.move_to_end(user_id)
+        self._enforce_budget(user_id)
+
+    def touch(self, user_id, key):
+        """Mark a cached pattern as just used, so it is the last one a newer pattern pushes out."""
+        if self.trace is not None:
+            self.trace.append(('touch', self.clock(), user_id, key))
+        entry = self.users.get(user_id)
+        if entry is not None and key in entry.patterns:
+            entry.patterns.move_to_end(key, last=False)
+
+    def invalidate(self, user_id=None):
+        """Drop one user's patterns, or everyone's, like clearUserCache."""
+        if self.trace is not None:
+            self.trace.append(('invalidate', self.clock(), user_id, None))
+        if user_id is None:
+            self.users.clear()
+            self.size = 0
+        elif user_id in self.users:
+            self._drop(user_id)
+
+    def expire(self):
+        """Drop every entry past its TTL; returns how many were dropped."""
+        now = self.clock()
+        stale = [user_id for user_id, entry in self.users.items()
+                 if now - entry.loaded_at > self.ttl]
+        for user_id in stale:
+            self._drop(user_id)
+        self.expirations += len(stale)
+        return len(stale)
+
+    def _load(self, user_id, now):
+        start = time.perf_counter()
+        try:
+            patterns = self.loader(user_id)
+        except Exception:
+            # Like the app, cache an empty list on failure so a broken backend is not
+            # queried again for every message until the entry expires
+            patterns = ()
+            self.load_errors += 1
+        self.load_latency.record(time.perf_counter() - start)
+        self.loads += 1
+        entry = _Entry(now)
+        for key, pattern in patterns:
+            if len(entry.patterns) >= self.max_patterns_per_user:
+                break
+            if key not in entry.patterns:
+                size = self.size_of(pattern)
+                entry.patterns[key] = (pattern, size)
+                entry.size += size
+        self.users[user_id] = entry
+        self.size += entry.size
+        self._enforce_budget(user_id)
+        return entry
+
+    def _insert(self, entry, key, pattern):
+        size = self.size_of(pattern)
+        entry.patterns[key] = (pattern, size)
+        entry.patterns.move_to_end(key, last=False)
+        entry.size += size
+        self.size += size
+        while len(entry.patterns) > self.max_patterns_per_user:
+            _, (_, dropped) = entry.patterns.popitem()
+            entry.size -= dropped
+            self.size -= dropped
+            self.pattern_evictions += 1
+
+    def _remove_pattern(self, entry, key):
+        item = entry.patterns.pop(key, None)
+        if item is not None:
+            entry.size -= item[1]
+            self.size -= item[1]
+
+    def _drop(self, user_id):
+        self.size -= self.users.pop(user_id).size
+
+    def _enforce_budget(self, keep):
+        # The user just served is never evicted, even if it alone is over the budget
+        users = self.users
+        while len(users) > 1 and (self.size > self.memory_budget
+                                  or (self.max_users is not None and len(users) > self.max_users)):
+            user_id = next(iter(users))
+            if user_id == keep:
+                users.move_to_end(user_id)
+                continue
+            self._drop(user_id)
+            self.evictions += 1
+        if self.size > self.peak_size:
+            self.peak_size = self.size
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Counters and sizes, ready for JSON; the measured counterpart of getCacheStats."""
+        return {
+            'total_users': len(self.users),
+            'total_cached_patterns': sum(len(entry.patterns) for entry in self.users.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'pattern_evictions': self.pattern_evictions,
+            'loads': self.loads,
+            'load_errors': self.load_errors,
+            'load_latency': self.load_latency.summary(),
+            'size_bytes': self.size,
+            'peak_size_bytes': self.peak_size,
+            'memory_budget_bytes': self.memory_budget,
+            'max_patterns_per_user': self.max_patterns_per_user,
+            'ttl_seconds': self.ttl,
+        }
+
+    def __len__(self):
+        return len(self.users)
+
+    def __contains__(self, user_id):
+        return user_id in self.users
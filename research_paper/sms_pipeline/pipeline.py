@@ -0,0 +1,144 @@
+"""
+Streaming SMS Pipeline
+Chains the stages of _processSmsMessage / _processExpenseTransaction as generators over a stream
+of SmsMessage records. Each message runs through every stage before the next one is pulled, so
+memory stays flat for any corpus size, and every stage call is timed into a latency histogram.
+"""
+
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from .amount import extract_amount
+from .dedup import DuplicateIndex, sms_hash
+from .keywords import is_expense_message
+from .matcher import categorize_with_layer_indexed
+from .sender_index import is_legitimate_financial_sender_indexed
+from .stats import LatencyHistogram
+from .title import detect_payment_method, expense_title
+
+# Messages older than this are never processed
+MAX_AGE = timedelta(days=7)
+
+# Stage names, in pipeline order (they match the steps of the pipeline diagram)
+STAGES = ('received', 'sender', 'keywords', 'amount', 'duplicate', 'categorize', 'title', 'save')
+
+
+class SmsPipeline:
+    """
+    The SMS-to-expense pipeline with in-memory duplicate state.
+
+    now is the sync time used for the seven-day age check (defaults to the wall clock, and a
+    max_age of None processes the whole history), merchant_lookup resolves merchant names for
+    categorization Layer 1, and sink, when given, is called with every saved expense.
+    categorizer has the signature of categorize_with_layer() and defaults to the compiled
+    multi-pattern index, sender_validator has the signature of is_legitimate_financial_sender()
+    and defaults to the compiled sender rules, and processed holds the SMS hashes saved by
+    earlier syncs.
+    """
+
+    def __init__(self, now=None, merchant_lookup=None, sink=None, max_age=MAX_AGE,
+                 categorizer=categorize_with_layer_indexed, processed=None,
+                 sender_validator=is_legitimate_financial_sender_indexed):
+        self.now = now if now is not None else datetime.now()
+        self.merchant_lookup = merchant_lookup
+        self.categorizer = categorizer
+        self.sender_validator = sender_validator
+        self.sink = sink
+        self.max_age = max_age
+        self.duplicates = DuplicateIndex(backend=processed)
+        self.latency = {name: LatencyHistogram() for name in STAGES}
+        self.dropped = Counter()
+        self.received = 0
+        self.saved = 0
+
+    # -- stages: each returns False to drop the message ---------------------
+
+    def stage_received(self, message):
+        message.body_lower = message.body.lower()
+        return self.max_age is None or message.date >= self.now - self.max_age
+
+    def stage_sender(self, message):
+        return self.sender_validator(message.sender, message.body_lower)
+
+    def stage_keywords(self, message):
+        return is_expense_message(message.body_lower)
+
+    def stage_amount(self, message):
+        amount = extract_amount(message.body_lower)
+        if amount is None:
+            return False
+        message.amount = amount
+        return True
+
+    def stage_duplicate(self, message):
+        message.sms_hash = sms_hash(message.sender, message.amount, message.date)
+        return not self.duplicates.is_duplicate(message.sms_hash, message.amount, message.date)
+
+    def stage_categorize(self, message):
+        message.category, message.layer = self.categorizer(
+            message.body_lower, message.amount, self.merchant_lookup)
+        return True
+
+    def stage_title(self, message):
+        message.payment_method = detect_payment_method(message.body_lower)
+        message.title = expense_title(message.category, message.payment_method, message.date)
+        return True
+
+    def stage_save(self, message):
+        self.duplicates.add(message.sms_hash, message.amount, message.date)
+        if self.sink is not None:
+            self.sink(message)
+        self.saved += 1
+        return True
+
+    def run_stages(self, message, names):
+        """Run the named stages on one message, timed; False as soon as one drops it."""
+        clock = time.perf_counter
+        for name in names:
+            start = clock()
+            keep = getattr(self, f"stage_{name}")(message)
+            self.latency[name].record(clock() - start)
+            if not keep:
+                self.dropped[name] += 1
+                return False
+        return True
+
+    # -- streaming -----------------------------------------------------------
+
+    def _count_received(self, messages):
+        for message in messages:
+            self.received += 1
+            yield message
+
+    def _timed_stage(self, name, stage, messages):
+        histogram = self.latency[name]
+        clock = time.perf_counter
+        for message in messages:
+            start = clock()
+            keep = stage(message)
+            histogram.record(clock() - start)
+            if keep:
+                yield message
+            else:
+                self.dropped[name] += 1
+
+    def run(self, messages):
+        """Yield every message that becomes an expense, in input order."""
+        stream = self._count_received(messages)
+        for name in STAGES:
+            stream = self._timed_stage(name, getattr(self, f"stage_{name}"), stream)
+        return stream
+
+    def process(self, messages):
+        """Run the whole stream and return the saved expenses as a list."""
+        return list(self.run(messages))
+
+    def report(self):
+        """Per-stage latency summaries plus message counts, ready for JSON."""
+        return {
+            'received': self.received,
+            'saved': self.saved,
+            'dropped': {name: self.dropped[name] for name in STAGES if self.dropped[name]},
+            'stages': {name: self.latency[name].summary() for name in STAGES},
+        }
@@ -0,0 +1,412 @@
+"""
+Incremental Re-categorization
+Re-categorizes saved expenses after the Layer 0 merchant tables or the Layer 2 keyword weights
+change, without reprocessing every message. Each expense keeps the decision that categorized it:
+the rule that decided (a wallet merchant name, a merchant database term, the merchant API or
+keyword scoring) and every table term its body matched, and expenses are indexed by those terms.
+Diffing two RuleSets names the terms whose meaning changed; only the expenses that matched one of
+them, or whose body contains a newly added term, and whose deciding rule depends on what changed
+are categorized again. The result is a delta of the expenses whose decision changed.
+
+MERCHANT_NAME_KEYWORDS and the wallet merchant patterns are not part of a RuleSet: decisions
+made from them depend on no table a RuleSet holds and are never re-evaluated.
+"""
+
+import hashlib
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+
+from .categorizer import (CATEGORY_SCORING, INDIAN_MERCHANTS, KNOWN_MERCHANTS, LAYER_KEYWORDS,
+                          LAYER_MERCHANT_API, LAYER_MERCHANT_DB, MERCHANT_VARIATIONS,
+                          best_keyword_category, categorize_extracted_merchant,
+                          extract_wallet_merchant, resolve_merchant_names)
+from .matcher import CategoryIndex
+from .models import Category
+from .storage import EXPENSES, MAX_BATCH_SIZE, WriteBuffer
+
+# What decided a category
+RULE_WALLET = 'wallet'  # Keyword in the extracted wallet merchant name (Layer 0)
+RULE_MERCHANT = 'merchant'  # Merchant database term (Layer 0)
+RULE_API = 'api'  # Merchant API lookup (Layer 1)
+RULE_KEYWORDS = 'keywords'  # Keyword scoring (Layer 2)
+
+# What a table term means to the categorizer
+MERCHANT = 'merchant'  # Its Layer 0 rank and category
+KEYWORD = 'keyword'  # Its Layer 2 weights
+KNOWN = 'known'  # Its place in the Layer 1 candidate order
+ASPECTS = (MERCHANT, KEYWORD, KNOWN)
+
+# Rule -> the term aspects a decision made by that rule depends on
+DEPENDENCIES = {
+    RULE_WALLET: frozenset(),
+    RULE_MERCHANT: frozenset((MERCHANT,)),
+    RULE_API: frozenset((MERCHANT, KNOWN)),
+    RULE_KEYWORDS: frozenset(ASPECTS),
+}
+
+# Separates bodies in the joined text searched for newly added terms; no term contains it
+_BODY_SEPARATOR = '\0'
+
+
+@dataclass(slots=True)
+class Decision:
+    """How one expense was categorized; matched terms do not take part in comparisons."""
+    category: Category
+    layer: str
+    rule: str
+    decided_by: str = None
+    terms: frozenset = field(default=frozenset(), compare=False)
+
+    def describe(self):
+        """The deciding rule, e.g. "merchant:zomato"."""
+        return self.rule if self.decided_by is None else f"{self.rule}:{self.decided_by}"
+
+
+@dataclass(slots=True)
+class Change:
+    """An expense whose decision changed between two RuleSets."""
+    key: str
+    old: Decision
+    new: Decision
+
+    def to_dict(self):
+        return {'smsHash': self.key,
+                'oldCategory': self.old.category.value, 'newCategory': self.new.category.value,
+                'oldLayer': self.old.layer, 'newLayer': self.new.layer,
+                'oldRule': self.old.describe(), 'newRule': self.new.describe()}
+
+
+@dataclass(slots=True)
+class RuleDiff:
+    """
+    What changed between two RuleSets: term -> the aspects of it that changed (terms that were
+    added or removed included), the added and removed terms, and whether the Layer 2 scoring
+    rows (categories, base scores, amount adjustments) changed.
+    """
+    changed: dict
+    added: frozenset
+    removed: frozenset
+    scoring: bool
+
+    def __bool__(self):
+        return bool(self.changed) or self.scoring
+
+    def summary(self):
+        """Counts, ready for JSON."""
+        return {'changed_terms': len(self.changed), 'added_terms': len(self.added),
+                'removed_terms': len(self.removed), 'scoring_changed': self.scoring}
+
+
+def _remove_name(merchants, name):
+    return tuple((category, tuple(entry for entry in names if entry != name))
+                 for category, names in merchants)
+
+
+class RuleSet:
+    """
+    The tables a categorization depends on, compiled into a CategoryIndex: the Layer 0
+    merchant sets and variations, the Layer 2 scoring rows and the Layer 1 candidate order.
+    Defaults are the built-in tables; with_merchant() and with_weight() derive edited copies.
+    """
+
+    def __init__(self, merchants=INDIAN_MERCHANTS, variations=MERCHANT_VARIATIONS,
+                 scoring=CATEGORY_SCORING, known_merchants=KNOWN_MERCHANTS):
+        self.merchants = merchants
+        self.variations = variations
+        self.scoring = scoring
+        self.known_merchants = known_merchants
+        self.index = CategoryIndex(merchants, variations, scoring, known_merchants)
+        self.vocabulary = self.index.matcher.terms
+
+    def term_rule(self, term):
+        """What term means to the categorizer, one entry per aspect (None or () if nothing)."""
+        index = self.index
+        rank = index.merchant_rank.get(term)
+        return ((rank, index.merchant_categories[rank]) if rank is not None else None,
+                tuple(index.keyword_weights.get(term, ())), index.known_rank.get(term))
+
+    def scoring_rows(self):
+        return tuple((category, base, adjust) for category, _, base, adjust in self.scoring)
+
+    def diff(self, other):
+        """The RuleDiff from these rules to other."""
+        changed = {}
+        for term in self.vocabulary | other.vocabulary:
+            aspects = frozenset(aspect for aspect, old, new
+                                in zip(ASPECTS, self.term_rule(term), other.term_rule(term))
+                                if old != new)
+            if aspects:
+                changed[term] = aspects
+        return RuleDiff(changed, other.vocabulary - self.vocabulary,
+                        self.vocabulary - other.vocabulary,
+                        self.scoring_rows() != other.scoring_rows())
+
+    def fingerprint(self):
+        """Digest of what every term means and of the scoring rows, stable across processes."""
+        digest = hashlib.sha256()
+        for term in sorted(self.vocabulary):
+            digest.update(repr((term, self.term_rule(term))).encode('utf-8'))
+        for category, base, adjust in self.scoring_rows():
+            digest.update(repr((category, base, adjust.__qualname__)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def with_merchant(self, name, category):
+        """
+        Copy with merchant name listed under category, moved there if it was listed elsewhere,
+        or removed from the merchant database when category is None.
+        """
+        merchants = _remove_name(self.merchants, name)
+        if category is not None:
+            if category in (listed for listed, _ in merchants):
+                merchants = tuple((listed, names + (name,) if listed == category else names)
+                                  for listed, names in merchants)
+            else:
+                merchants += ((category, (name,)),)
+        return RuleSet(merchants, self.variations, self.scoring, self.known_merchants)
+
+    def with_weight(self, phrase, category, weight):
+        """
+        Copy with the Layer 2 weight of phrase for category set (appended if the row did not
+        list it), or removed when weight is None.
+        """
+        scoring = []
+        for row, weights, base, adjust in self.scoring:
+            if row == category:
+                phrases = [listed for listed, _ in weights]
+                if weight is None:
+                    weights = tuple(entry for entry in weights if entry[0] != phrase)
+                elif phrase in phrases:
+                    weights = tuple((listed, weight if listed == phrase else old)
+                                    for listed, old in weights)
+                else:
+                    weights += ((phrase, weight),)
+            scoring.append((row, weights, base, adjust))
+        return RuleSet(self.merchants, self.variations, tuple(scoring), self.known_merchants)
+
+    def decide(self, body, amount, merchant_lookup=None):
+        """
+        The Decision for a lowercased body: categorize_with_layer()'s category and layer plus
+        the rule that decided and the matched terms.
+        """
+        index = self.index
+        found = frozenset(index.matcher.find_all(body))
+        wallet_merchant = extract_wallet_merchant(body)
+        if wallet_merchant is not None:
+            category = categorize_extracted_merchant(wallet_merchant)
+            if category is not None:
+                return Decision(category, LAYER_MERCHANT_DB, RULE_WALLET, wallet_merchant, found)
+
+        ranked = [(index.merchant_rank[term], term) for term in found
+                  if term in index.merchant_rank]
+        if ranked:
+            rank, term = min(ranked)
+            return Decision(index.merchant_categories[rank], LAYER_MERCHANT_DB, RULE_MERCHANT,
+                            term, found)
+
+        if merchant_lookup is not None:
+            category = resolve_merchant_names(index.merchant_names(wallet_merchant, found),
+                                              merchant_lookup)
+            if category is not None:
+                return Decision(category, LAYER_MERCHANT_API, RULE_API, None, found)
+
+        return Decision(best_keyword_category(index.keyword_scores(body, amount, found)),
+                        LAYER_KEYWORDS, RULE_KEYWORDS, None, found)
+
+
+class RecategorizationIndex:
+    """
+    Decisions for a set of expenses, keyed by SMS hash, and postings from every table term to
+    the expenses that matched it.
+
+    update() moves the index to new rules and returns the Changes. A changed term's postings
+    give the expenses that matched it; a term new to the vocabulary is found in the stored
+    bodies by substring search, without categorizing anything. Of those, only expenses whose
+    deciding rule depends on the changed aspect (DEPENDENCIES) are decided again, plus every
+    keyword-scored expense when the scoring rows changed.
+    """
+
+    def __init__(self, rules=None, merchant_lookup=None):
+        self.rules = rules if rules is not None else RuleSet()
+        self.merchant_lookup = merchant_lookup
+        self.keys = []
+        self.rows = {}
+        self.bodies = []
+        self.amounts = []
+        self.decisions = []
+        # term -> rows of the expenses that matched it
+        self.postings = {}
+        # Decisions made by the last update()
+        self.evaluated = 0
+        self._joined = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, body, amount):
+        """Categorize and index one expense; adding a key again replaces it."""
+        body = body.lower()
+        decision = self.rules.decide(body, amount, self.merchant_lookup)
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.bodies.append(body)
+            self.amounts.append(amount)
+            self.decisions.append(decision)
+            self._post(row, frozenset(), decision.terms)
+        else:
+            self.bodies[row] = body
+            self.amounts[row] = amount
+            self._post(row, self.decisions[row].terms, decision.terms)
+            self.decisions[row] = decision
+        self._joined = None
+        return decision
+
+    def add_expenses(self, messages):
+        """Add pipeline expenses (sms_hash, body and amount set); returns how many."""
+        count = 0
+        for message in messages:
+            self.add(message.sms_hash, message.body, message.amount)
+            count += 1
+        return count
+
+    def decision(self, key):
+        return self.decisions[self.rows[key]]
+
+    def _post(self, row, old_terms, new_terms):
+        postings = self.postings
+        for term in old_terms - new_terms:
+            rows = postings[term]
+            rows.discard(row)
+            if not rows:
+                del postings[term]
+        for term in new_terms - old_terms:
+            rows = postings.get(term)
+            if rows is None:
+                rows = postings[term] = set()
+            rows.add(row)
+
+    def rows_containing(self, term):
+        """Rows whose body contains term, found by searching all bodies joined in one string."""
+        if self._joined is None:
+            starts, position = [], 0
+            for body in self.bodies:
+                starts.append(position)
+                position += len(body) + 1
+            starts.append(position)
+            self._joined = (_BODY_SEPARATOR.join(self.bodies), starts)
+        text, starts = self._joined
+        rows = set()
+        position = text.find(term)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            rows.add(row)
+            position = text.find(term, starts[row + 1])
+        return rows
+
+    def affected(self, diff, added_rows):
+        """Rows whose decision can differ under the rules diff leads to."""
+        decisions = self.decisions
+        rows = set()
+        for term, aspects in diff.changed.items():
+            candidates = added_rows[term] if term in added_rows else self.postings.get(term, ())
+            rows.update(row for row in candidates
+                        if not aspects.isdisjoint(DEPENDENCIES[decisions[row].rule]))
+        if diff.scoring:
+            rows.update(row for row, decision in enumerate(decisions)
+                        if decision.rule == RULE_KEYWORDS)
+        return rows
+
+    def update(self, rules):
+        """Re-categorize what a change to rules affects; returns the Changes in row order."""
+        diff = self.rules.diff(rules)
+        added_rows = {term: self.rows_containing(term) for term in diff.added}
+        rows = self.affected(diff, added_rows)
+
+        # Bring every expense's matched terms to the new vocabulary, decided again or not
+        decisions = self.decisions
+        for term in diff.removed:
+            for row in self.postings.pop(term, ()):
+                decisions[row] = replace(decisions[row], terms=decisions[row].terms - {term})
+        for term, matched in added_rows.items():
+            if matched:
+                self.postings[term] = matched
+            for row in matched:
+                decisions[row] = replace(decisions[row], terms=decisions[row].terms | {term})
+
+        self.rules = rules
+        changes = []
+        for row in sorted(rows):
+            old = decisions[row]
+            new = rules.decide(self.bodies[row], self.amounts[row], self.merchant_lookup)
+            self._post(row, old.terms, new.terms)
+            decisions[row] = new
+            if new != old:
+                changes.append(Change(self.keys[row], old, new))
+        self.evaluated = len(rows)
+        return changes
+
+    def save(self, path):
+        """Write the decisions as JSONL, after a header line with the rules' fingerprint."""
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(json.dumps({'rules': self.rules.fingerprint(), 'expenses': len(self)}))
+            output.write('\n')
+            for key, body, amount, decision in zip(self.keys, self.bodies, self.amounts,
+                                                   self.decisions):
+                output.write(json.dumps({
+                    'smsHash': key, 'body': body, 'amount': amount,
+                    'category': decision.category.value, 'layer': decision.layer,
+                    'rule': decision.rule, 'decidedBy': decision.decided_by,
+                    'terms': sorted(decision.terms)}, ensure_ascii=False))
+                output.write('\n')
+
+    @classmethod
+    def load(cls, path, rules=None, merchant_lookup=None):
+        """Read an index saved by save(); rules must be the ones it was saved with."""
+        index = cls(rules, merchant_lookup)
+        with open(path, encoding='utf-8') as source:
+            header = json.loads(source.readline())
+            if header['rules'] != index.rules.fingerprint():
+                raise ValueError(f"{path} was categorized with other rules; load it with those "
+                                 f"and update() to the new ones")
+            for line in source:
+                record = json.loads(line)
+                row = index.rows[record['smsHash']] = len(index.keys)
+                index.keys.append(record['smsHash'])
+                index.bodies.append(record['body'])
+                index.amounts.append(record['amount'])
+                decision = Decision(Category(record['category']), record['layer'],
+                                    record['rule'], record['decidedBy'],
+                                    frozenset(record['terms']))
+                index.decisions.append(decision)
+                index._post(row, frozenset(), decision.terms)
+        return index
+
+
+def write_delta(changes, path):
+    """Write Changes as JSONL; returns the count."""
+    with open(path, 'w', encoding='utf-8') as output:
+        for change in changes:
+            output.write(json.dumps(change.to_dict(), ensure_ascii=False))
+            output.write('\n')
+    return len(changes)
+
+
+def apply_delta(changes, storage, max_batch=MAX_BATCH_SIZE):
+    """
+    Rewrite the category, and the category in the title, of every stored expense document
+    whose category changed, through a WriteBuffer; returns how many were rewritten.
+    """
+    buffer = WriteBuffer(storage, max_batch=max_batch, flush_interval=float('inf'))
+    for change in changes:
+        if change.new.category == change.old.category:
+            continue
+        document = storage.get(EXPENSES, change.key)
+        if document is None:
+            continue
+        _, _, rest = document['title'].partition(':')
+        buffer.put(EXPENSES, change.key, dict(document, category=change.new.category.value,
+                                              title=f"{change.new.category.name}:{rest}"))
+    buffer.close()
+    return buffer.puts
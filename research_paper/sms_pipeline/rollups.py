@@ -0,0 +1,274 @@
+"""
+Expense Rollups
+Precomputed totals for the app's chart buckets (lib/widgets/chart/chart.dart) and summary cards
+(categorySummaryCard.dart, totalSummaryCard.dart), which re-sum every expense on each rebuild.
+Totals and counts are kept per category and per day, ISO week and month in array-backed columns
+of integer paise, so saving or correcting an expense updates a fixed number of slots, and any
+date range is answered from prefix sums over those columns.
+"""
+
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+from .models import Category
+from .storage import EXPENSES
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+PERIODS = (DAY, WEEK, MONTH)
+
+# The app's time filters (ExpenseFilter in lib/models/all_expenses.dart); see time_filter_range
+TIME_FILTERS = ('today', 'week', 'month', 'year', 'all')
+
+
+def to_paise(amount):
+    return round(amount * 100)
+
+
+def _week_of_day(day):
+    # date.fromordinal(1) is a Monday, so weeks start on Mondays like the app's week filter
+    return (day - 1) // 7
+
+
+def _month_of(value):
+    return value.year * 12 + value.month - 1
+
+
+def period_start(period, index):
+    """First day of a period index."""
+    if period == DAY:
+        return date.fromordinal(index)
+    if period == WEEK:
+        return date.fromordinal(index * 7 + 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_index(period, value):
+    """Period index of a date or datetime."""
+    if period == DAY:
+        return value.toordinal()
+    if period == WEEK:
+        return _week_of_day(value.toordinal())
+    return _month_of(value)
+
+
+def time_filter_range(time_filter, now):
+    """
+    First and last day an app time filter covers at now; None for an open end. 'today',
+    'month' and 'year' are the whole calendar day, month and year, as in the app. The app's
+    'week' compares timestamps (after Monday at now's time of day less a day, before now plus
+    a day); rollups are day-granular, so here it runs from the Monday of now's week through
+    today, leaving out the Sunday evening and tomorrow morning the app's window reaches.
+    """
+    today = now.date() if hasattr(now, 'date') else now
+    if time_filter == 'today':
+        return today, today
+    if time_filter == 'week':
+        return today - timedelta(days=today.weekday()), today
+    if time_filter == 'month':
+        return (today.replace(day=1),
+                period_start(MONTH, _month_of(today) + 1) - timedelta(days=1))
+    if time_filter == 'year':
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    if time_filter == 'all':
+        return None, None
+    raise ValueError(f"Unknown time filter: {time_filter!r}")
+
+
+def _zeros(count):
+    return array('q', bytes(8 * count))
+
+
+class PeriodRollup:
+    """
+    Totals (paise) and counts per row over consecutive periods of one granularity, in
+    array('q') columns that grow to cover every period written. Each column's prefix sums are
+    rebuilt when a query needs them, from the first position written since the last rebuild.
+    """
+
+    def __init__(self, rows):
+        self.origin = None  # Period index at column position 0
+        self.totals = [array('q') for _ in range(rows)]
+        self.counts = [array('q') for _ in range(rows)]
+        self._prefix_totals = [array('q', [0]) for _ in range(rows)]
+        self._prefix_counts = [array('q', [0]) for _ in range(rows)]
+        # row -> first position whose prefix sums are stale, or None
+        self._stale = [None] * rows
+
+    def __len__(self):
+        return len(self.totals[0])
+
+    def _position(self, index):
+        if self.origin is None:
+            self.origin = index
+        position = index - self.origin
+        if position < 0:
+            for column in self.totals + self.counts:
+                column[0:0] = _zeros(-position)
+            self.origin, position = index, 0
+            self._stale = [0] * len(self._stale)
+        elif position >= len(self):
+            length = len(self)
+            for column in self.totals + self.counts:
+                column.extend(_zeros(position + 1 - length))
+            self._stale = [length if stale is None else stale for stale in self._stale]
+        return position
+
+    def add(self, row, index, paise, count):
+        position = self._position(index)
+        self.totals[row][position] += paise
+        self.counts[row][position] += count
+        stale = self._stale[row]
+        if stale is None or position < stale:
+            self._stale[row] = position
+
+    def _prefix(self, row):
+        stale = self._stale[row]
+        if stale is not None:
+            for values, prefix in ((self.totals[row], self._prefix_totals[row]),
+                                   (self.counts[row], self._prefix_counts[row])):
+                prefix[stale:] = array('q', accumulate(values[stale:], initial=prefix[stale]))
+            self._stale[row] = None
+        return self._prefix_totals[row], self._prefix_counts[row]
+
+    def _bounds(self, first, last):
+        """Column positions [start, stop) for period indexes first..last (None: open)."""
+        if self.origin is None:
+            return 0, 0
+        start = 0 if first is None else min(max(first - self.origin, 0), len(self))
+        stop = len(self) if last is None else min(max(last + 1 - self.origin, 0), len(self))
+        return start, max(start, stop)
+
+    def total(self, row, first=None, last=None):
+        """(paise, count) of a row over period indexes first..last, inclusive."""
+        start, stop = self._bounds(first, last)
+        totals, counts = self._prefix(row)
+        return totals[stop] - totals[start], counts[stop] - counts[start]
+
+    def series(self, row, first, last):
+        """[(period index, paise, count)] for every period first..last, inclusive."""
+        values, counts, origin = self.totals[row], self.counts[row], self.origin
+        series = []
+        for index in range(first, last + 1):
+            position = index - origin if origin is not None else -1
+            if 0 <= position < len(values):
+                series.append((index, values[position], counts[position]))
+            else:
+                series.append((index, 0, 0))
+        return series
+
+
+class ExpenseRollups:
+    """
+    Expense totals by category × day, week and month, kept current as expenses are saved,
+    corrected or removed. Every expense is remembered by key (its SMS hash) with its day,
+    category and paise, so saving a key again moves its contribution instead of adding it
+    twice. Usable directly as an SmsPipeline sink, and fills from an expense store with
+    add_documents().
+    """
+
+    def __init__(self, categories=tuple(Category)):
+        self.categories = categories
+        self._rows = {category: row for row, category in enumerate(categories)}
+        # The last row holds every category
+        self.all_row = len(categories)
+        self.rollups = {period: PeriodRollup(len(categories) + 1) for period in PERIODS}
+        # key -> (day ordinal, month index, row, paise)
+        self.expenses = {}
+
+    def __len__(self):
+        return len(self.expenses)
+
+    def __call__(self, message):
+        self.add(message.sms_hash, message.date, message.category, message.amount)
+
+    def _apply(self, entry, sign):
+        day, month, row, paise = entry
+        for rollup, index in ((self.rollups[DAY], day), (self.rollups[WEEK], _week_of_day(day)),
+                              (self.rollups[MONTH], month)):
+            rollup.add(row, index, sign * paise, sign)
+            rollup.add(self.all_row, index, sign * paise, sign)
+
+    def add(self, key, when, category, amount):
+        """Save or replace one expense."""
+        old = self.expenses.get(key)
+        if old is not None:
+            self._apply(old, -1)
+        entry = (when.toordinal(), _month_of(when), self._rows[category], to_paise(amount))
+        self.expenses[key] = entry
+        self._apply(entry, 1)
+
+    def remove(self, key):
+        """Forget an expense; False if it was not there."""
+        entry = self.expenses.pop(key, None)
+        if entry is None:
+            return False
+        self._apply(entry, -1)
+        return True
+
+    def correct(self, key, category=None, amount=None):
+        """Change the category and/or amount of a saved expense."""
+        day, month, row, paise = self.expenses[key]
+        self._apply((day, month, row, paise), -1)
+        entry = (day, month, row if category is None else self._rows[category],
+                 paise if amount is None else to_paise(amount))
+        self.expenses[key] = entry
+        self._apply(entry, 1)
+
+    def apply_changes(self, changes):
+        """Move re-categorized expenses (recategorize.Change records) to their new category."""
+        for change in changes:
+            if change.key in self.expenses and change.new.category != change.old.category:
+                self.correct(change.key, category=change.new.category)
+
+    def add_documents(self, storage):
+        """Add every expense document in a storage backend; returns how many."""
+        count = 0
+        for key, document in storage.items(EXPENSES):
+            self.add(key, date.fromisoformat(document['date'][:10]),
+                     Category(document['category']), document['amount'])
+            count += 1
+        return count
+
+    def _row(self, category):
+        return self.all_row if category is None else self._rows[category]
+
+    def _query(self, start, end, category, period):
+        return self.rollups[period].total(
+            self._row(category), None if start is None else period_index(period, start),
+            None if end is None else period_index(period, end))
+
+    def total(self, start=None, end=None, category=None, period=DAY):
+        """
+        Amount spent from start through end (dates, None for an open end), in one category or
+        all. A week or month period counts the whole periods start and end fall in.
+        """
+        return self._query(start, end, category, period)[0] / 100
+
+    def count(self, start=None, end=None, category=None, period=DAY):
+        return self._query(start, end, category, period)[1]
+
+    def category_totals(self, start=None, end=None):
+        """
+        {category value: amount} over the range for categories with expenses, like the
+        category summary card's totals.
+        """
+        totals = {}
+        for category in self.categories:
+            paise, count = self._query(start, end, category, DAY)
+            if count:
+                totals[category.value] = paise / 100
+        return totals
+
+    def time_filter_totals(self, time_filter, now):
+        """(total, category totals) for one of the app's time filters."""
+        start, end = time_filter_range(time_filter, now)
+        return self.total(start, end), self.category_totals(start, end)
+
+    def series(self, period, start, end, category=None):
+        """[(first day of period, amount)] for every period from start through end."""
+        return [(period_start(period, index), paise / 100)
+                for index, paise, _ in self.rollups[period].series(
+                    self._row(category), period_index(period, start), period_index(period, end))]
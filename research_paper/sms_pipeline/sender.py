@@ -0,0 +1,164 @@
+"""
+Sender Validation Stage
+Python port of _isLegitimateFinancialSender and _hasAuthenticBankingContent from
+lib/services/sms_listener.dart. Rules are checked in the same order as the app.
+"""
+
+import re
+
+# Dart regexes are ASCII for \d and \w, and $ only matches at the very end of the input
+_PHONE_NUMBER = re.compile(r'\+?[1-9]\d{9}', re.ASCII)
+_INDIAN_MOBILE = re.compile(r'\+91[6-9]\d{9}', re.ASCII)
+_TOLL_FREE = re.compile(r'1?800\d{7}', re.ASCII)
+_INTERNATIONAL = re.compile(r'\+(?!91)\d{10,15}', re.ASCII)
+_VERY_LONG_NUMBER = re.compile(r'\d{15,}', re.ASCII)
+_VERY_SHORT_NUMBER = re.compile(r'\d{1,3}', re.ASCII)
+_INVALID_CHARACTER = re.compile(r'[^A-Z0-9\-]')
+_LOWERCASE_WORD = re.compile(r'[a-z]+')
+
+_TRAI_SUFFIX = re.compile(r'-[STPG]\Z')
+_SHORT_CODE = re.compile(r'\d{4,6}', re.ASCII)
+_LEGACY_CODE = re.compile(r'[A-Z0-9]{5,6}')
+_EXTENDED_CODE = re.compile(r'[A-Z0-9\-]{7,25}')
+_WALLET_CODE = re.compile(r'[A-Z0-9\-]{10,30}')
+_HYPHENATED_CODE = re.compile(r'[A-Z0-9]+(-[A-Z0-9]+)+')
+
+PERSONAL_NAMES = (
+    'john', 'mary', 'david', 'sarah', 'mike', 'anna', 'raj', 'priya',
+    'amit', 'neha', 'rohit', 'kavya', 'admin', 'user', 'test', 'demo',
+    'info', 'hello', 'hi', 'message', 'sms', 'text', 'notification',
+)
+
+BANKING_SENDER_PATTERNS = (
+    'BANK', 'BNK', 'CARD', 'UNION', 'HDFC', 'ICICI', 'AXIS', 'SBI',
+    'KOTAK', 'YES', 'PNB', 'CAN', 'IOB', 'SYND', 'AND', 'BOB',
+    'UBI', 'MAHA', 'VIJ', 'AMEX', 'CITI', 'STAN', 'RBL', 'IND',
+    'MOBIKW', 'PAYTM', 'PHONEPE', 'GPAY', 'AMAZONP', 'FREECHARGE',
+)
+
+WALLET_SENDER_PATTERNS = ('MOBIKW', 'PAYTM', 'PHONEPE', 'GPAY', 'AMAZONP', 'FREECHARGE')
+
+# Strong banking indicators: any one of them is enough
+STRONG_BANKING_INDICATORS = (
+    'avl limit', 'available limit', 'card no.', 'account no',
+    'transaction id', 'reference no', 'utr no', 'utr number',
+    'ifsc code', 'branch code', 'customer id', 'debit card',
+    'credit card', 'net banking', 'mobile banking',
+    'not you? sms block', 'call customer care', 'visit branch',
+    'terms and conditions apply', 'charges applicable',
+    # Union Bank specific patterns
+    'union bank', 'unionbank', 'ubi', 'union bank of india',
+    # Common banking transaction phrases
+    'debited from your', 'credited to your', 'balance is',
+    'transaction successful', 'transaction failed', 'otp',
+    'mini statement', 'account statement', 'cheque book',
+    'atm withdrawal', 'pos transaction', 'online transfer',
+    'neft', 'rtgs', 'imps', 'upi transaction',
+    # Wallet-specific indicators
+    'wallet balance', 'wallet debited', 'wallet credited',
+    'paytm wallet', 'phonepe wallet', 'gpay wallet', 'amazon pay wallet',
+    'mobikwik wallet', 'freecharge wallet', 'ola money', 'jio money',
+    'airtel money', 'bharti wallet', 'wallet to bank', 'bank to wallet',
+    'wallet recharge', 'wallet payment', 'wallet transfer',
+    'add money to wallet', 'money added to wallet',
+    'wallet balance low', 'wallet transaction',
+    'paid using wallet', 'payment from wallet',
+    'wallet cashback', 'wallet refund',
+)
+
+# Amount + banking/wallet action + account/card/wallet reference
+TRANSACTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE | re.ASCII) for pattern in (
+    r'(rs|inr)\s*[\d,]+\.?\d*\s*(debited|credited|spent|charged).*?(account|card|wallet)',
+    r'(debited|credited|spent|charged)\s*(rs|inr)\s*[\d,]+\.?\d*.*?(from|to).*?(account|card|wallet)',
+    r'transaction.*?(rs|inr)\s*[\d,]+\.?\d*.*?(successful|completed|failed)',
+    # Union Bank specific transaction patterns
+    r'(rs|inr)\s*[\d,]+\.?\d*.*?(debited|credited).*?(union|ubi)',
+    r'your.*?(account|card|wallet).*?(rs|inr)\s*[\d,]+\.?\d*',
+    # Wallet-specific patterns
+    r'(rs|inr)\s*[\d,]+\.?\d*.*?(debited|credited|added|paid).*?wallet',
+    r'wallet.*?(rs|inr)\s*[\d,]+\.?\d*.*?(debited|credited|balance)',
+    r'paid.*?(rs|inr)\s*[\d,]+\.?\d*.*?(using|via|through).*?(paytm|phonepe|gpay|wallet)',
+))
+
+# Fallback: at least two of these keywords
+BANKING_KEYWORDS = (
+    'account', 'balance', 'transaction', 'debited', 'credited',
+    'bank', 'card', 'upi', 'wallet', 'payment', 'transfer',
+    'limit', 'statement', 'otp', 'pin', 'atm', 'pos',
+    # Additional banking terms
+    'withdraw', 'deposit', 'cheque', 'draft', 'loan',
+    'emi', 'interest', 'charges', 'fee', 'branch',
+    'customer', 'service', 'helpline', 'support',
+    # Wallet-specific keywords
+    'paytm', 'phonepe', 'gpay', 'amazon pay', 'mobikwik',
+    'freecharge', 'ola money', 'jio money', 'airtel money',
+    'recharge', 'cashback', 'refund', 'topup', 'add money',
+)
+
+
+def has_authentic_banking_content(body):
+    """True when a lowercased SMS body reads like a genuine banking or wallet message."""
+    for indicator in STRONG_BANKING_INDICATORS:
+        if indicator in body:
+            return True
+
+    for pattern in TRANSACTION_PATTERNS:
+        if pattern.search(body):
+            return True
+
+    keyword_count = 0
+    for keyword in BANKING_KEYWORDS:
+        if keyword in body:
+            keyword_count += 1
+    return keyword_count >= 2
+
+
+def is_legitimate_financial_sender(sender, body):
+    """
+    True when the sender ID looks like a bank or wallet sender and the body backs it up.
+
+    Phone numbers, toll-free and international numbers, malformed IDs and personal names
+    are rejected outright; TRAI-suffixed and legacy bank/wallet codes are accepted only
+    with authentic banking content.
+    """
+    sender_lower = sender.lower()
+    body_lower = body.lower()
+    sender_upper = sender.upper()
+
+    # Primary rejection rules
+    if (_PHONE_NUMBER.fullmatch(sender) or _INDIAN_MOBILE.fullmatch(sender)
+            or _TOLL_FREE.fullmatch(sender) or _INTERNATIONAL.fullmatch(sender)
+            or _VERY_LONG_NUMBER.fullmatch(sender) or _VERY_SHORT_NUMBER.fullmatch(sender)):
+        return False
+    if _INVALID_CHARACTER.search(sender_upper):
+        return False
+    if len(sender) > 3 and sender == sender_lower and _LOWERCASE_WORD.fullmatch(sender):
+        return False
+    if sender_lower in PERSONAL_NAMES:
+        return False
+
+    # TRAI 2025 suffix-based validation: -S, -T, -P, -G
+    if _TRAI_SUFFIX.search(sender_upper):
+        return has_authentic_banking_content(body_lower)
+
+    # Legacy formats (pre-May 2025)
+    if _SHORT_CODE.fullmatch(sender):
+        return has_authentic_banking_content(body_lower)
+
+    if _LEGACY_CODE.fullmatch(sender_upper):
+        return has_authentic_banking_content(body_lower)
+
+    if _EXTENDED_CODE.fullmatch(sender_upper):
+        for pattern in BANKING_SENDER_PATTERNS:
+            if pattern in sender_upper:
+                return has_authentic_banking_content(body_lower)
+
+    if _WALLET_CODE.fullmatch(sender_upper):
+        for pattern in WALLET_SENDER_PATTERNS:
+            if pattern in sender_upper:
+                return has_authentic_banking_content(body_lower)
+
+    if _HYPHENATED_CODE.fullmatch(sender_upper):
+        return has_authentic_banking_content(body_lower)
+
+    return False
@@ -0,0 +1,126 @@
+"""
+Compiled Sender Validation
+Builds the Layer 0 sender rules of _isLegitimateFinancialSender and the body rules of
+_hasAuthenticBankingContent into precomputed lookups: one regex for every rejected sender
+format, one for the accepted code formats and a trie matcher for the bank and wallet name parts.
+Sender decisions are memoized per sender ID. Body checks run cheapest first and the transaction
+regexes only see bodies that mention an amount. Results are identical to sender.py.
+"""
+
+import re
+from functools import lru_cache
+
+from .matcher import TermMatcher
+from .sender import (BANKING_KEYWORDS, BANKING_SENDER_PATTERNS, PERSONAL_NAMES,
+                     STRONG_BANKING_INDICATORS, TRANSACTION_PATTERNS, WALLET_SENDER_PATTERNS)
+
+# Sender IDs whose decision is remembered; inboxes see a few hundred distinct senders
+SENDER_MEMO_SIZE = 65536
+
+# Phone, Indian mobile, toll-free, international, very long and very short numbers
+_REJECTED_NUMBER = re.compile(r'\+?[1-9]\d{9}|\+91[6-9]\d{9}|1?800\d{7}|\+(?!91)\d{10,15}'
+                              r'|\d{15,}|\d{1,3}', re.ASCII)
+_INVALID_CHARACTER = re.compile(r'[^A-Z0-9\-]')
+_LOWERCASE_WORD = re.compile(r'[a-z]+')
+
+# Accepted without a bank or wallet name, given authentic content: TRAI -S/-T/-P/-G suffixes,
+# short codes, legacy 5-6 character codes and hyphenated codes. They run on the uppercased ID,
+# which by then holds only A-Z, 0-9 and '-', so digits match as in the original.
+_CODE_FORMAT = re.compile(r'.*-[STPG]|\d{4,6}|[A-Z0-9]{5,6}|[A-Z0-9]+(?:-[A-Z0-9]+)+',
+                          re.ASCII)
+
+# Extended (7-25) and wallet (10-30) codes need a bank or wallet name part. Every wallet name
+# is also a bank name, so wallet names only decide IDs longer than the extended limit.
+_EXTENDED_LENGTH = range(7, 26)
+_WALLET_LENGTH = range(10, 31)
+
+# Every transaction pattern needs an amount; bodies without one skip the backtracking regexes
+_AMOUNT = re.compile(r'(?:rs|inr)\s*[\d,]', re.IGNORECASE | re.ASCII)
+
+
+class SenderIndex:
+    """
+    is_legitimate_financial_sender() over precompiled rules.
+
+    The sender ID alone decides whether a message is rejected or must show authentic banking
+    content, so that decision is memoized for memo_size sender IDs.
+    """
+
+    def __init__(self, banking_senders=BANKING_SENDER_PATTERNS,
+                 wallet_senders=WALLET_SENDER_PATTERNS, personal_names=PERSONAL_NAMES,
+                 indicators=STRONG_BANKING_INDICATORS, keywords=BANKING_KEYWORDS,
+                 transaction_patterns=TRANSACTION_PATTERNS, memo_size=SENDER_MEMO_SIZE):
+        self.banking_senders = frozenset(banking_senders)
+        self.wallet_senders = frozenset(wallet_senders)
+        self.sender_matcher = TermMatcher(self.banking_senders | self.wallet_senders)
+        self.personal_names = frozenset(personal_names)
+
+        # An indicator containing another one can never be the first to match
+        self.indicators = tuple(indicator for indicator in dict.fromkeys(indicators)
+                                if not any(other != indicator and other in indicator
+                                           for other in indicators))
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self.transaction_patterns = tuple(transaction_patterns)
+        self.needs_content = lru_cache(maxsize=memo_size)(self._needs_content)
+
+    def _needs_content(self, sender):
+        """True when the sender ID is accepted given authentic content, False when rejected."""
+        if _REJECTED_NUMBER.fullmatch(sender):
+            return False
+        sender_upper = sender.upper()
+        if _INVALID_CHARACTER.search(sender_upper):
+            return False
+        sender_lower = sender.lower()
+        if len(sender) > 3 and sender == sender_lower and _LOWERCASE_WORD.fullmatch(sender):
+            return False
+        if sender_lower in self.personal_names:
+            return False
+
+        if _CODE_FORMAT.fullmatch(sender_upper):
+            return True
+        names = self.sender_matcher.find_all(sender_upper)
+        if len(sender_upper) in _EXTENDED_LENGTH and not names.isdisjoint(self.banking_senders):
+            return True
+        return len(sender_upper) in _WALLET_LENGTH and not names.isdisjoint(self.wallet_senders)
+
+    def has_authentic_banking_content(self, body):
+        """has_authentic_banking_content() with the checks reordered cheapest first."""
+        keyword_count = 0
+        for keyword in self.keywords:
+            if keyword in body:
+                keyword_count += 1
+                if keyword_count == 2:
+                    return True
+        for indicator in self.indicators:
+            if indicator in body:
+                return True
+        if _AMOUNT.search(body) is None:
+            return False
+        return any(pattern.search(body) for pattern in self.transaction_patterns)
+
+    def is_legitimate_financial_sender(self, sender, body):
+        """Same result as sender.is_legitimate_financial_sender()."""
+        return self.needs_content(sender) and self.has_authentic_banking_content(body.lower())
+
+    def memo_stats(self):
+        """Sender memo counters, ready for JSON."""
+        info = self.needs_content.cache_info()
+        lookups = info.hits + info.misses
+        return {'hits': info.hits, 'misses': info.misses, 'senders': info.currsize,
+                'hit_rate': info.hits / lookups if lookups else 0.0}
+
+
+_default_index = None
+
+
+def default_sender_index():
+    """The SenderIndex over the built-in rules, built on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = SenderIndex()
+    return _default_index
+
+
+def is_legitimate_financial_sender_indexed(sender, body):
+    """Drop-in replacement for is_legitimate_financial_sender() backed by the default index."""
+    return default_sender_index().is_legitimate_financial_sender(sender, body)
@@ -0,0 +1,86 @@
+"""
+Latency Statistics
+Fixed-memory log-bucketed latency histogram, so percentiles over millions of messages do not
+need every sample kept in memory.
+"""
+
+import math
+
+# Sub-buckets per power of two: percentiles are accurate to about 1.5%
+SUB_BUCKETS = 32
+
+
+class LatencyHistogram:
+    """Histogram of durations in seconds with percentile, mean and max queries."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        index = self._bucket(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @staticmethod
+    def _bucket(seconds):
+        if seconds <= 0:
+            return -1 << 30
+        mantissa, exponent = math.frexp(seconds)  # seconds = mantissa * 2**exponent, 0.5 <= m < 1
+        return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+    @staticmethod
+    def _bucket_value(index):
+        """Midpoint of a bucket in seconds."""
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        low = math.ldexp(0.5 + sub / (2 * SUB_BUCKETS), exponent)
+        high = math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+        return (low + high) / 2
+
+    def merge(self, other):
+        """Fold another histogram into this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+
+    def percentile(self, percent):
+        """Approximate latency below which percent of the samples fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                if index == -1 << 30:
+                    return 0.0
+                # Never report beyond the observed extremes
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """Count, mean, max and the requested percentiles, all latencies in microseconds."""
+        result = {
+            'count': self.count,
+            'mean_us': self.mean * 1e6,
+            'max_us': self.max * 1e6,
+        }
+        for percent in percentiles:
+            result[f"p{percent:g}_us"] = self.percentile(percent) * 1e6
+        return result
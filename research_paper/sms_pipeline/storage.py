@@ -0,0 +1,245 @@
+"""
+Expense Storage
+Batched stand-in for the Firestore writes of addExpenseToStorage and _markSmsAsProcessed from
+lib/services/sms_listener.dart, which send one write per expense plus one per processed hash.
+Writes go through a buffer that coalesces repeated writes of a document and commits in bulk,
+to an in-process or SQLite backend.
+
+A backend provides upsert(collection, records) for a {key: document} mapping, commit(),
+get(collection, key), items(collection), count(collection) and close(), and counts the
+documents it wrote and the commits it made.
+"""
+
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+# Collections written by the app, named after their Firestore paths
+EXPENSES = 'user_expenses'
+PROCESSED_SMS = 'sms_hashes'
+
+# Firestore caps a batched write at 500 documents
+MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 1.0
+
+_COLLECTION_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+
+
+def expense_document(message):
+    """The expenseData map addExpenseToStorage saves for an SMS expense."""
+    return {
+        'id': message.sms_hash,
+        'title': message.title,
+        'amount': message.amount,
+        'date': message.date.isoformat(),
+        'category': message.category.value,
+        'smsHash': message.sms_hash,
+        'source': 'sms',
+    }
+
+
+def processed_document(sms_hash, processed_at):
+    """The document _markSmsAsProcessed saves under the SMS hash."""
+    return {'processedAt': processed_at.isoformat(), 'hash': sms_hash}
+
+
+class MemoryStorage:
+    """In-process backend: one dict per collection."""
+
+    def __init__(self):
+        self.collections = {}
+        self.writes = 0
+        self.commits = 0
+
+    def upsert(self, collection, records):
+        self.collections.setdefault(collection, {}).update(records)
+        self.writes += len(records)
+
+    def commit(self):
+        self.commits += 1
+
+    def get(self, collection, key):
+        return self.collections.get(collection, {}).get(key)
+
+    def items(self, collection):
+        """Every (key, document) of a collection."""
+        return iter(list(self.collections.get(collection, {}).items()))
+
+    def count(self, collection):
+        return len(self.collections.get(collection, ()))
+
+    def close(self):
+        pass
+
+
+class SqliteStorage:
+    """
+    SQLite backend: one (key, JSON document) table per collection.
+
+    Nothing is visible to other connections until commit(), which makes each commit the
+    equivalent of one Firestore batched write. path defaults to a private in-memory database.
+    """
+
+    def __init__(self, path=':memory:', synchronous='NORMAL'):
+        self.connection = sqlite3.connect(path)
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(f'PRAGMA synchronous={synchronous}')
+        self.tables = set()
+        self.writes = 0
+        self.commits = 0
+
+    def _table(self, collection):
+        if collection not in self.tables:
+            if not _COLLECTION_NAME.match(collection):
+                raise ValueError(f"Unsupported collection name: {collection!r}")
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {collection} (key TEXT PRIMARY KEY, doc TEXT)')
+            self.tables.add(collection)
+        return collection
+
+    def upsert(self, collection, records):
+        table = self._table(collection)
+        self.connection.executemany(
+            f'INSERT INTO {table} (key, doc) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET doc = excluded.doc',
+            [(key, json.dumps(document)) for key, document in records.items()])
+        self.writes += len(records)
+
+    def commit(self):
+        self.connection.commit()
+        self.commits += 1
+
+    def get(self, collection, key):
+        row = self.connection.execute(
+            f'SELECT doc FROM {self._table(collection)} WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def items(self, collection):
+        """Every (key, document) of a collection, in key order."""
+        for key, doc in self.connection.execute(
+                f'SELECT key, doc FROM {self._table(collection)} ORDER BY key'):
+            yield key, json.loads(doc)
+
+    def count(self, collection):
+        return self.connection.execute(
+            f'SELECT COUNT(*) FROM {self._table(collection)}').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class WriteBuffer:
+    """
+    Coalescing write-behind buffer in front of a storage backend.
+
+    put() keeps only the latest document per (collection, key) until a flush, which upserts
+    everything pending and commits once. A flush happens when max_batch documents are pending
+    or flush_interval seconds (by clock) have passed since the last one; max_batch=1 gives the
+    app's one write and one round trip per document. put() only checks the interval when it is
+    called, so a writer whose puts can pause calls maybe_flush() on a timer as well, as
+    IngestionService does for its sink.
+    """
+
+    def __init__(self, storage, max_batch=MAX_BATCH_SIZE, flush_interval=FLUSH_INTERVAL_SECONDS,
+                 clock=time.monotonic):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.clock = clock
+        # collection -> {key: document}
+        self.pending = {}
+        self.pending_count = 0
+        self.last_flush = clock()
+        self.puts = 0
+        self.coalesced = 0
+        self.flushes = 0
+
+    def put(self, collection, key, document):
+        records = self.pending.get(collection)
+        if records is None:
+            records = self.pending[collection] = {}
+        if key in records:
+            self.coalesced += 1
+        else:
+            self.pending_count += 1
+        records[key] = document
+        self.puts += 1
+        if self.pending_count >= self.max_batch:
+            self.flush()
+        else:
+            self.maybe_flush()
+
+    def maybe_flush(self):
+        """Flush if documents are pending and flush_interval has passed; True if it did."""
+        if self.pending_count and self.clock() - self.last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Write everything pending in one commit."""
+        if self.pending_count:
+            for collection, records in self.pending.items():
+                if records:
+                    self.storage.upsert(collection, records)
+            self.storage.commit()
+            self.flushes += 1
+        self.pending = {}
+        self.pending_count = 0
+        self.last_flush = self.clock()
+
+    def close(self):
+        self.flush()
+
+    def stats(self):
+        """Write counters, ready for JSON."""
+        writes = self.storage.writes
+        return {
+            'puts': self.puts,
+            'coalesced': self.coalesced,
+            'flushes': self.flushes,
+            'documents_written': writes,
+            'commits': self.storage.commits,
+            'write_amplification': writes / self.puts if self.puts else 0.0,
+        }
+
+
+class ExpenseStore:
+    """
+    Saves pipeline expenses like addExpenseToStorage plus _markSmsAsProcessed, through a
+    WriteBuffer. Documents are keyed by SMS hash, so saving the same SMS again (a resumed
+    backfill, a re-categorization) overwrites it instead of adding a copy. Usable directly as
+    an SmsPipeline sink.
+    """
+
+    def __init__(self, storage, max_batch=MAX_BATCH_SIZE, flush_interval=FLUSH_INTERVAL_SECONDS,
+                 clock=time.monotonic, now=None):
+        self.buffer = WriteBuffer(storage, max_batch=max_batch, flush_interval=flush_interval,
+                                  clock=clock)
+        # processedAt time; defaults to the wall clock at each save
+        self.now = now
+
+    def __call__(self, message):
+        self.save(message)
+
+    def save(self, message):
+        buffer = self.buffer
+        buffer.put(EXPENSES, message.sms_hash, expense_document(message))
+        buffer.put(PROCESSED_SMS, message.sms_hash,
+                   processed_document(message.sms_hash,
+                                      self.now if self.now is not None else datetime.now()))
+
+    def flush(self):
+        self.buffer.flush()
+
+    def maybe_flush(self):
+        return self.buffer.maybe_flush()
+
+    def close(self):
+        self.buffer.close()
+
+    def stats(self):
+        return self.buffer.stats()
@@ -0,0 +1,415 @@
+"""
+Synthetic SMS Corpus
+Seeded generator of realistic Indian bank, card, wallet and UPI messages mixed with income,
+promotional, OTP and personal messages, re-deliveries and stale messages. The same seed always
+produces the same stream, so benchmark runs are comparable.
+
+CorpusGenerator is the configurable variant for load and scaling tests: sender format mix,
+Zipf-distributed merchants, duplicate and re-delivery rates and a share of fraud messages from
+the sender formats the validation stage rejects, labelled and fast enough to stream millions of
+messages a minute.
+"""
+
+import random
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+from string import Formatter
+
+from .models import Category, SmsMessage
+
+# Fixed sync time so generated corpora do not depend on the wall clock
+REFERENCE_NOW = datetime(2025, 6, 30, 21, 0, 0)
+
+BANK_SENDERS = (
+    'AX-AXISBK-S', 'VM-HDFCBK-T', 'JD-ICICIT-S', 'BZ-SBICRD-T', 'JK-UNIONB-S', 'AD-KOTAKB-T',
+    'HDFCBK', 'AXISBK', 'ICICIB', '56767', 'JM-BOBTXN',
+)
+WALLET_SENDERS = ('VK-MOBIKW-S', 'AD-PAYTMB-T', 'VM-PHONEPE-S', 'BX-AMAZONP-T')
+PROMO_SENDERS = ('VM-OFFERS-P', 'AD-SHOPPR-P', 'BT-DEALS-P')
+PERSONAL_SENDERS = ('+919876543210', '9823456789', 'rahul', '+14155550123')
+
+BANK_NAMES = ('Axis Bank', 'HDFC Bank', 'ICICI Bank', 'SBI Card', 'Union Bank', 'Kotak Bank')
+WALLETS = ('MobiKwik', 'Paytm', 'PhonePe', 'Amazon Pay')
+
+KNOWN_MERCHANTS = (
+    'ZOMATO', 'SWIGGY', 'DOMINOS PIZZA', 'STARBUCKS', 'KFC', 'UBER INDIA', 'OLA CABS',
+    'IRCTC', 'MAKEMYTRIP', 'INDIGO', 'BOOKMYSHOW', 'NETFLIX', 'AMAZON', 'FLIPKART', 'MYNTRA',
+    'PVR', 'MICROSOFT', 'ADOBE', 'ZOOM', 'BIGBASKET', 'INDIAN OIL', 'CULT FIT',
+)
+LOCAL_MERCHANTS = (
+    'SHARMA GENERAL STORE', 'CITY CAFE', 'QUICKFIX SERVICES', 'GREEN LEAF RESTAURANT',
+    'METRO PARKING', 'SAI FUEL STATION', 'TECHNO SOLUTIONS', 'URBAN FASHION MALL',
+    'ANNAPURNA KITCHEN', 'RAJ TRAVELS', 'FITZONE GYM', 'NEW BOOK DEPOT',
+)
+
+# Ground truth for labelled corpora: the category a person would file each merchant under
+MERCHANT_CATEGORIES = {
+    'ZOMATO': Category.Food, 'SWIGGY': Category.Food, 'DOMINOS PIZZA': Category.Food,
+    'STARBUCKS': Category.Food, 'KFC': Category.Food, 'BIGBASKET': Category.Food,
+    'UBER INDIA': Category.Travel, 'OLA CABS': Category.Travel, 'IRCTC': Category.Travel,
+    'MAKEMYTRIP': Category.Travel, 'INDIGO': Category.Travel, 'INDIAN OIL': Category.Travel,
+    'BOOKMYSHOW': Category.Leisure, 'NETFLIX': Category.Leisure, 'AMAZON': Category.Leisure,
+    'FLIPKART': Category.Leisure, 'MYNTRA': Category.Leisure, 'PVR': Category.Leisure,
+    'CULT FIT': Category.Leisure,
+    'MICROSOFT': Category.Work, 'ADOBE': Category.Work, 'ZOOM': Category.Work,
+    'SHARMA GENERAL STORE': Category.Food, 'CITY CAFE': Category.Food,
+    'GREEN LEAF RESTAURANT': Category.Food, 'ANNAPURNA KITCHEN': Category.Food,
+    'METRO PARKING': Category.Travel, 'SAI FUEL STATION': Category.Travel,
+    'RAJ TRAVELS': Category.Travel, 'TECHNO SOLUTIONS': Category.Work,
+    'QUICKFIX SERVICES': Category.Miscellaneous, 'URBAN FASHION MALL': Category.Leisure,
+    'FITZONE GYM': Category.Leisure, 'NEW BOOK DEPOT': Category.Leisure,
+}
+
+EXPENSE_TEMPLATES = (
+    'Rs.{amount} debited from your A/c XX{account} on {day} to {merchant} UPI Ref {ref}. '
+    'Not you? SMS BLOCK to 9215676766 -{bank}',
+    'Spent INR {amount} {bank} Card no. XX{card} {day} {clock} IST {merchant} '
+    'Avl Limit: INR {limit}',
+    'Rs.{amount} paid to {merchant} via {wallet} wallet. Transaction ID {ref}',
+    'Your A/c XX{account} is debited with INR {amount} for POS transaction at {merchant}. '
+    'Avl Bal INR {balance}',
+    'Rs.{amount} has been debited from your {wallet} wallet. Remaining balance: Rs.{balance}.',
+    'INR {amount} spent on {bank} Credit Card XX{card} at {merchant} on {day}. '
+    'Avl limit: INR {limit}',
+    'UPI payment to {merchant} of Rs.{amount} using {wallet} successful. UPI Ref no {ref}',
+    'Rs.{amount} withdrawn at ATM from A/c XX{account} on {day}. Avl Bal Rs.{balance} -{bank}',
+)
+CREDIT_TEMPLATES = (
+    'Rs.{amount} credited to your A/c XX{account} by NEFT on {day}. Avl Bal Rs.{balance}',
+    'Salary of INR {amount} credited to A/c XX{account}. Balance is INR {balance}',
+    'Refund of Rs.{amount} from {merchant} credited to your {wallet} wallet',
+)
+PROMO_TEMPLATES = (
+    'Get cashback up to Rs.{amount} on your next recharge! Click here to claim.',
+    'Congratulations! You have won a voucher worth Rs.{amount}. Offer valid till {day}.',
+    'Limited time offer: flat {percent}% off at {merchant}. Download the app now.',
+)
+OTP_TEMPLATES = (
+    '{otp} is your OTP for transaction of Rs.{amount} at {merchant}. Do not share it. -{bank}',
+)
+PERSONAL_TEMPLATES = (
+    'Hey, sent you Rs.{amount} for dinner last night',
+    'Call me when you reach, the cab was Rs.{amount}',
+)
+
+# Share of each message kind in a corpus
+MESSAGE_MIX = (
+    ('expense', 0.55),
+    ('credit', 0.12),
+    ('promo', 0.13),
+    ('otp', 0.08),
+    ('personal', 0.12),
+)
+
+
+def _amount(rng):
+    """Log-normal spend amounts centred on a few hundred rupees."""
+    return round(min(max(rng.lognormvariate(5.6, 1.1), 1.0), 250000.0), rng.choice((0, 2)))
+
+
+def _format_amount(rng, amount):
+    if amount >= 1000 and rng.random() < 0.5:
+        return f"{amount:,.2f}"
+    if amount == int(amount) and rng.random() < 0.5:
+        return str(int(amount))
+    return f"{amount:.2f}"
+
+
+def _fill(rng, template, date):
+    """The filled-in body and the merchant drawn for it (unused by merchant-less templates)."""
+    merchants = KNOWN_MERCHANTS if rng.random() < 0.7 else LOCAL_MERCHANTS
+    # Drawn in the original keyword order so seeded corpora stay the same
+    amount = _format_amount(rng, _amount(rng))
+    merchant = rng.choice(merchants)
+    return template.format(
+        amount=amount,
+        merchant=merchant,
+        bank=rng.choice(BANK_NAMES),
+        wallet=rng.choice(WALLETS),
+        account=rng.randint(1000, 9999),
+        card=rng.randint(1000, 9999),
+        ref=rng.randint(10 ** 11, 10 ** 12 - 1),
+        otp=rng.randint(100000, 999999),
+        percent=rng.choice((10, 20, 30, 50)),
+        day=date.strftime('%d-%m-%y'),
+        clock=date.strftime('%H:%M:%S'),
+        balance=_format_amount(rng, round(rng.uniform(100, 200000), 2)),
+        limit=_format_amount(rng, round(rng.uniform(1000, 500000), 2)),
+    ), merchant
+
+
+def _message(rng, kind, date):
+    """A message of the given kind, with its template and merchant."""
+    if kind == 'expense':
+        template = rng.choice(EXPENSE_TEMPLATES)
+        sender = rng.choice(WALLET_SENDERS if 'wallet' in template else BANK_SENDERS)
+    elif kind == 'credit':
+        template, sender = rng.choice(CREDIT_TEMPLATES), rng.choice(BANK_SENDERS)
+    elif kind == 'promo':
+        template, sender = rng.choice(PROMO_TEMPLATES), rng.choice(PROMO_SENDERS)
+    elif kind == 'otp':
+        template, sender = rng.choice(OTP_TEMPLATES), rng.choice(BANK_SENDERS)
+    else:
+        template, sender = rng.choice(PERSONAL_TEMPLATES), rng.choice(PERSONAL_SENDERS)
+    body, merchant = _fill(rng, template, date)
+    return SmsMessage(sender=sender, body=body, date=date), template, merchant
+
+
+def expense_category(template, merchant):
+    """True category of an expense: its merchant's, or Miscellaneous for ATM and wallet debits."""
+    if '{merchant}' not in template:
+        return Category.Miscellaneous
+    return MERCHANT_CATEGORIES[merchant]
+
+
+def generate_messages(count, seed=0, now=REFERENCE_NOW, duplicate_rate=0.05, stale_rate=0.02):
+    """
+    Yield count synthetic SmsMessage records.
+
+    duplicate_rate of the messages re-deliver an earlier expense verbatim, and stale_rate are
+    older than the seven-day sync window relative to now.
+    """
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in MESSAGE_MIX]
+    weights = [weight for _, weight in MESSAGE_MIX]
+    recent_expenses = []
+
+    for _ in range(count):
+        if recent_expenses and rng.random() < duplicate_rate:
+            original = rng.choice(recent_expenses)
+            yield SmsMessage(sender=original.sender, body=original.body, date=original.date)
+            continue
+
+        if rng.random() < stale_rate:
+            age = timedelta(days=rng.uniform(7.5, 60))
+        else:
+            age = timedelta(seconds=rng.uniform(0, 7 * 24 * 3600))
+        date = (now - age).replace(microsecond=0)
+
+        kind = rng.choices(kinds, weights)[0]
+        message = _message(rng, kind, date)[0]
+        if kind == 'expense':
+            # Keep a bounded pool of re-delivery candidates
+            if len(recent_expenses) < 1000:
+                recent_expenses.append(message)
+            else:
+                recent_expenses[rng.randrange(1000)] = message
+        yield message
+
+
+def generate_labelled_expenses(count, seed=0, now=REFERENCE_NOW):
+    """
+    Yield count (SmsMessage, Category) pairs: synthetic expense messages within the sync window
+    and the category each belongs in, for accuracy evaluation.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        date = (now - timedelta(seconds=rng.uniform(0, 7 * 24 * 3600))).replace(microsecond=0)
+        message, template, merchant = _message(rng, 'expense', date)
+        yield message, expense_category(template, merchant)
+
+
+# ---------------------------------------------------------------------------
+# Configurable corpora
+# ---------------------------------------------------------------------------
+
+# (bank senders, wallet senders) per sender ID format the validation stage accepts, as listed
+# on the pipeline diagram
+SENDER_FORMATS = {
+    'trai': (('AX-AXISBK-S', 'VM-HDFCBK-T', 'JD-ICICIT-S', 'BZ-SBICRD-T', 'JK-UNIONB-S',
+              'AD-KOTAKB-T'), ('VK-MOBIKW-S', 'AD-PAYTMB-T', 'VM-PHONEPE-S', 'BX-AMAZONP-T')),
+    'bank_code': (('HDFCBK', 'AXISBK', 'ICICIB', 'SBICRD', 'KOTAKB', 'UNIONB'),
+                  ('PAYTMB', 'MOBIKW')),
+    'short_code': (('56767', '56161', '57575', '9223'), ('55055',)),
+    'extended': (('JM-BOBTXN', 'VM-HDFCBANK', 'BP-SBICARD', 'AD-ICICIBANK'),
+                 ('VM-MOBIKW', 'AD-PAYTMWLT', 'JX-PHONEPE', 'BW-AMAZONPAY')),
+}
+SENDER_MIX = (('trai', 0.6), ('bank_code', 0.2), ('short_code', 0.1), ('extended', 0.1))
+
+# Senders of fraud messages, one group per rejection rule of the validation stage
+FRAUD_SENDERS = (
+    '+919812345670', '+918800112233', '9876501234', '7012345678',  # Phone numbers
+    '+14155550199', '+447700900123',  # International numbers
+    '18001234567', '8001234567',  # Toll-free numbers
+    'HDFC BANK', 'SBI.CARD', 'AXIS_BK',  # Invalid characters
+    'support', 'alerts', 'priya', 'admin',  # Lowercase words and personal names
+)
+FRAUD_TEMPLATES = (
+    'Dear Customer, your {bank} account will be blocked today. Update KYC at '
+    'http://bit.ly/{ref} or call {phone}',
+    'Rs.{amount} debited from your A/c XX{account}. If not done by you click '
+    'http://secure-{ref}.in to cancel the transaction',
+    'Congratulations! Rs.{amount} cashback credited to your {wallet} wallet. Share OTP {otp} '
+    'to claim now',
+    'Your {bank} Credit Card XX{card} reward points worth Rs.{amount} expire today. Redeem at '
+    'http://rwd{ref}.co',
+)
+
+# Merchant popularity follows a Zipf law with this exponent over MERCHANT_POOL's order
+MERCHANT_ZIPF = 1.1
+MERCHANT_POOL = KNOWN_MERCHANTS + LOCAL_MERCHANTS
+
+# Labels CorpusGenerator.labelled() yields besides the MESSAGE_MIX kinds
+FRAUD = 'fraud'
+DUPLICATE = 'duplicate'  # Re-sent verbatim, same timestamp
+REDELIVERY = 'redelivery'  # Same message delivered again up to REDELIVERY_DELAY later
+REDELIVERY_DELAY_SECONDS = 300
+
+# Stale messages are dated from STALE_MARGIN to STALE_MARGIN + STALE_SPAN before the window
+STALE_MARGIN_SECONDS = 12 * 3600
+STALE_SPAN_SECONDS = 52 * 24 * 3600 + 12 * 3600
+
+# Expenses kept as duplicate and re-delivery candidates
+RECENT_EXPENSES = 1000
+
+_KIND_TEMPLATES = {'expense': EXPENSE_TEMPLATES, 'credit': CREDIT_TEMPLATES,
+                   'promo': PROMO_TEMPLATES, 'otp': OTP_TEMPLATES,
+                   'personal': PERSONAL_TEMPLATES, FRAUD: FRAUD_TEMPLATES}
+
+
+def _digits(low, high):
+    span = high - low + 1
+    return lambda rng, date: str(low + int(rng.random() * span))
+
+
+# Template field -> function of (rng, date) drawing its text; merchants are drawn separately
+_FIELDS = {
+    'amount': lambda rng, date: _format_amount(rng, _amount(rng)),
+    'bank': lambda rng, date: BANK_NAMES[int(rng.random() * len(BANK_NAMES))],
+    'wallet': lambda rng, date: WALLETS[int(rng.random() * len(WALLETS))],
+    'account': _digits(1000, 9999),
+    'card': _digits(1000, 9999),
+    'ref': _digits(10 ** 11, 10 ** 12 - 1),
+    'otp': _digits(100000, 999999),
+    'phone': lambda rng, date: f"+91{7000000000 + int(rng.random() * 3000000000)}",
+    'percent': lambda rng, date: str((10, 20, 30, 50)[int(rng.random() * 4)]),
+    'day': lambda rng, date: f"{date.day:02d}-{date.month:02d}-{date.year % 100:02d}",
+    'clock': lambda rng, date: f"{date.hour:02d}:{date.minute:02d}:{date.second:02d}",
+    'balance': lambda rng, date: _format_amount(rng, round(rng.uniform(100, 200000), 2)),
+    'limit': lambda rng, date: _format_amount(rng, round(rng.uniform(1000, 500000), 2)),
+}
+
+
+def _template_fields(template):
+    return tuple(dict.fromkeys(field for _, field, _, _ in Formatter().parse(template)
+                               if field and field != 'merchant'))
+
+
+def _cumulative(weights):
+    return list(accumulate(weights))
+
+
+class CorpusGenerator:
+    """
+    Seeded SMS stream with a configurable composition, for load and scaling tests.
+
+    message_mix weighs the MESSAGE_MIX kinds and sender_mix the SENDER_FORMATS that bank and
+    wallet messages are sent from. Merchants are drawn from MERCHANT_POOL with Zipf exponent
+    merchant_zipf (0 is uniform). Of all messages, duplicate_rate re-send a recent expense
+    verbatim, redelivery_rate deliver one again a little later, fraud_ratio are phishing
+    messages from FRAUD_SENDERS and stale_rate are dated before the days-long window ending at
+    now, older than it by STALE_MARGIN_SECONDS up to STALE_MARGIN_SECONDS + STALE_SPAN_SECONDS.
+    Every iteration restarts from the seed, so the same configuration always yields the same
+    stream; only the template fields a body uses are drawn.
+    """
+
+    def __init__(self, seed=0, now=REFERENCE_NOW, days=7, message_mix=MESSAGE_MIX,
+                 sender_mix=SENDER_MIX, merchant_zipf=MERCHANT_ZIPF, duplicate_rate=0.03,
+                 redelivery_rate=0.02, fraud_ratio=0.02, stale_rate=0.02):
+        unknown = [name for name, _ in sender_mix if name not in SENDER_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown sender formats: {', '.join(unknown)}")
+        if duplicate_rate + redelivery_rate + fraud_ratio > 1:
+            raise ValueError("duplicate_rate, redelivery_rate and fraud_ratio add up to over 1")
+        self.seed = seed
+        self.now = now
+        self.window_seconds = days * 24 * 3600
+        self.kinds = tuple(kind for kind, _ in message_mix)
+        self.kind_weights = _cumulative(weight for _, weight in message_mix)
+        self.sender_formats = tuple(SENDER_FORMATS[name] for name, _ in sender_mix)
+        self.sender_weights = _cumulative(weight for _, weight in sender_mix)
+        self.merchant_weights = _cumulative(1 / rank ** merchant_zipf
+                                            for rank in range(1, len(MERCHANT_POOL) + 1))
+        self.duplicate_rate = duplicate_rate
+        self.redelivery_rate = redelivery_rate
+        self.fraud_ratio = fraud_ratio
+        self.stale_rate = stale_rate
+        # kind -> [(template, its fields, whether it names a merchant)]
+        self.templates = {kind: [(template, _template_fields(template), '{merchant}' in template)
+                                 for template in templates]
+                          for kind, templates in _KIND_TEMPLATES.items()}
+
+    def _pick(self, rng, items, cumulative):
+        return items[bisect(cumulative, rng.random() * cumulative[-1])]
+
+    def _date(self, rng):
+        if rng.random() < self.stale_rate:
+            stale = self.window_seconds + STALE_MARGIN_SECONDS
+            seconds = int(rng.uniform(stale, stale + STALE_SPAN_SECONDS))
+        else:
+            seconds = int(rng.random() * self.window_seconds)
+        return self.now.replace(microsecond=0) - timedelta(seconds=seconds)
+
+    def _sender(self, rng, kind, template):
+        if kind == FRAUD:
+            return FRAUD_SENDERS[int(rng.random() * len(FRAUD_SENDERS))]
+        if kind == 'promo':
+            return PROMO_SENDERS[int(rng.random() * len(PROMO_SENDERS))]
+        if kind == 'personal':
+            return PERSONAL_SENDERS[int(rng.random() * len(PERSONAL_SENDERS))]
+        bank, wallet = self._pick(rng, self.sender_formats, self.sender_weights)
+        senders = wallet if 'wallet' in template else bank
+        return senders[int(rng.random() * len(senders))]
+
+    def _message(self, rng, kind):
+        """A fresh message of kind, and its merchant (None when the body names none)."""
+        templates = self.templates[kind]
+        template, fields, names_merchant = templates[int(rng.random() * len(templates))]
+        date = self._date(rng)
+        values = {field: _FIELDS[field](rng, date) for field in fields}
+        merchant = None
+        if names_merchant:
+            merchant = values['merchant'] = self._pick(rng, MERCHANT_POOL, self.merchant_weights)
+        return SmsMessage(sender=self._sender(rng, kind, template),
+                          body=template.format_map(values), date=date), merchant
+
+    def labelled(self, count):
+        """
+        Yield count (SmsMessage, label, merchant) triples: the label is the message kind,
+        FRAUD, DUPLICATE or REDELIVERY, and merchant the MERCHANT_POOL name the body names.
+        """
+        rng = random.Random(self.seed)
+        duplicate = self.duplicate_rate
+        redelivery = duplicate + self.redelivery_rate
+        fraud = redelivery + self.fraud_ratio
+        recent = []
+        for _ in range(count):
+            draw = rng.random()
+            if draw < redelivery and not recent:
+                # Nothing to deliver again yet: draw again among the fresh messages
+                draw = redelivery + rng.random() * (1 - redelivery)
+            if draw < redelivery:
+                original, merchant = recent[int(rng.random() * len(recent))]
+                if draw < duplicate:
+                    yield (SmsMessage(sender=original.sender, body=original.body,
+                                      date=original.date), DUPLICATE, merchant)
+                else:
+                    delay = timedelta(seconds=1 + int(rng.random() * REDELIVERY_DELAY_SECONDS))
+                    yield (SmsMessage(sender=original.sender, body=original.body,
+                                      date=original.date + delay), REDELIVERY, merchant)
+                continue
+
+            kind = FRAUD if draw < fraud else self._pick(rng, self.kinds, self.kind_weights)
+            message, merchant = self._message(rng, kind)
+            if kind == 'expense':
+                if len(recent) < RECENT_EXPENSES:
+                    recent.append((message, merchant))
+                else:
+                    recent[int(rng.random() * RECENT_EXPENSES)] = (message, merchant)
+            yield message, kind, merchant
+
+    def messages(self, count):
+        """Yield count SmsMessage records."""
+        for message, _, _ in self.labelled(count):
+            yield message
@@ -0,0 +1,58 @@
+"""
+Title Generation Stage
+Payment method detection and the "Category: Method HH:MM" expense title from
+lib/services/sms_listener.dart.
+"""
+
+UPI_MARKERS = ('upi', 'gpay', 'phonepe', 'paytm', 'bhim', 'amazon pay')
+CARD_MARKERS = ('card', 'visa', 'mastercard', 'rupay')
+NET_BANKING_MARKERS = ('netbanking', 'net banking', 'online transfer', 'neft', 'rtgs', 'imps')
+ATM_MARKERS = ('atm', 'cash withdrawal', 'withdrawn')
+CREDIT_CARD_MARKERS = ('credit card', 'card no.', 'avl limit', 'available limit')
+DEBIT_CARD_MARKERS = ('debit card', 'debit from')
+# 'card' alongside one of these also decides the card type
+CREDIT_CARD_CONTEXT = 'limit'
+DEBIT_CARD_CONTEXT = 'debited'
+
+# Every phrase payment_method() looks for
+PAYMENT_TERMS = (CREDIT_CARD_MARKERS + DEBIT_CARD_MARKERS
+                 + (CREDIT_CARD_CONTEXT, DEBIT_CARD_CONTEXT)
+                 + UPI_MARKERS + CARD_MARKERS + NET_BANKING_MARKERS + ATM_MARKERS)
+
+
+def _contains_any(body, markers):
+    for marker in markers:
+        if marker in body:
+            return True
+    return False
+
+
+def detect_payment_method(body):
+    """Credit Card, Debit Card, UPI, Card, Net Banking, ATM or Bank, checked in that order."""
+    return payment_method(body.lower())
+
+
+def payment_method(body):
+    """
+    detect_payment_method() for a lowercased body, or for the set of PAYMENT_TERMS found in
+    one: every check is a membership test.
+    """
+    card = 'card' in body
+    if _contains_any(body, CREDIT_CARD_MARKERS) or (card and CREDIT_CARD_CONTEXT in body):
+        return 'Credit Card'
+    if _contains_any(body, DEBIT_CARD_MARKERS) or (card and DEBIT_CARD_CONTEXT in body):
+        return 'Debit Card'
+    if _contains_any(body, UPI_MARKERS):
+        return 'UPI'
+    if _contains_any(body, CARD_MARKERS):
+        return 'Card'
+    if _contains_any(body, NET_BANKING_MARKERS):
+        return 'Net Banking'
+    if _contains_any(body, ATM_MARKERS):
+        return 'ATM'
+    return 'Bank'
+
+
+def expense_title(category, payment_method, date):
+    """The saved expense title, e.g. "Food: UPI 09:05"."""
+    return f"{category.name}: {payment_method} {date.hour:02d}:{date.minute:02d}"
@@ -0,0 +1,212 @@
+"""
+Pipeline Tracing
+Named latency spans for the pipeline stages, each categorization layer and the learned pattern
+check, collected into latency histograms, with optional cProfile and tracemalloc capture of a
+whole run (including a traced memory timeline) and a JSON-ready report. These are the
+measurements behind the performance figures quoted in the paper and drawn in the architecture
+diagram.
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+from .categorizer import (LAYER_KEYWORDS, LAYER_MERCHANT_API, LAYER_MERCHANT_DB,
+                          best_keyword_category, extract_wallet_merchant, resolve_merchant_names)
+from .matcher import default_category_index
+from .models import Category
+from .pipeline import STAGES, SmsPipeline
+from .stats import LatencyHistogram
+
+# Span names beyond the pipeline stages; they nest inside the categorize stage
+CATEGORIZE_SPANS = ('learning', 'categorize.scan', 'categorize.merchant_db',
+                    'categorize.merchant_api', 'categorize.keywords')
+
+PROFILE_TOP = 25
+# Messages between traced memory samples
+MEMORY_SAMPLE_INTERVAL = 100
+
+
+class _Span:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """
+    Latency histograms by span name.
+
+    with tracer.span(name): times the block into that span. with tracer.capture(): times a
+    whole run and, when enabled, runs it under cProfile and/or tracemalloc; both slow the
+    run down, so take latency figures from a run without them. While tracemalloc runs,
+    sample_memory() adds an (elapsed s, messages, traced MB) point to memory_timeline.
+    """
+
+    def __init__(self, profile=False, trace_memory=False):
+        self.histograms = {}
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+        self.elapsed = None
+        self.peak_memory = None
+        self.memory_timeline = []
+        self.started = None
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def span(self, name):
+        return _Span(self.histogram(name))
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def capture(self):
+        return _Capture(self)
+
+    def sample_memory(self, messages):
+        if self.started is not None and tracemalloc.is_tracing():
+            self.memory_timeline.append((time.perf_counter() - self.started, messages,
+                                         tracemalloc.get_traced_memory()[0] / (1024 * 1024)))
+
+    def profile_summary(self, limit=PROFILE_TOP):
+        """The most expensive functions by cumulative time, ready for JSON."""
+        if self.profiler is None:
+            return None
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_s': total,
+                'cumulative_s': cumulative,
+            })
+        rows.sort(key=lambda row: row['cumulative_s'], reverse=True)
+        return rows[:limit]
+
+    def report(self):
+        """Span summaries plus run time, peak traced memory and the profile, ready for JSON."""
+        return {
+            'elapsed_s': self.elapsed,
+            'peak_memory_mb': self.peak_memory / (1024 * 1024) if self.peak_memory else None,
+            'spans': {name: histogram.summary() for name, histogram in self.histograms.items()},
+            'profile': self.profile_summary(),
+            'memory_timeline': [list(point) for point in self.memory_timeline],
+        }
+
+
+class _Capture:
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def __enter__(self):
+        tracer = self.tracer
+        if tracer.trace_memory:
+            tracemalloc.start()
+        if tracer.profiler is not None:
+            tracer.profiler.enable()
+        tracer.memory_timeline = []
+        tracer.started = time.perf_counter()
+        tracer.sample_memory(0)
+        return tracer
+
+    def __exit__(self, *exc_info):
+        tracer = self.tracer
+        tracer.elapsed = time.perf_counter() - tracer.started
+        if tracer.profiler is not None:
+            tracer.profiler.disable()
+        if tracer.trace_memory:
+            tracer.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        tracer.started = None
+        return False
+
+
+class TracedCategorizer:
+    """
+    categorize_with_layer_indexed() with a span for the body scan and for each layer that
+    runs. Mirrors CategoryIndex.categorize_with_layer() step for step, so results are the same.
+    """
+
+    def __init__(self, tracer, index=None):
+        self.tracer = tracer
+        self.index = index if index is not None else default_category_index()
+
+    def __call__(self, sms_body, amount, merchant_lookup=None):
+        index, span = self.index, self.tracer.span
+        with span('categorize.scan'):
+            body = sms_body.lower()
+            found = index.matcher.find_all(body)
+            wallet_merchant = extract_wallet_merchant(body)
+
+        with span('categorize.merchant_db'):
+            category = index.merchant_db_category(wallet_merchant, found)
+        if category is not None:
+            return category, LAYER_MERCHANT_DB
+
+        if merchant_lookup is not None:
+            with span('categorize.merchant_api'):
+                category = resolve_merchant_names(index.merchant_names(wallet_merchant, found),
+                                                  merchant_lookup)
+            if category is not None:
+                return category, LAYER_MERCHANT_API
+
+        with span('categorize.keywords'):
+            category = best_keyword_category(index.keyword_scores(body, amount, found))
+        return category, LAYER_KEYWORDS
+
+
+class TracedPipeline(SmsPipeline):
+    """
+    SmsPipeline whose stage latencies go to a Tracer, with per-layer categorization spans and,
+    when patterns (a learning.PatternIndex) is given, a learning span for the learned pattern
+    check SmartCategorizer runs when the hybrid layers return Miscellaneous. The check is timed
+    only; categories still come from the hybrid layers. Under a memory-tracing capture, traced
+    memory is sampled every memory_interval received messages.
+    """
+
+    def __init__(self, tracer=None, patterns=None, memory_interval=MEMORY_SAMPLE_INTERVAL,
+                 **options):
+        self.tracer = tracer if tracer is not None else Tracer()
+        options.setdefault('categorizer', TracedCategorizer(self.tracer))
+        super().__init__(**options)
+        self.latency = {name: self.tracer.histogram(name) for name in STAGES}
+        self.patterns = patterns
+        self.memory_interval = memory_interval
+
+    def _count_received(self, messages):
+        if not self.tracer.trace_memory:
+            yield from super()._count_received(messages)
+            return
+        for message in super()._count_received(messages):
+            if self.received % self.memory_interval == 0:
+                self.tracer.sample_memory(self.received)
+            yield message
+
+    def stage_categorize(self, message):
+        kept = super().stage_categorize(message)
+        if self.patterns is not None and message.category is Category.Miscellaneous:
+            with self.tracer.span('learning'):
+                self.patterns.match(message.body, message.amount, message.date)
+        return kept
+
+    def report(self):
+        report = super().report()
+        report['spans'] = {name: self.tracer.histograms[name].summary()
+                           for name in CATEGORIZE_SPANS if name in self.tracer.histograms}
+        return report
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+SMS Pipeline Trace
+Runs a seeded synthetic corpus through the traced SMS pipeline and writes a run report with a
+latency histogram for every stage, categorization layer and the learned pattern check, the
+throughput, the peak traced memory and optionally a cProfile summary. The memory timeline is
+written to a file beside the report, which is not version controlled. The architecture diagram
+and the benchmark figures read their performance figures from these files.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+from sms_pipeline import REFERENCE_NOW, STAGES, categorize_with_layer_indexed, generate_messages
+from sms_pipeline.tracing import CATEGORIZE_SPANS, TracedPipeline, Tracer
+
+# Beside this script, where generate_architecture_diagram.py reads it
+RUN_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'sms_pipeline_run_report.json')
+# Appended to the report's base name for the memory timeline file
+TIMELINE_SUFFIX = '.memory_timeline.json'
+# Written into the report by evaluate_categorization.py; kept when the run is traced again
+EVALUATION_KEYS = ('accuracy', 'accuracy_evaluation')
+DEFAULT_SIZE = 100000
+DEFAULT_PATTERNS = 1000
+# tracemalloc slows every allocation down, so peak memory is measured on a separate run
+MEMORY_RUN_SIZE = 100000
+VERIFY_ROWS = 5000
+
+
+def learned_patterns(count, seed=0):
+    """A PatternIndex of count corrections, as if users had confirmed the hybrid category."""
+    from sms_pipeline import extract_amount
+    from sms_pipeline.learning import PatternIndex
+
+    patterns = PatternIndex()
+    for message in generate_messages(count * 3, seed=seed):
+        amount = extract_amount(message.body.lower())
+        if amount is None:
+            continue
+        category, _ = categorize_with_layer_indexed(message.body, amount)
+        patterns.learn(message.body, amount, message.date, category)
+        if len(patterns.categories) == count:
+            break
+    return patterns
+
+
+def traced_run(messages, patterns, tracer):
+    pipeline = TracedPipeline(tracer, patterns=patterns, now=REFERENCE_NOW)
+    with tracer.capture():
+        saved = pipeline.process(messages)
+    return pipeline, saved
+
+
+def verify(saved, rows, seed=0):
+    """Saved expenses whose traced category differs from the untraced indexed categorizer."""
+    rng = random.Random(seed)
+    sample = rng.sample(saved, min(rows, len(saved)))
+    return sum(1 for message in sample
+               if categorize_with_layer_indexed(message.body_lower, message.amount)
+               != (message.category, message.layer))
+
+
+def build_report(size, seed, patterns, profile=False, memory=True):
+    messages = list(generate_messages(size, seed=seed))
+    tracer = Tracer()
+    pipeline, saved = traced_run(messages, patterns, tracer)
+    report = pipeline.report()
+    stage_time = sum(stats['mean_us'] * stats['count'] for stats in report['stages'].values())
+    report.update({
+        'benchmark': 'sms_pipeline_trace',
+        'size': size,
+        'seed': seed,
+        'patterns': len(patterns.categories) if patterns is not None else 0,
+        'elapsed_s': tracer.elapsed,
+        'messages_per_sec': size / tracer.elapsed,
+        'pipeline_ms_per_sms': stage_time / 1000 / size,
+        'mismatches': verify(saved, VERIFY_ROWS, seed=seed),
+    })
+
+    if memory:
+        # Streamed straight from the generator, as a sync would read the inbox
+        memory_tracer = Tracer(trace_memory=True)
+        traced_run(generate_messages(min(size, MEMORY_RUN_SIZE), seed=seed), patterns,
+                   memory_tracer)
+        memory_report = memory_tracer.report()
+        report['peak_memory_mb'] = memory_report['peak_memory_mb']
+        report['memory_run_size'] = min(size, MEMORY_RUN_SIZE)
+        # [elapsed s, messages received, traced MB] every MEMORY_SAMPLE_INTERVAL messages
+        report['memory_timeline'] = memory_report['memory_timeline']
+    if profile:
+        profile_tracer = Tracer(profile=True)
+        traced_run(messages, patterns, profile_tracer)
+        report['profile'] = profile_tracer.profile_summary()
+    return report
+
+
+def timeline_path(report_path):
+    return os.path.splitext(report_path)[0] + TIMELINE_SUFFIX
+
+
+def print_report(report):
+    print(f"📨 {report['size']:,} messages: {report['messages_per_sec']:,.0f} msgs/sec, "
+          f"{report['pipeline_ms_per_sms']:.4f}ms pipeline time per SMS, "
+          f"{report['saved']:,} expenses saved")
+    if report.get('peak_memory_mb') is not None:
+        print(f"   peak traced memory {report['peak_memory_mb']:.1f} MB "
+              f"({report['memory_run_size']:,} streamed messages)")
+    print(f"   {'span':<26}{'calls':>10}{'p50 µs':>10}{'p99 µs':>10}{'max µs':>10}")
+    spans = [(name, report['stages'][name]) for name in STAGES]
+    spans += [(name, report['spans'][name]) for name in CATEGORIZE_SPANS
+              if name in report['spans']]
+    for name, stats in spans:
+        print(f"   {name:<26}{stats['count']:>10,}{stats['p50_us']:>10.1f}"
+              f"{stats['p99_us']:>10.1f}{stats['max_us']:>10.0f}")
+    for row in (report.get('profile') or [])[:10]:
+        print(f"   {row['cumulative_s']:>8.3f}s {row['calls']:>10,}  {row['function']}")
+
+
+def main(argv=None):
+    """Trace the SMS pipeline and write the run report."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='Corpus size')
+    parser.add_argument('--patterns', type=int, default=DEFAULT_PATTERNS,
+                        help='Learned patterns checked per Miscellaneous expense (0 skips the '
+                             'learning span)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Add a cProfile summary from a separate run')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the tracemalloc run for peak memory')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    parser.add_argument('--output', default=RUN_REPORT,
+                        help=f"Run report path (default: {os.path.basename(RUN_REPORT)} beside "
+                             "this script, read by the diagram)")
+    args = parser.parse_args(argv)
+
+    patterns = learned_patterns(args.patterns, seed=args.seed + 1) if args.patterns else None
+    print(f"Tracing SMS pipeline on {args.size:,} messages, seed {args.seed}...\n")
+    report = build_report(args.size, args.seed, patterns, profile=args.profile,
+                          memory=not args.no_memory)
+    print_report(report)
+
+    if os.path.exists(args.output):
+        with open(args.output, encoding='utf-8') as source:
+            previous = json.load(source)
+        report.update((key, previous[key]) for key in EVALUATION_KEYS if key in previous)
+    timeline = report.pop('memory_timeline', None)
+    if timeline is not None:
+        path = timeline_path(args.output)
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(timeline, output)
+        # Relative to the report, so the pair can be moved together
+        report['memory_timeline_file'] = os.path.basename(path)
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+    print(f"\n✅ Saved: {args.output}")
+    if timeline is not None:
+        print(f"✅ Saved: {path}")
+    return 1 if report['mismatches'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
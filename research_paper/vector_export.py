@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Compact Vector Export
+Writes a laid-out diagram (diagram_spec.layout()) straight to SVG and PDF instead of going
+through matplotlib's vector backends, which emit every glyph and every arrow as its own path.
+Shapes that repeat are defined once and placed with <use>, text stays text in SVG (Arial) and is
+outlined in PDF, where unembedded fonts fail print preflight (the metric-compatible Helvetica
+core fonts remain an option), coordinates are quantized to a grid of points and the output is
+minified (PDF content is Flate-compressed).
+"""
+
+import math
+import os
+import zlib
+from xml.sax.saxutils import escape
+
+POINTS_PER_INCH = 72
+
+# Coordinates are rounded to 10^-precision points
+DEFAULT_PRECISION = 1
+
+COMPACT_FORMATS = ('svg', 'pdf')
+
+# FancyArrowPatch defaults for arrowstyle '->': both ends shrink by 2 points, and the head is
+# 0.4 x 0.2 of the mutation scale
+ARROW_SHRINK = 2.0
+HEAD_LENGTH = 0.4
+HEAD_WIDTH = 0.2
+# matplotlib's '--' dash pattern, in multiples of the line width
+DASH_PATTERN = (3.7, 1.6)
+# Text line pitch as a multiple of the font size (matplotlib linespacing 1.2 over Helvetica's
+# ascender-to-descender height)
+LINE_PITCH = 1.2 * 0.925
+
+SVG_FONT_FAMILY = 'Arial,Helvetica,sans-serif'
+
+# How PDF text is drawn: as glyph outlines, which needs no fonts in the file, or with the
+# Helvetica core fonts, smaller and selectable but not embedded, which journal preflight rejects
+PDF_TEXT_OUTLINES = 'outlines'
+PDF_TEXT_CORE_FONTS = 'core-fonts'
+PDF_TEXT_MODES = (PDF_TEXT_OUTLINES, PDF_TEXT_CORE_FONTS)
+# Outline coordinates are rounded to 10^-precision of a point at a 100 point font size
+GLYPH_PRECISION = 0
+
+# PDF core fonts by (weight, style), with the AFM files matplotlib ships for them
+PDF_FONTS = {
+    ('normal', 'normal'): ('Helvetica', 'phvr8a.afm'),
+    ('bold', 'normal'): ('Helvetica-Bold', 'phvb8a.afm'),
+    ('normal', 'italic'): ('Helvetica-Oblique', 'phvro8a.afm'),
+    ('bold', 'italic'): ('Helvetica-BoldOblique', 'phvbo8a.afm'),
+}
+
+# Glyph names of the WinAnsi characters outside ASCII that diagram text tends to use; lines with
+# any other character are drawn as outlines in the PDF
+WINANSI_GLYPHS = {
+    '•': 'bullet', '–': 'endash', '—': 'emdash', '…': 'ellipsis', '‘': 'quoteleft',
+    '’': 'quoteright', '“': 'quotedblleft', '”': 'quotedblright', '×': 'multiply',
+    '°': 'degree', '±': 'plusminus', '·': 'periodcentered', '©': 'copyright',
+    '®': 'registered', '™': 'trademark', '€': 'Euro',
+}
+
+
+def _number(value, precision):
+    """Shortest text for a value on the quantization grid: no trailing zeros, no leading 0."""
+    text = f"{round(value, precision):.{precision}f}".rstrip('0').rstrip('.') if precision \
+        else str(round(value))
+    if text in ('-0', ''):
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _numbers(values, precision):
+    """Space-separated numbers, as PDF operands need them."""
+    return ' '.join(_number(value, precision) for value in values)
+
+
+def _path_numbers(values, precision):
+    """Numbers for SVG path data, where a minus sign already separates two numbers."""
+    return ''.join(text if index == 0 or text.startswith('-') else ' ' + text
+                   for index, text in enumerate(_number(value, precision) for value in values))
+
+
+def _rgb(color):
+    """(r, g, b) in 0..1 for a color, or None for 'none'."""
+    if color is None or color == 'none':
+        return None
+    from matplotlib.colors import to_rgb
+    return to_rgb(color)
+
+
+def _hex(color):
+    rgb = _rgb(color)
+    if rgb is None:
+        return 'none'
+    digits = ''.join(f"{round(channel * 255):02x}" for channel in rgb)
+    if digits[0::2] == digits[1::2]:
+        return '#' + digits[0::2]
+    return '#' + digits
+
+
+class _Geometry:
+    """Page geometry in points with the origin at the bottom left, shared by both writers."""
+
+    def __init__(self, layout, pad_inches):
+        width, height = layout['size']
+        self.pad = pad_inches * POINTS_PER_INCH
+        self.width = width * POINTS_PER_INCH + 2 * self.pad
+        self.height = height * POINTS_PER_INCH + 2 * self.pad
+
+    def point(self, x, y):
+        return (x * POINTS_PER_INCH + self.pad, y * POINTS_PER_INCH + self.pad)
+
+    def arrow(self, element):
+        """Shaft start, tip and the two head ends of an arrow, in page points."""
+        start = self.point(element['x0'], element['y0'])
+        end = self.point(element['x1'], element['y1'])
+        length = math.hypot(end[0] - start[0], end[1] - start[1])
+        if length <= 2 * ARROW_SHRINK:
+            return None
+        ux, uy = (end[0] - start[0]) / length, (end[1] - start[1]) / length
+        tail = (start[0] + ARROW_SHRINK * ux, start[1] + ARROW_SHRINK * uy)
+        tip = (end[0] - ARROW_SHRINK * ux, end[1] - ARROW_SHRINK * uy)
+        back = HEAD_LENGTH * element['scale']
+        side = HEAD_WIDTH * element['scale']
+        heads = [(tip[0] - back * ux + sign * side * uy, tip[1] - back * uy - sign * side * ux)
+                 for sign in (1, -1)]
+        return tail, tip, heads
+
+
+class _FontMetrics:
+    """Advance widths, ascender and descender of a core font, read from its AFM file."""
+
+    def __init__(self, afm_name):
+        import matplotlib
+
+        path = os.path.join(matplotlib.get_data_path(), 'fonts', 'afm', afm_name)
+        self.widths = {}
+        self.by_code = {}
+        with open(path, encoding='latin-1') as source:
+            for line in source:
+                if line.startswith('Ascender '):
+                    self.ascender = float(line.split()[1]) / 1000
+                elif line.startswith('Descender '):
+                    self.descender = -float(line.split()[1]) / 1000
+                elif line.startswith('C '):
+                    fields = dict(part.strip().split(' ', 1) for part in line.split(';')
+                                  if part.strip())
+                    self.widths[fields['N']] = float(fields['WX']) / 1000
+                    self.by_code[int(fields['C'])] = fields['N']
+        # WinAnsi differs from the AFM's StandardEncoding at these two ASCII codes
+        self.by_code[0x27] = 'quotesingle'
+        self.by_code[0x60] = 'grave'
+
+    def glyph(self, char):
+        if ' ' <= char <= '~':
+            return self.by_code.get(ord(char))
+        return WINANSI_GLYPHS.get(char)
+
+    def width(self, text, size):
+        """Advance width in points, or None when a character has no core font glyph."""
+        total = 0.0
+        for char in text:
+            name = self.glyph(char)
+            if name not in self.widths:
+                return None
+            total += self.widths[name]
+        return total * size
+
+
+def _text_lines(element, geometry, ascender=0.718, descender=0.207):
+    """
+    (line, x, baseline y) in page points for each line of a text element, before rotation.
+    Lines are stacked LINE_PITCH apart and the block is aligned like matplotlib's va.
+    """
+    lines = element['text'].split('\n')
+    size = element['fontsize']
+    x, y = geometry.point(element['x'], element['y'])
+    pitch = LINE_PITCH * size
+    block = (len(lines) - 1) * pitch + (ascender + descender) * size
+    va = element['va']
+    if va == 'top':
+        first = y - ascender * size
+    elif va in ('bottom', 'baseline'):
+        first = y + (len(lines) - 1) * pitch + (descender * size if va == 'bottom' else 0)
+    else:
+        first = y + block / 2 - ascender * size
+    return [(line, x, first - index * pitch) for index, line in enumerate(lines)]
+
+
+# ---------------------------------------------------------------------------
+# SVG
+# ---------------------------------------------------------------------------
+
+def _svg_shape_key(element, geometry, precision):
+    """(definition key, placement point) of a shape drawn relative to one point."""
+    if element['kind'] == 'rect':
+        x, y = geometry.point(element['x'], element['y'] + element['h'])
+        w = element['w'] * POINTS_PER_INCH
+        h = element['h'] * POINTS_PER_INCH
+        return ('rect', _number(w, precision), _number(h, precision)), (x, geometry.height - y)
+    if element['kind'] == 'circle':
+        x, y = geometry.point(element['x'], element['y'])
+        radius = element['radius'] * POINTS_PER_INCH
+        return ('circle', _number(radius, precision)), (x, geometry.height - y)
+    arrow = geometry.arrow(element)
+    if arrow is None:
+        return None, None
+    tail, tip, heads = arrow
+    origin = (tail[0], geometry.height - tail[1])
+
+    def relative(point):
+        return (point[0] - tail[0], tail[1] - point[1])
+
+    tip_rel = relative(tip)
+    head_rel = [relative(point) for point in heads]
+    path = (f"M0 0L{_path_numbers(tip_rel, precision)}M{_path_numbers(head_rel[0], precision)}"
+            f"L{_path_numbers(tip_rel, precision)}L{_path_numbers(head_rel[1], precision)}")
+    return ('arrow', path), origin
+
+
+def _svg_definition(key, ident):
+    if key[0] == 'rect':
+        return f'<rect id="{ident}" width="{key[1]}" height="{key[2]}"/>'
+    if key[0] == 'circle':
+        return f'<circle id="{ident}" r="{key[1]}"/>'
+    return f'<path id="{ident}" d="{key[1]}"/>'
+
+
+def _svg_inline(key, x, y):
+    if key[0] == 'rect':
+        return f'<rect x="{x}" y="{y}" width="{key[1]}" height="{key[2]}"/>'
+    if key[0] == 'circle':
+        return f'<circle cx="{x}" cy="{y}" r="{key[1]}"/>'
+    return f'<path transform="translate({x} {y})" d="{key[1]}"/>'
+
+
+def _svg_style(element, precision):
+    """Presentation attributes of a shape, shared by consecutive shapes that match."""
+    width = _number(element['linewidth'], precision)
+    if element['kind'] == 'arrow':
+        style = f'fill="none" stroke="{_hex(element["color"])}" stroke-width="{width}" ' \
+                'stroke-linecap="round" stroke-linejoin="round"'
+        if element['linestyle'] == '--':
+            dashes = ' '.join(_number(part * element['linewidth'], precision)
+                              for part in DASH_PATTERN)
+            style += f' stroke-dasharray="{dashes}"'
+        return style
+    return (f'fill="{_hex(element["facecolor"])}" stroke="{_hex(element["edgecolor"])}" '
+            f'stroke-width="{width}"')
+
+
+def compact_svg(layout, facecolor='white', pad_inches=0.1, precision=DEFAULT_PRECISION):
+    """Minified SVG text of a laid-out diagram."""
+    geometry = _Geometry(layout, pad_inches)
+    shapes = []
+    for element in layout['elements']:
+        if element['kind'] != 'text':
+            key, origin = _svg_shape_key(element, geometry, precision)
+            if key is not None:
+                shapes.append((element, key, origin))
+
+    # Shapes that occur more than once become definitions
+    counts = {}
+    for _, key, _ in shapes:
+        counts[key] = counts.get(key, 0) + 1
+    ids = {}
+    for _, key, _ in shapes:
+        if counts[key] > 1 and key not in ids:
+            ids[key] = _short_id(len(ids))
+
+    width = _number(geometry.width, precision)
+    height = _number(geometry.height, precision)
+    # xlink:href on <use>, since SVG 1.1 consumers (Inkscape 0.92 among them) ignore plain href
+    xlink = ' xmlns:xlink="http://www.w3.org/1999/xlink"' if ids else ''
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg"{xlink} width="{width}pt" '
+           f'height="{height}pt" viewBox="0 0 {width} {height}">']
+    if ids:
+        out.append('<defs>' + ''.join(_svg_definition(key, ident) for key, ident in ids.items())
+                   + '</defs>')
+    if _rgb(facecolor) is not None:
+        out.append(f'<rect width="100%" height="100%" fill="{_hex(facecolor)}"/>')
+
+    _svg_groups(out, shapes, lambda item: _svg_style(item[0], precision),
+                lambda item: _svg_place(item, ids, precision))
+    texts = [element for element in layout['elements'] if element['kind'] == 'text']
+    out.append(f'<g font-family="{SVG_FONT_FAMILY}">')
+    _svg_groups(out, texts, lambda element: _svg_text_style(element, precision),
+                lambda element: _svg_text(element, geometry, precision))
+    out.append('</g></svg>')
+    return ''.join(out)
+
+
+def _short_id(index):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    ident = ''
+    index += 1
+    while index:
+        index, digit = divmod(index - 1, len(letters))
+        ident = letters[digit] + ident
+    return ident
+
+
+def _svg_groups(out, items, style, draw):
+    """Wrap runs of consecutive items with the same style in one <g>, keeping draw order."""
+    run_style = None
+    for item in items:
+        item_style = style(item)
+        if item_style != run_style:
+            if run_style is not None:
+                out.append('</g>')
+            out.append(f'<g {item_style}>')
+            run_style = item_style
+        out.append(draw(item))
+    if run_style is not None:
+        out.append('</g>')
+
+
+def _svg_place(item, ids, precision):
+    _, key, (x, y) = item
+    x, y = _number(x, precision), _number(y, precision)
+    if key in ids:
+        return f'<use xlink:href="#{ids[key]}" x="{x}" y="{y}"/>'
+    return _svg_inline(key, x, y)
+
+
+def _svg_text_style(element, precision):
+    anchor = {'left': 'start', 'right': 'end'}.get(element['ha'], 'middle')
+    style = f'font-size="{_number(element["fontsize"], precision)}" text-anchor="{anchor}"'
+    if element['weight'] == 'bold':
+        style += ' font-weight="bold"'
+    if element['style'] == 'italic':
+        style += ' font-style="italic"'
+    color = _hex(element['color'])
+    if color != '#000':
+        style += f' fill="{color}"'
+    return style
+
+
+def _svg_text(element, geometry, precision):
+    lines = _text_lines(element, geometry)
+    x = _number(lines[0][1], precision)
+    pivot = geometry.point(element['x'], element['y'])
+    rotate = ''
+    if element['rotation']:
+        rotate = (f' transform="rotate({_number(-element["rotation"], precision)} '
+                  f'{_numbers((pivot[0], geometry.height - pivot[1]), precision)})"')
+    if len(lines) == 1:
+        y = _number(geometry.height - lines[0][2], precision)
+        return f'<text x="{x}" y="{y}"{rotate}>{escape(lines[0][0])}</text>'
+    spans = ''.join(f'<tspan x="{x}" y="{_number(geometry.height - baseline, precision)}">'
+                    f'{escape(line)}</tspan>' for line, _, baseline in lines)
+    return f'<text{rotate}>{spans}</text>'
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+def _pdf_string(data):
+    """A PDF literal string for WinAnsi bytes."""
+    out = bytearray(b'(')
+    for byte in data:
+        if byte in b'()\\':
+            out += b'\\' + bytes((byte,))
+        elif byte < 32 or byte > 126:
+            out += f"\\{byte:03o}".encode('ascii')
+        else:
+            out.append(byte)
+    return bytes(out + b')')
+
+
+def _pdf_color(color, stroke, precision):
+    rgb = _rgb(color)
+    if rgb[0] == rgb[1] == rgb[2]:
+        return f"{_number(rgb[0], 3)} {'G' if stroke else 'g'}"
+    return f"{_numbers(rgb, 3)} {'RG' if stroke else 'rg'}"
+
+
+def _pdf_path(vertices, codes, precision):
+    """PDF path operators of a matplotlib path given as vertices and codes."""
+    from matplotlib.path import Path
+
+    operators = []
+    current = (0.0, 0.0)
+    for points, code in Path(vertices, codes).iter_segments(curves=True, simplify=False):
+        if code == Path.MOVETO:
+            operators.append(f"{_numbers(points, precision)} m")
+        elif code == Path.LINETO:
+            operators.append(f"{_numbers(points, precision)} l")
+        elif code == Path.CURVE3:
+            # Raise the quadratic segment to a cubic one
+            (cx, cy), (x, y) = points[:2], points[2:]
+            first = (current[0] + 2 / 3 * (cx - current[0]), current[1] + 2 / 3 * (cy - current[1]))
+            second = (x + 2 / 3 * (cx - x), y + 2 / 3 * (cy - y))
+            operators.append(f"{_numbers((*first, *second, x, y), precision)} c")
+        elif code == Path.CURVE4:
+            operators.append(f"{_numbers(points, precision)} c")
+        elif code == Path.CLOSEPOLY:
+            operators.append('h')
+        if code != Path.CLOSEPOLY:
+            current = tuple(points[-2:])
+    return ' '.join(operators)
+
+
+class _PdfGlyphs:
+    """
+    Outlined text: every glyph's outline is a Form XObject, written once and drawn wherever the
+    glyph occurs. Outlines are taken at a font size of scale points.
+    """
+
+    def __init__(self):
+        from matplotlib.textpath import TextToPath
+
+        self.converter = TextToPath()
+        self.scale = self.converter.FONT_SCALE
+        # glyph id -> (resource name, bounding box, path operators)
+        self.forms = {}
+        self._fonts = {}
+
+    def _font(self, bold, italic):
+        from matplotlib.font_manager import FontProperties, findfont, get_font
+
+        key = (bold, italic)
+        if key not in self._fonts:
+            prop = FontProperties(family='sans-serif', weight='bold' if bold else 'normal',
+                                  style='italic' if italic else 'normal', size=self.scale)
+            self._fonts[key] = prop, get_font(findfont(prop))
+        prop, font = self._fonts[key]
+        font.set_size(self.scale, self.converter.DPI)
+        return prop, font
+
+    def line(self, line, size, bold, italic):
+        """
+        Operators drawing a line from the baseline origin at a font size of scale points, and
+        the line's width in points at size.
+        """
+        prop, font = self._font(bold, italic)
+        width = self.converter.get_text_width_height_descent(line, prop, ismath=False)[0]
+        placed, paths, _ = self.converter.get_glyphs_with_font(font, line)
+        operators = []
+        at = (0.0, 0.0)
+        for glyph, x, y, _ in placed:
+            if glyph not in self.forms:
+                vertices, codes = paths[glyph]
+                if not len(codes):
+                    self.forms[glyph] = None
+                    continue
+                box = (*map(math.floor, vertices.min(axis=0)),
+                       *map(math.ceil, vertices.max(axis=0)))
+                self.forms[glyph] = (f"G{_short_id(len(self.forms))}", box,
+                                     _pdf_path(vertices, codes, GLYPH_PRECISION))
+            form = self.forms[glyph]
+            if form is None:
+                continue
+            # Step between quantized positions, so rounding does not accumulate along the line
+            target = (round(x, 1), round(y, 1))
+            if target != at:
+                step = (target[0] - at[0], target[1] - at[1])
+                operators.append(f"1 0 0 1 {_numbers(step, 1)} cm")
+            operators.append(f"/{form[0]} Do")
+            at = target
+        return ' '.join(operators), width * size / self.scale
+
+    def objects(self, first):
+        """(XObject resources, object bodies) of the glyphs used, numbered from first."""
+        used = [form for form in self.forms.values() if form is not None]
+        resources = ''.join(f"/{name} {first + index} 0 R"
+                            for index, (name, _, _) in enumerate(used))
+        bodies = []
+        for _, box, operators in used:
+            stream = f"{operators} f".encode('ascii')
+            compressed = zlib.compress(stream, 9)
+            # Short outlines are not worth the filter entry
+            flate = len(compressed) + len('/Filter/FlateDecode') < len(stream)
+            if flate:
+                stream = compressed
+            bodies.append(f"<</Subtype/Form/BBox[{_numbers(box, 0)}]/Length {len(stream)}"
+                          f"{'/Filter/FlateDecode' if flate else ''}>>stream\n".encode('ascii')
+                          + stream + b"\nendstream")
+        return resources, bodies
+
+
+def _pdf_content(layout, geometry, facecolor, precision, fonts, glyphs, outline_text=True):
+    """
+    Content stream operators of the page, filling in the core fonts and glyph outlines it uses.
+    Text is outlined unless outline_text is false, and then only lines with characters outside
+    the core fonts are.
+    """
+    ops = []
+    if _rgb(facecolor) is not None:
+        ops.append(f"{_pdf_color(facecolor, False, precision)} 0 0 "
+                   f"{_numbers((geometry.width, geometry.height), precision)} re f")
+    state = {}
+
+    def set_state(name, value):
+        if state.get(name) != value:
+            ops.append(value)
+            state[name] = value
+
+    for element in layout['elements']:
+        kind = element['kind']
+        if kind == 'text':
+            continue
+        set_state('lw', f"{_number(element['linewidth'], precision)} w")
+        if kind == 'arrow':
+            arrow = geometry.arrow(element)
+            if arrow is None:
+                continue
+            set_state('stroke', _pdf_color(element['color'], True, precision))
+            set_state('cap', '1 J 1 j')
+            dashes = [part * element['linewidth'] for part in DASH_PATTERN] \
+                if element['linestyle'] == '--' else []
+            set_state('dash', f"[{_numbers(dashes, precision)}] 0 d")
+            tail, tip, heads = arrow
+            ops.append(f"{_numbers(tail, precision)} m {_numbers(tip, precision)} l "
+                       f"{_numbers(heads[0], precision)} m {_numbers(tip, precision)} l "
+                       f"{_numbers(heads[1], precision)} l S")
+            continue
+        set_state('cap', '0 J 0 j')
+        set_state('dash', '[] 0 d')
+        fill = _rgb(element['facecolor']) is not None
+        stroke = _rgb(element['edgecolor']) is not None
+        if fill:
+            set_state('fill', _pdf_color(element['facecolor'], False, precision))
+        if stroke:
+            set_state('stroke', _pdf_color(element['edgecolor'], True, precision))
+        paint = 'B' if fill and stroke else 'f' if fill else 'S' if stroke else 'n'
+        if kind == 'rect':
+            x, y = geometry.point(element['x'], element['y'])
+            size = (element['w'] * POINTS_PER_INCH, element['h'] * POINTS_PER_INCH)
+            ops.append(f"{_numbers((x, y, *size), precision)} re {paint}")
+        else:
+            ops.append(_pdf_circle(geometry.point(element['x'], element['y']),
+                                   element['radius'] * POINTS_PER_INCH, precision) + f" {paint}")
+
+    for element in layout['elements']:
+        if element['kind'] != 'text':
+            continue
+        key = (element['weight'], element['style'])
+        metrics = fonts.metrics(key)
+        size = element['fontsize']
+        set_state('fill', _pdf_color(element['color'], False, precision))
+        angle = math.radians(element['rotation'])
+        cos, sin = math.cos(angle), math.sin(angle)
+        pivot = geometry.point(element['x'], element['y'])
+        for line, x, baseline in _text_lines(element, geometry, metrics.ascender,
+                                             metrics.descender):
+            width = None if outline_text else metrics.width(line, size)
+            outline = None
+            if width is None:
+                outline, width = glyphs.line(line, size, key[0] == 'bold', key[1] == 'italic')
+            shift = {'left': 0.0, 'right': width}.get(element['ha'], width / 2)
+            # Rotate the line's start about the alignment point
+            dx, dy = x - shift - pivot[0], baseline - pivot[1]
+            origin = (pivot[0] + dx * cos - dy * sin, pivot[1] + dx * sin + dy * cos)
+            matrix = _numbers((cos, sin, -sin, cos), 4) + ' ' + _numbers(origin, precision)
+            if outline is not None:
+                scale = size / glyphs.scale
+                rotation = (cos * scale, sin * scale, -sin * scale, cos * scale)
+                ops.append(f"q {_numbers(rotation, 5)} {_numbers(origin, precision)} cm "
+                           f"{outline} Q")
+                continue
+            font = fonts.use(key)
+            encoded = _pdf_string(line.encode('cp1252'))
+            ops.append(f"BT /{font} {_number(size, precision)} Tf {matrix} Tm "
+                       f"{encoded.decode('latin-1')} Tj ET")
+    return '\n'.join(ops)
+
+
+def _pdf_circle(center, radius, precision):
+    """Four Bezier arcs approximating a circle."""
+    x, y = center
+    k = 0.5523 * radius
+    return (f"{_numbers((x + radius, y), precision)} m "
+            f"{_numbers((x + radius, y + k, x + k, y + radius, x, y + radius), precision)} c "
+            f"{_numbers((x - k, y + radius, x - radius, y + k, x - radius, y), precision)} c "
+            f"{_numbers((x - radius, y - k, x - k, y - radius, x, y - radius), precision)} c "
+            f"{_numbers((x + k, y - radius, x + radius, y - k, x + radius, y), precision)} c")
+
+
+class _PdfFonts:
+    """Core fonts by (weight, style): metrics on demand and resource names as they are used."""
+
+    def __init__(self):
+        self._metrics = {}
+        self.used = {}
+
+    def metrics(self, key):
+        if key not in self._metrics:
+            self._metrics[key] = _FontMetrics(PDF_FONTS[key][1])
+        return self._metrics[key]
+
+    def use(self, key):
+        if key not in self.used:
+            self.used[key] = f"F{len(self.used) + 1}"
+        return self.used[key]
+
+
+def compact_pdf(layout, facecolor='white', pad_inches=0.1, precision=DEFAULT_PRECISION,
+                text=PDF_TEXT_OUTLINES):
+    """
+    A single-page PDF of a laid-out diagram as bytes, with a Flate-compressed content stream.
+    text is one of PDF_TEXT_MODES.
+    """
+    if text not in PDF_TEXT_MODES:
+        raise ValueError(f"Unknown PDF text mode: {text!r}")
+    geometry = _Geometry(layout, pad_inches)
+    fonts = _PdfFonts()
+    glyphs = _PdfGlyphs()
+    content = zlib.compress(
+        _pdf_content(layout, geometry, facecolor, precision, fonts, glyphs,
+                     outline_text=text == PDF_TEXT_OUTLINES).encode('latin-1'), 9)
+
+    font_ids = {key: 5 + index for index, key in enumerate(fonts.used)}
+    font_resources = ''.join(f"/{name} {font_ids[key]} 0 R" for key, name in fonts.used.items())
+    glyph_resources, glyph_objects = glyphs.objects(5 + len(font_ids))
+    resources = f"/Font<<{font_resources}>>" if font_resources else ''
+    if glyph_resources:
+        resources += f"/XObject<<{glyph_resources}>>"
+    objects = [
+        b"<</Type/Catalog/Pages 2 0 R>>",
+        b"<</Type/Pages/Kids[3 0 R]/Count 1>>",
+        (f"<</Type/Page/Parent 2 0 R/MediaBox[0 0 "
+         f"{_numbers((geometry.width, geometry.height), precision)}]"
+         f"/Resources<<{resources}>>/Contents 4 0 R>>").encode('ascii'),
+        f"<</Length {len(content)}/Filter/FlateDecode>>stream\n".encode('ascii') + content
+        + b"\nendstream",
+    ]
+    for key in fonts.used:
+        objects.append(f"<</Type/Font/Subtype/Type1/BaseFont/{PDF_FONTS[key][0]}"
+                       "/Encoding/WinAnsiEncoding>>".encode('ascii'))
+    objects += glyph_objects
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    out += b''.join(f"{offset:010d} 00000 n \n".encode('ascii') for offset in offsets)
+    out += (f"trailer\n<</Size {len(objects) + 1}/Root 1 0 R>>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode('ascii')
+    return bytes(out)
+
+
+def write_compact(layout, basename, formats, facecolor='white', pad_inches=0.1,
+                  precision=DEFAULT_PRECISION, pdf_text=PDF_TEXT_OUTLINES):
+    """Write the compact SVG and/or PDF of a laid-out diagram and return the written paths."""
+    written = []
+    for fmt in formats:
+        output_file = f"{basename}.{fmt}"
+        if fmt == 'svg':
+            with open(output_file, 'w', encoding='utf-8') as output:
+                output.write(compact_svg(layout, facecolor, pad_inches, precision))
+        elif fmt == 'pdf':
+            with open(output_file, 'wb') as output:
+                output.write(compact_pdf(layout, facecolor, pad_inches, precision, pdf_text))
+        else:
+            raise ValueError(f"No compact writer for format: {fmt}")
+        written.append(output_file)
+    return written